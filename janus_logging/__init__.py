@@ -14,12 +14,25 @@ Janus logging
 from __future__ import absolute_import
 
 import asyncio
+import concurrent.futures
+import copy
 import datetime
+import functools
+import itertools
 import json
 import logging
 # import os
 import sys
+import time
+import traceback
+import types
 import typing
+import weakref
+
+try:
+    import contextvars
+except ImportError:  # pragma: no cover
+    contextvars = None
 
 # from aiologger import Logger as aioLogger
 # from aiologger.formatters.json import ExtendedJsonFormatter
@@ -27,13 +40,50 @@ import typing
 # from aiologger.loggers.json import JsonLogger as aioJsonLogger
 # from aiologger.records import LogRecord as aioLogRecord
 
+from .aggregator import (
+    DEFAULT_RETRY_INTERVAL, AggregatorHandler, LogAggregator, spawn_aggregator
+)
+from .binary import (
+    DEFAULT_MAX_NAMES, BinaryEncoder, BinaryFileHandler, BinaryStreamHandler
+)
+from .handlers import (
+    DEFAULT_BUFFER_SIZE, DEFAULT_FILE_BUFFER_SIZE, DEFAULT_FLUSH_INTERVAL,
+    BufferedBytesHandler, FlushPolicy, JanusStreamHandler,
+    ThreadedFileHandler, ThreadedHandler, ThreadedStreamHandler
+)
+from .compression import COMPRESSIONS
+from .context import Context
+from .lazy import DeferredExtra, Lazy, resolve, resolve_args
+from .metrics import HandlerMetrics, Metrics, MetricsServer, to_prometheus
+from .network import AsyncSocketHandler
+from .queue import (
+    DEFAULT_QUEUE_SIZE, OVERFLOW_POLICIES, JanusQueue, QueueBatcher,
+    QueueWriter, Sequencer
+)
+from .ring import DEFAULT_RING_SIZE, RingBufferHandler, RingBufferReader
+from .sampling import EveryN, Probability, Sampler, TokenBucket
+from .serializers import SERIALIZERS, Serializer, get_serializer
 from .version import VERSION
 
 __all__ = [
     'JanusLogger',
-    'AsyncLoggerAdapter', 'SyncLoggerAdapter',
-    'AsyncNullHandler',
-    'fixture_default', 'fixture_json', 'has_logger_by_name',
+    'AsyncLoggerAdapter', 'AsyncQueueLoggerAdapter',
+    'AsyncNowaitLoggerAdapter', 'SyncLoggerAdapter', 'Context', 'DONE',
+    'OVERFLOW_POLICIES', 'JanusQueue', 'QueueBatcher', 'QueueWriter',
+    'Sequencer',
+    'AggregatorHandler', 'LogAggregator', 'spawn_aggregator',
+    'AsyncNullHandler', 'AsyncSocketHandler', 'BinaryFileHandler',
+    'BinaryStreamHandler', 'BufferedBytesHandler', 'FlushPolicy',
+    'JanusStreamHandler', 'RingBufferHandler', 'RingBufferReader',
+    'ThreadedFileHandler', 'ThreadedHandler', 'ThreadedStreamHandler',
+    'COMPRESSIONS',
+    'Lazy', 'Metrics', 'MetricsServer', 'to_prometheus',
+    'SERIALIZERS', 'Serializer', 'get_serializer',
+    'EveryN', 'Probability', 'Sampler', 'TokenBucket',
+    'fixture_default', 'fixture_json', 'fixture_file', 'fixture_json_file',
+    'fixture_json_ring', 'fixture_json_aggregator', 'fixture_json_socket',
+    'fixture_binary', 'fixture_binary_file', 'SyncBinaryFormatter',
+    'has_logger_by_name', 'refresh_levels',
 ]
 __author__ = 'madkote <madkote(at)bluewin.ch>'
 __version__ = '.'.join(str(x) for x in VERSION)
@@ -95,75 +145,404 @@ class AsyncNullHandler(logging.NullHandler):
         pass
 
 
+class _Done(object):
+    '''
+    Awaitable, which is already done - it is not bound to an event loop
+    '''
+    __slots__ = ()
+
+    def __await__(self):
+        return iter(())
+
+    def done(self) -> bool:
+        return True
+
+    def result(self) -> None:
+        return None
+
+
+DONE = _Done()
+_UNSET = object()
+# adapters with a cached level, see `refresh_levels`
+_ADAPTERS = weakref.WeakSet()
+# log methods of adapters and their levels
+_LEVEL_METHODS = (
+    ('debug', logging.DEBUG), ('info', logging.INFO),
+    ('warning', logging.WARNING), ('warn', logging.WARNING),
+    ('error', logging.ERROR), ('exception', logging.ERROR),
+    ('critical', logging.CRITICAL), ('fatal', logging.CRITICAL),
+)
+
+
+def _make_noop(result) -> typing.Callable:
+    def _noop(*args, **kwargs):  # @UnusedVariable
+        return result
+    return _noop
+
+
+def refresh_levels() -> None:
+    '''
+    Refresh the cached levels of all adapters - this is done by `setLevel`
+    of adapters and `JanusLogger`, level changes by other means (e.g.
+    `logging.disable`) need a refresh.
+    '''
+    for adapter in list(_ADAPTERS):
+        adapter._update_level()
+
+
+def _find_caller() -> typing.Tuple:
+    '''
+    Find the caller outside of this module
+    :return: tuple with file name, line number, function name and frame
+    '''
+    f = sys._getframe(1)
+    while f is not None and f.f_code.co_filename in _srcfiles:
+        f = f.f_back
+    if f is None:
+        return '(unknown file)', 0, '(unknown function)', None
+    co = f.f_code
+    return co.co_filename, f.f_lineno, co.co_name, f
+
+
+def _callable_key(msg) -> str:
+    '''
+    Get the sampling key of a message, which is not a string - a function
+    or `Lazy` is identified by its code, other objects by their class
+    :param msg: message
+    :return: key
+    '''
+    func = msg._func if msg.__class__ is Lazy else msg
+    code = getattr(func, '__code__', None)
+    if code is not None:
+        return '%s:%s:%d' % (
+            code.co_filename, code.co_name, code.co_firstlineno
+        )
+    return getattr(func, '__qualname__', func.__class__.__name__)
+
+
+_srcfile = _find_caller.__code__.co_filename
+# frames of this module and of `logging` (e.g. `logging.LoggerAdapter`)
+_srcfiles = frozenset((_srcfile, logging._srcfile))
+# `stacklevel` to skip one frame of this module, `logging` of Python 3.11+
+# skips only frames of `logging`, before it skips any frames
+if sys.version_info >= (3, 11):
+    _SAMPLED_STACKLEVEL = 1
+elif sys.version_info >= (3, 8):
+    _SAMPLED_STACKLEVEL = 2
+else:
+    _SAMPLED_STACKLEVEL = 0
+
+
+def _make_item(level: int, msg, args: typing.Tuple, kwargs: typing.Dict):
+    '''
+    Capture everything of a log call, which can not be deferred to the writer
+    thread: time, caller, exception and stack information
+    :return: queue item
+    '''
+    fn, lno, func, frame = _find_caller()
+    exc_info = kwargs.get('exc_info')
+    if exc_info:
+        if isinstance(exc_info, BaseException):
+            exc_info = (type(exc_info), exc_info, exc_info.__traceback__)
+        elif not isinstance(exc_info, tuple):
+            exc_info = sys.exc_info()
+        kwargs['exc_info'] = exc_info
+    sinfo = None
+    if kwargs.pop('stack_info', False) and frame is not None:
+        sinfo = 'Stack (most recent call last):\n' + ''.join(
+            traceback.format_stack(frame)
+        ).rstrip('\n')
+    kwargs.pop('stacklevel', None)
+    return level, msg, args, kwargs, time.time(), (fn, lno, func, sinfo)
+
+
+def _make_record(logger: logging.Logger, item) -> logging.LogRecord:
+    '''
+    Make a log record from a queue item
+    :param logger: logger
+    :param item: queue item
+    :return: log record
+    '''
+    level, msg, args, kwargs, created, (fn, lno, func, sinfo) = item
+    record = logger.makeRecord(
+        logger.name, level, fn, lno, msg, args,
+        kwargs.get('exc_info'), func, kwargs.get('extra'), sinfo
+    )
+    record.created = created
+    record.msecs = (created - int(created)) * 1000
+    record.relativeCreated = (created - logging._startTime) * 1000
+    return record
+
+
+def _call_handlers(
+        logger: logging.Logger,
+        records: typing.List[logging.LogRecord]
+) -> None:
+    '''
+    Pass a batch of log records to all handlers of the logger and its
+    parents (like `logging.Logger.callHandlers`). Handlers with
+    `handle_batch` get all records at once.
+    :param logger: logger
+    :param records: log records
+    '''
+    found = 0
+    c = logger
+    while c:
+        for hdlr in c.handlers:
+            found += 1
+            level = hdlr.level
+            if hasattr(hdlr, 'handle_batch'):
+                hdlr.handle_batch([r for r in records if r.levelno >= level])
+            else:
+                for record in records:
+                    if record.levelno >= level:
+                        hdlr.handle(record)
+        if not c.propagate:
+            c = None
+        else:
+            c = c.parent
+    if found == 0 and logging.lastResort:
+        for record in records:
+            if record.levelno >= logging.lastResort.level:
+                logging.lastResort.handle(record)
+
+
+def _handle_items(
+        logger: logging.Logger,
+        items: typing.List,
+        metrics: typing.Optional[Metrics]=None
+) -> None:
+    '''
+    Handle queue items in the writer thread
+    :param logger: logger
+    :param items: queue items
+    :param metrics: metrics, which count the items as completed
+    '''
+    if not logger.disabled:
+        records = []
+        for item in items:
+            record = _make_record(logger, item)
+            if logger.filter(record):
+                records.append(record)
+        if records:
+            _call_handlers(logger, records)
+    if metrics is not None:
+        now = time.time()
+        metrics.completed([now - item[4] for item in items])
+
+
+def _resolve_record_args(record: logging.LogRecord) -> bool:
+    '''
+    Filter of the logger, which evaluates `Lazy` message arguments of a
+    record, before it is formatted
+    :param record: log record
+    :return: always `True`
+    '''
+    if record.args:
+        record.args = resolve_args(record.args)
+    return True
+
+
+def _timed(metrics: Metrics, func: typing.Callable) -> typing.Callable:
+    '''
+    Count an async log call as submitted and wrap its log function, which
+    counts it as completed, once it is run by the executor
+    :param metrics: metrics
+    :param func: log function
+    :return: wrapped log function
+    '''
+    metrics.submitted()
+    start = time.monotonic()
+
+    def _func(*args, **kwargs):
+        try:
+            func(*args, **kwargs)
+        finally:
+            metrics.completed((time.monotonic() - start,))
+    return _func
+
+
 class ILoggerAdapter(object):
     '''
     Logger adapter interface
     '''
+    # sequence numbers of an ordered `JanusLogger`
+    sequence: typing.Optional[typing.Iterator[int]] = None
+    # context variables of a `JanusLogger` - list of (field, variable)
+    contextvars: typing.Sequence[typing.Tuple[str, typing.Any]] = ()
+    # sampler of a `JanusLogger`
+    sampler: typing.Optional[Sampler] = None
+    # metrics of a `JanusLogger`
+    metrics: typing.Optional[Metrics] = None
+    # minimal enabled level of the logger, cached
+    _level: int = logging.NOTSET
+    # if `True`, methods of disabled levels are bound to a no-op
+    strip_levels: bool = False
+    # result of a disabled log call
+    _disabled_result = None
+
+    def _update_level(self) -> None:
+        logger = self.logger
+        if logger.disabled:
+            self._level = sys.maxsize
+        else:
+            self._level = max(
+                logger.getEffectiveLevel(), logger.manager.disable + 1
+            )
+        if self.strip_levels or self.__dict__.get('_stripped'):
+            self._strip_levels()
+
+    def _strip_levels(self) -> None:
+        '''
+        Bind the methods of disabled levels to a no-op, restore the methods
+        of enabled levels
+        '''
+        attrs = self.__dict__
+        noop = _make_noop(self._disabled_result)
+        for name, level in _LEVEL_METHODS:
+            if self.strip_levels and level < self._level:
+                attrs[name] = noop
+            else:
+                attrs.pop(name, None)
+        attrs['_stripped'] = self.strip_levels
+
+    def _track(self) -> None:
+        '''
+        Cache the level and track the adapter for `refresh_levels`
+        '''
+        self._update_level()
+        _ADAPTERS.add(self)
+
+    def isEnabledFor(self, level: int) -> bool:
+        return level >= self._level
+
+    def _sample(self, level: int, msg) -> bool:
+        '''
+        Ask the sampler, whether an enabled log call is passed on
+        :param level: logging level
+        :param msg: message
+        :return: `True` if passed on
+        '''
+        sampler = self.sampler
+        if level > sampler.max_level:
+            return True
+        if sampler.by == 'site':
+            key = '%s:%d' % _find_caller()[:2]
+        elif msg.__class__ is str:
+            key = msg
+        else:
+            key = _callable_key(msg)
+        return sampler.allow(key)
+
+    def setLevel(self, level: int) -> None:
+        self.logger.setLevel(level)
+        refresh_levels()
+
     def process(self, msg: str, kwargs: typing.Dict) -> (str, typing.Dict):
         '''
-        Process message and keyword arguments - update `extra` from adapter
+        Process message and keyword arguments - update `extra` from adapter.
+        The context fields of the adapter are set as attributes of the log
+        record and the context itself as `_context`, the extra fields of the
+        call are merged, when the log record is made, a `Lazy` message is
+        evaluated, when the log record is formatted.
         :param msg:
         :param kwargs:
         :return: tuple with message and keyword arguments
         '''
-        if 'extra' not in kwargs:
-            kwargs['extra'] = self.extra
-        elif isinstance(kwargs['extra'], dict):
-            kwargs['extra'] = {**self.extra, **kwargs['extra']}
+        base = self.extra.extra
+        if self.contextvars:
+            values = {}
+            for field, var in self.contextvars:
+                value = var.get(_UNSET)
+                if value is not _UNSET:
+                    values[field] = value
+            if values:
+                base = DeferredExtra(base, values)
+        extra = kwargs.get('extra')
+        if extra and isinstance(extra, dict):
+            kwargs['extra'] = DeferredExtra(base, extra)
         else:
-            kwargs['extra'] = self.extra
+            kwargs['extra'] = base
+        if self.sequence is not None:
+            kwargs['extra'] = DeferredExtra(
+                kwargs['extra'], {'seq': next(self.sequence)}
+            )
         return msg, kwargs
 
+    def bind(self, **fields) -> 'ILoggerAdapter':
+        '''
+        Get a child adapter with additional context fields - the context is
+        shared with this adapter, only the new fields are stored
+        :return: child adapter
+        '''
+        child = copy.copy(self)
+        child.extra = self.extra.bind(**fields)
+        log = child.__dict__.get('log')
+        if getattr(log, '__self__', None) is self:
+            # e.g. `_log_sampled`, bound to this adapter
+            child.log = types.MethodType(log.__func__, child)
+        _ADAPTERS.add(child)
+        return child
+
 
 class AsyncLoggerAdapter(ILoggerAdapter):
     '''
     Async logger adapter
     '''
+    _disabled_result = DONE
+
     def __init__(
             self,
             logger: logging.Logger,
-            extra: typing.Dict,
-            loop: asyncio.AbstractEventLoop
+            extra: typing.Union[typing.Dict, Context],
+            loop: asyncio.AbstractEventLoop,
+            executor: typing.Optional[concurrent.futures.Executor]=None,
+            sequencer: typing.Optional[Sequencer]=None
     ):
         '''
-        Constructor with logger, extra fields and loop
+        Constructor with logger, extra fields, loop and executor
         :param logger: logger to be wrapped
         :param extra: extra arguments for log record
         :param loop: event loop
+        :param executor: executor for the logging, `None` - the default
+            executor of the loop
+        :param sequencer: if set, log records are written in the order of
+            the log calls, even by an executor with several workers
         '''
         self.logger = logger
-        self.extra = extra
+        self.extra = extra if isinstance(extra, Context) else Context(extra)
         self.loop = loop
-        self._dummy_task: typing.Optional[asyncio.Task] = None
-
-    def __make_dummy_task(self) -> asyncio.Task:
-        async def _dummy(*args, **kwargs):  # @UnusedVariable
-            return
-        return self.loop.create_task(_dummy())
-
-    def log(self, level, msg, *args, **kwargs) -> asyncio.Task:
+        self.executor = executor
+        self.sequencer = sequencer
+        self._track()
+
+    def log(self, level, msg, *args, **kwargs) -> typing.Awaitable:
+        if level < self._level:
+            return DONE
+        if self.sampler is not None and not self._sample(level, msg):
+            return DONE
+        return self._log(level, msg, args, kwargs)
+
+    def _log(self, level, msg, args, kwargs) -> asyncio.Task:
         def _task(_func_or_method, _level, _msg, _args, _kwargs):
             _func_or_method(_level, _msg, *_args, **_kwargs)
 
-        if not self.isEnabledFor(level):
-            if self._dummy_task is None:
-                self._dummy_task = self.__make_dummy_task()
-            return self._dummy_task
-
         msg, kwargs = self.process(msg, kwargs)
+        func = self.logger.log
+        if self.metrics is not None:
+            func = _timed(self.metrics, func)
 
-        async def _coro():
-            return await self.loop.run_in_executor(
-                None,
-                _task,
-                self.logger.log,
-                level,
-                msg,
-                args,
-                kwargs
-            )
+        job = functools.partial(_task, func, level, msg, args, kwargs)
+        if self.sequencer is not None:
+            job = self.sequencer.bind(job)
+        # submitted now, so `shutdown` of the executor waits for the job, and
+        # shielded, so the record of a cancelled log call is still written
+        fut = asyncio.shield(self.loop.run_in_executor(self.executor, job))
+
+        async def _wait():
+            return await fut
 
-        return self.loop.create_task(_coro())
+        return self.loop.create_task(_wait())
 
     def debug(self, msg, *args, **kwargs) -> asyncio.Task:
         return self.log(logging.DEBUG, msg, *args, **kwargs)
@@ -187,12 +566,6 @@ class AsyncLoggerAdapter(ILoggerAdapter):
 
     fatal = critical
 
-    def isEnabledFor(self, level):
-        return self.logger.isEnabledFor(level)
-
-    def setLevel(self, level):
-        self.logger.setLevel(level)
-
     def getEffectiveLevel(self):
         return self.logger.getEffectiveLevel()
 
@@ -217,35 +590,209 @@ class AsyncLoggerAdapter(ILoggerAdapter):
         return '<%s %s (%s)>' % (self.__class__.__name__, logger.name, level)
 
 
+def _dropped_by_name(dropped: typing.Dict[int, int]) -> typing.Dict[str, int]:
+    return {
+        logging.getLevelName(level): count
+        for level, count in sorted(dropped.items())
+    }
+
+
+class AsyncQueueLoggerAdapter(AsyncLoggerAdapter):
+    '''
+    Async logger adapter, which puts log records into a queue drained by a
+    writer thread. Awaiting a log call waits only for the enqueue.
+    '''
+    def __init__(
+            self,
+            logger: logging.Logger,
+            extra: typing.Union[typing.Dict, Context],
+            loop: asyncio.AbstractEventLoop,
+            queue: JanusQueue
+    ):
+        '''
+        Constructor with logger, extra fields, loop and queue
+        :param logger: logger to be wrapped
+        :param extra: extra arguments for log record
+        :param loop: event loop
+        :param queue: queue drained by the writer thread
+        '''
+        super(AsyncQueueLoggerAdapter, self).__init__(logger, extra, loop)
+        self.queue = queue
+
+    @property
+    def dropped(self) -> typing.Dict[str, int]:
+        '''
+        Number of log records dropped by the overflow policy per level
+        '''
+        return _dropped_by_name(self.queue.dropped)
+
+    def _log(self, level, msg, args, kwargs) -> typing.Awaitable:
+        msg, kwargs = self.process(msg, kwargs)
+        item = _make_item(level, msg, args, kwargs)
+        if self.metrics is not None:
+            self.metrics.submitted()
+        if self.queue.put_nowait(item):
+            return DONE
+        return self.queue.put_later(item)
+
+
+class AsyncNowaitLoggerAdapter(AsyncQueueLoggerAdapter):
+    '''
+    Fire-and-forget async logger adapter - log calls put the record into the
+    queue and return `None`, no coroutine, task or future is created (unless
+    the queue is full).
+    '''
+    _disabled_result = None
+
+    def log(self, level, msg, *args, **kwargs) -> None:
+        if level < self._level:
+            return
+        if self.sampler is None or self._sample(level, msg):
+            msg, kwargs = self.process(msg, kwargs)
+            item = _make_item(level, msg, args, kwargs)
+            if self.metrics is not None:
+                self.metrics.submitted()
+            if not self.queue.put_nowait(item):
+                self.queue.put_later(item, wait=False)
+
+
 class SyncLoggerAdapter(logging.LoggerAdapter, ILoggerAdapter):
     '''
     Sync logger adapter
     '''
+    def __init__(
+            self,
+            logger: logging.Logger,
+            extra: typing.Union[typing.Dict, Context]=None
+    ):
+        '''
+        Constructor with logger and extra fields
+        :param logger: logger to be wrapped
+        :param extra: extra arguments for log record
+        '''
+        if not isinstance(extra, Context):
+            extra = Context(extra)
+        super(SyncLoggerAdapter, self).__init__(logger, extra)
+        self._track()
+
     def process(self, msg: str, kwargs: typing.Dict):
         return ILoggerAdapter.process(self, msg, kwargs)
 
+    def _log_sampled(self, level, msg, *args, **kwargs) -> None:
+        '''
+        Log method, if a sampler is set - the frame of this method is
+        skipped by `logging` to find the caller (Python 3.8+)
+        '''
+        if level < self._level or not self._sample(level, msg):
+            return
+        if _SAMPLED_STACKLEVEL:
+            kwargs['stacklevel'] = \
+                kwargs.get('stacklevel', 1) + _SAMPLED_STACKLEVEL
+        logging.LoggerAdapter.log(self, level, msg, *args, **kwargs)
+
+    isEnabledFor = ILoggerAdapter.isEnabledFor
+    setLevel = ILoggerAdapter.setLevel
+
+
+class _IsoTimestamp(object):
+    '''
+    Local ISO 8601 timestamp of a log record. Date, time and offset are
+    cached per second, only the fraction of a second is rendered per record.
+    '''
+    __slots__ = ('_cache',)
+
+    def __init__(self):
+        self._cache = (None, '', '')
+
+    def __call__(self, created: float) -> str:
+        second = int(created)
+        cache = self._cache
+        if cache[0] != second:
+            iso = datetime.datetime.fromtimestamp(
+                second, datetime.timezone.utc
+            ).astimezone(None).isoformat()
+            cache = self._cache = (second, iso[:19], iso[19:])
+        return '%s.%06d%s' % (cache[1], (created - second) * 1e6, cache[2])
+
+
+def _epoch_timestamp(created: float) -> float:
+    return created
+
+
+def _epoch_ns_timestamp(created: float) -> int:
+    return int(created * 1e9)
+
+
+TIMESTAMP_FORMATS = {
+    'iso': _IsoTimestamp,
+    'epoch': lambda: _epoch_timestamp,
+    'epoch_ns': lambda: _epoch_ns_timestamp,
+}
+
+
+_BASELINE_ATTRS = tuple(
+    logging.LogRecord('', logging.NOTSET, '', 0, '', (), None).__dict__
+)
+
 
 class SyncJsonFormatter(logging.Formatter):
     '''
     Sync Json logging formatter
     '''
-    RESERVED_ATTRS = (
+    RESERVED_ATTRS = frozenset((
         'args', 'asctime', 'created', 'exc_info', 'exc_text', 'filename',
         'funcName', 'levelname', 'levelno', 'lineno', 'module',
         'msecs', 'message', 'msg', 'name', 'pathname', 'process',
         'processName', 'relativeCreated', 'stack_info', 'thread', 'threadName'
-    )
+    ) + _BASELINE_ATTRS)
 
-    def __init__(self, serializer: typing.Callable[..., str]=None, **kwargs):
+    FIELDS = frozenset((
+        'logged_at', 'line_numer', 'function', 'level', 'msg', 'file_path'
+    ))
+
+    def __init__(
+            self,
+            serializer: typing.Union[str, typing.Callable[..., str]]=None,
+            timestamp_format: str='iso',
+            **kwargs
+    ):
         '''
         Constructor with serializer to be used and keyword arguments
-        :param serializer: function for serialization
+        :param serializer: function for serialization or name of a
+            serializer backend (`auto`, `json`, `orjson`, `ujson`)
+        :param timestamp_format: format of `logged_at` - `iso` (local time),
+            `epoch` (seconds as float) or `epoch_ns` (nanoseconds as int)
         '''
         if serializer is None:
-            serializer = json.dumps
+            serializer = 'auto'
+        if serializer is json.dumps:
+            serializer = 'json'
+        if timestamp_format not in TIMESTAMP_FORMATS:
+            raise ValueError(
+                'unknown timestamp format: %s' % timestamp_format
+            )
         super(SyncJsonFormatter, self).__init__()
         self.extra = kwargs
-        self.serializer = serializer
+        if isinstance(serializer, str):
+            self.backend = get_serializer(serializer)
+            self.serializer = self.backend.dumps
+        else:
+            self.backend = None
+            self.serializer = serializer
+        self.timestamp = TIMESTAMP_FORMATS[timestamp_format]()
+        # static fields are serialized once and spliced into each record,
+        # this works only for the serializer backends.
+        self._extra_keys = frozenset(kwargs)
+        self._extra_fragment = None
+        if all((
+                kwargs,
+                self.backend is not None,
+                self._extra_keys.isdisjoint(self.FIELDS)
+        )):
+            text = self.backend.dumps(kwargs)[1:-1] + self.backend.separator
+            self._extra_fragment = (text, text.encode('utf-8'))
+        # keys, which a context must not have to be spliced
+        self._reserved = self.FIELDS | self._extra_keys
 
     def get_record_extra(
             self,
@@ -258,36 +805,134 @@ class SyncJsonFormatter(logging.Formatter):
         :param reserved: set  with reserved attributes of a log record
         :return: dictionary with extra fields of the log record
         '''
-        return dict(
-            (key, value)
-            for key, value in record.__dict__.items()
-            if (
-                key not in reserved and not (
-                    hasattr(key, 'startswith') and key.startswith('_')
-                )
+        # extra fields are set after the attributes of a log record, so only
+        # the keys after the baseline attributes have to be checked.
+        attrs = record.__dict__
+        if len(attrs) <= len(_BASELINE_ATTRS):
+            return {}
+        return {
+            key: attrs[key]
+            for key in itertools.islice(attrs, len(_BASELINE_ATTRS), None)
+            if key not in reserved and not (
+                key.__class__ is str and key[:1] == '_'
             )
-        )
+        }
 
-    def format(self, record: logging.LogRecord) -> str:
+    def get_details(
+            self,
+            record: logging.LogRecord
+    ) -> typing.Tuple[typing.Dict, bool]:
         '''
-        Format log record
+        Get the fields of the log record
         :param record: log record
-        :return: log string
+        :return: tuple with fields of the log record and the Json fragments
+            (`str`, `bytes`) of static and context fields to be spliced in
         '''
-        details = {
-            **self.extra,
-            **self.get_record_extra(record, self.RESERVED_ATTRS)
-        }
+        details = self.get_record_extra(record, self.RESERVED_ATTRS)
+        splice = ()
+        context = record.__dict__.get('_context')
+        if context:
+            flat = context.flat()
+            # context fields are attributes of the record as well, only the
+            # fields of the call, which differ, override them
+            details = {
+                key: value for key, value in details.items()
+                if flat.get(key, _UNSET) is not value
+            }
+            fragment = None
+            if all((
+                    self.backend is not None,
+                    self._extra_fragment is not None or not self.extra,
+                    flat.keys().isdisjoint(details)
+            )):
+                fragment = context.fragment(self.backend, self._reserved)
+            if fragment is not None:
+                splice = (fragment,)
+            else:
+                details = {**flat, **details}
+        details = resolve(details)
+        static = self._extra_fragment
+        if static is not None and self._extra_keys.isdisjoint(details):
+            splice = (static,) + splice
+        elif self.extra:
+            details = {**self.extra, **details}
         details.update(
-            logged_at=datetime.datetime.now(datetime.timezone.utc).astimezone(None).isoformat(),  # noqa E501
+            logged_at=self.timestamp(record.created),
             line_numer=record.lineno,
             function=record.funcName,
             level=record.levelname.upper(),
             msg=record.getMessage(),
             file_path=record.pathname
         )
+        return details, splice
+
+    def format(self, record: logging.LogRecord) -> str:
+        '''
+        Format log record
+        :param record: log record
+        :return: log string
+        '''
+        details, splice = self.get_details(record)
+        if splice:
+            return '{' + ''.join([x[0] for x in splice]) + \
+                self.serializer(details)[1:]
         return self.serializer(details)
 
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        '''
+        Format log record to UTF-8 encoded bytes
+        :param record: log record
+        :return: log bytes
+        '''
+        if self.backend is None:
+            return self.format(record).encode('utf-8')
+        details, splice = self.get_details(record)
+        if splice:
+            return b'{' + b''.join([x[1] for x in splice]) + \
+                self.backend.dumpb(details)[1:]
+        return self.backend.dumpb(details)
+
+
+class SyncBinaryFormatter(SyncJsonFormatter):
+    '''
+    Sync binary logging formatter - records are encoded as frames of
+    `janus_logging.binary` with interned names and message templates, the
+    fields are those of `SyncJsonFormatter`. `format` still returns Json
+    for handlers without `format_bytes`.
+    '''
+    def __init__(self, max_names: int=DEFAULT_MAX_NAMES, **kwargs):
+        '''
+        Constructor with size of the dictionary and static fields
+        :param max_names: maximal number of interned names per file or
+            stream
+        '''
+        super(SyncBinaryFormatter, self).__init__(serializer='json', **kwargs)
+        self.encoder = BinaryEncoder(max_names=max_names)
+
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        '''
+        Encode log record - new names are defined before the record and the
+        first record of a stream is preceded by the header
+        :param record: log record
+        :return: log frames
+        '''
+        details = resolve(self.get_record_extra(record, self.RESERVED_ATTRS))
+        context = record.__dict__.get('_context')
+        if context:
+            details = resolve({**context.flat(), **details})
+        if self.extra:
+            details = {**self.extra, **details}
+        return self.encoder.encode(
+            record.created,
+            record.lineno,
+            record.levelname.upper(),
+            record.funcName,
+            record.pathname,
+            record.msg,
+            record.args,
+            details
+        )
+
 
 def has_logger_by_name(name: str) -> bool:
     '''
@@ -299,6 +944,98 @@ def has_logger_by_name(name: str) -> bool:
     return name in logging.Logger.manager.loggerDict  # @UndefinedVariable
 
 
+def _make_json_formatter(kwargs: typing.Dict) -> logging.Formatter:
+    '''
+    Make the Json formatter for a fixture
+    :param kwargs: keyword arguments of the fixture - `formatter` or
+        `extra`, `serializer` and `timestamp_format` of `SyncJsonFormatter`
+    :return: formatter
+    '''
+    extra = kwargs.pop('extra', {})
+    serializer = kwargs.pop('serializer', 'auto')
+    timestamp_format = kwargs.pop('timestamp_format', 'iso')
+    fmt = kwargs.pop('formatter', None)
+    if fmt is None:
+        fmt = SyncJsonFormatter(
+            serializer=serializer,
+            timestamp_format=timestamp_format,
+            **extra
+        )
+    return fmt
+
+
+def _make_binary_formatter(kwargs: typing.Dict) -> logging.Formatter:
+    '''
+    Make the binary formatter for a fixture
+    :param kwargs: keyword arguments of the fixture - `formatter` or
+        `extra` and `max_names` of `SyncBinaryFormatter`
+    :return: formatter
+    '''
+    extra = kwargs.pop('extra', {})
+    max_names = kwargs.pop('max_names', DEFAULT_MAX_NAMES)
+    fmt = kwargs.pop('formatter', None)
+    if fmt is None:
+        fmt = SyncBinaryFormatter(max_names=max_names, **extra)
+    return fmt
+
+
+def _make_file_handler(
+        kwargs: typing.Dict,
+        cls: typing.Type[ThreadedFileHandler]=ThreadedFileHandler
+) -> ThreadedFileHandler:
+    '''
+    Make the file handler for a fixture
+    :param kwargs: keyword arguments of the fixture - `filename`, `mode`,
+        `buffer_size`, `max_bytes`, `backup_count`, `interval`,
+        `flush_policy`, `compression` and `compression_level` of
+        `ThreadedFileHandler`
+    :param cls: handler class
+    :return: handler
+    '''
+    return cls(
+        kwargs.pop('filename'),
+        mode=kwargs.pop('mode', 'a'),
+        buffer_size=kwargs.pop('buffer_size', DEFAULT_FILE_BUFFER_SIZE),
+        max_bytes=kwargs.pop('max_bytes', 0),
+        backup_count=kwargs.pop('backup_count', 0),
+        interval=kwargs.pop('interval', None),
+        flush_policy=kwargs.pop('flush_policy', None),
+        compression=kwargs.pop('compression', None),
+        compression_level=kwargs.pop('compression_level', None)
+    )
+
+
+def _make_stream_handler(stream: typing.IO, kwargs: typing.Dict):
+    '''
+    Make the stream handler for a fixture
+    :param stream: stream
+    :param kwargs: keyword arguments of the fixture - `compression`
+        selects `ThreadedStreamHandler` with `compression_level` and
+        `flush_policy`, `buffered` selects `BufferedBytesHandler` with
+        `buffer_size` and `flush_interval`, otherwise `JanusStreamHandler`
+        with `flush_policy` is used
+    :return: handler
+    '''
+    flush_policy = kwargs.pop('flush_policy', None)
+    compression = kwargs.pop('compression', None)
+    if compression is not None:
+        return ThreadedStreamHandler(
+            stream=stream,
+            compression=compression,
+            compression_level=kwargs.pop('compression_level', None),
+            flush_policy=flush_policy
+        )
+    if kwargs.pop('buffered', False):
+        return BufferedBytesHandler(
+            stream=stream,
+            buffer_size=kwargs.pop('buffer_size', DEFAULT_BUFFER_SIZE),
+            flush_interval=kwargs.pop(
+                'flush_interval', DEFAULT_FLUSH_INTERVAL
+            )
+        )
+    return JanusStreamHandler(stream=stream, flush_policy=flush_policy)
+
+
 def fixture_default(
         name: str,
         level: int,
@@ -321,7 +1058,7 @@ def fixture_default(
     #
     logger = logging.getLogger(name=name)
     logger.setLevel(level)
-    hdlr = logging.StreamHandler(stream=stream)
+    hdlr = _make_stream_handler(stream, kwargs)
     hdlr.setLevel(level)
     if fmt is not None:
         hdlr.setFormatter(fmt)
@@ -366,17 +1103,246 @@ def fixture_json(
 #         )
 #     return logger
 
-    extra = kwargs.pop('extra', {})
-    serializer = kwargs.pop('serializer', json.dumps)
+    fmt = _make_json_formatter(kwargs)
+    stream = kwargs.pop('stream', sys.stdout)
+    propagate = bool(kwargs.pop('propagate', True))
+    #
+    logger = logging.getLogger(name=name)
+    logger.setLevel(level)
+    hdlr = _make_stream_handler(stream, kwargs)
+    hdlr.setLevel(level)
+    hdlr.setFormatter(fmt)
+    logger.addHandler(hdlr)
+    logger.propagate = propagate
+    return logger
+
+
+def fixture_file(
+        name: str,
+        level: int,
+        loop: asyncio.AbstractEventLoop,  # @UnusedVariable
+        **kwargs
+) -> logging.Logger:
+    '''
+    File logger constructor - the file is written and rotated by an own I/O
+    thread (`ThreadedFileHandler`)
+    :param name: logger name
+    :param level: logging level
+    :param loop: event loop
+    :return: logger
+    '''
+    if has_logger_by_name(name):
+        return logging.getLogger(name=name)
+
     fmt = kwargs.pop('formatter', None)
+    propagate = bool(kwargs.pop('propagate', True))
+    #
+    logger = logging.getLogger(name=name)
+    logger.setLevel(level)
+    hdlr = _make_file_handler(kwargs)
+    hdlr.setLevel(level)
+    if fmt is not None:
+        hdlr.setFormatter(fmt)
+    logger.addHandler(hdlr)
+    logger.propagate = propagate
+    return logger
+
+
+def fixture_json_file(
+        name: str,
+        level: int,
+        loop: asyncio.AbstractEventLoop,  # @UnusedVariable
+        **kwargs
+) -> logging.Logger:
+    '''
+    Json file logger constructor - the file is written and rotated by an
+    own I/O thread (`ThreadedFileHandler`)
+    :param name: logger name
+    :param level: logging level
+    :param loop: event loop
+    :return: logger with Json format
+    '''
+    if has_logger_by_name(name):
+        return logging.getLogger(name=name)
+
+    fmt = _make_json_formatter(kwargs)
+    propagate = bool(kwargs.pop('propagate', True))
+    #
+    logger = logging.getLogger(name=name)
+    logger.setLevel(level)
+    hdlr = _make_file_handler(kwargs)
+    hdlr.setLevel(level)
+    hdlr.setFormatter(fmt)
+    logger.addHandler(hdlr)
+    logger.propagate = propagate
+    return logger
+
+
+def fixture_binary(
+        name: str,
+        level: int,
+        loop: asyncio.AbstractEventLoop,  # @UnusedVariable
+        **kwargs
+) -> logging.Logger:
+    '''
+    Binary logger constructor - records are buffered and written to a
+    binary stream (`BinaryStreamHandler`), decode them with
+    `janus-logging-decode`
+    :param name: logger name
+    :param level: logging level
+    :param loop: event loop
+    :return: logger with binary format
+    '''
+    if has_logger_by_name(name):
+        return logging.getLogger(name=name)
+
+    fmt = _make_binary_formatter(kwargs)
     stream = kwargs.pop('stream', sys.stdout)
     propagate = bool(kwargs.pop('propagate', True))
     #
     logger = logging.getLogger(name=name)
     logger.setLevel(level)
-    if fmt is None:
-        fmt = SyncJsonFormatter(serializer=serializer, **extra)
-    hdlr = logging.StreamHandler(stream=stream)
+    hdlr = BinaryStreamHandler(
+        stream=stream,
+        buffer_size=kwargs.pop('buffer_size', DEFAULT_BUFFER_SIZE),
+        flush_interval=kwargs.pop('flush_interval', DEFAULT_FLUSH_INTERVAL)
+    )
+    hdlr.setLevel(level)
+    hdlr.setFormatter(fmt)
+    logger.addHandler(hdlr)
+    logger.propagate = propagate
+    return logger
+
+
+def fixture_binary_file(
+        name: str,
+        level: int,
+        loop: asyncio.AbstractEventLoop,  # @UnusedVariable
+        **kwargs
+) -> logging.Logger:
+    '''
+    Binary file logger constructor - the file is written and rotated by an
+    own I/O thread (`BinaryFileHandler`), every file starts with its
+    dictionary
+    :param name: logger name
+    :param level: logging level
+    :param loop: event loop
+    :return: logger with binary format
+    '''
+    if has_logger_by_name(name):
+        return logging.getLogger(name=name)
+
+    fmt = _make_binary_formatter(kwargs)
+    propagate = bool(kwargs.pop('propagate', True))
+    #
+    logger = logging.getLogger(name=name)
+    logger.setLevel(level)
+    hdlr = _make_file_handler(kwargs, cls=BinaryFileHandler)
+    hdlr.setLevel(level)
+    hdlr.setFormatter(fmt)
+    logger.addHandler(hdlr)
+    logger.propagate = propagate
+    return logger
+
+
+def fixture_json_ring(
+        name: str,
+        level: int,
+        loop: asyncio.AbstractEventLoop,  # @UnusedVariable
+        **kwargs
+) -> logging.Logger:
+    '''
+    Json ring buffer logger constructor - records are written into a
+    memory-mapped file `path` of `size` bytes (`RingBufferHandler`), which
+    is read by another process, e.g. `janus-logging-ring`
+    :param name: logger name
+    :param level: logging level
+    :param loop: event loop
+    :return: logger with Json format
+    '''
+    if has_logger_by_name(name):
+        return logging.getLogger(name=name)
+
+    fmt = _make_json_formatter(kwargs)
+    propagate = bool(kwargs.pop('propagate', True))
+    #
+    logger = logging.getLogger(name=name)
+    logger.setLevel(level)
+    hdlr = RingBufferHandler(
+        kwargs.pop('path'), size=kwargs.pop('size', DEFAULT_RING_SIZE)
+    )
+    hdlr.setLevel(level)
+    hdlr.setFormatter(fmt)
+    logger.addHandler(hdlr)
+    logger.propagate = propagate
+    return logger
+
+
+def fixture_json_aggregator(
+        name: str,
+        level: int,
+        loop: asyncio.AbstractEventLoop,  # @UnusedVariable
+        **kwargs
+) -> logging.Logger:
+    '''
+    Json logger constructor for worker processes - records are sent to a
+    `LogAggregator` listening on the Unix socket `path`, which writes the
+    records of all workers (`AggregatorHandler`)
+    :param name: logger name
+    :param level: logging level
+    :param loop: event loop
+    :return: logger with Json format
+    '''
+    if has_logger_by_name(name):
+        return logging.getLogger(name=name)
+
+    fmt = _make_json_formatter(kwargs)
+    propagate = bool(kwargs.pop('propagate', True))
+    #
+    logger = logging.getLogger(name=name)
+    logger.setLevel(level)
+    hdlr = AggregatorHandler(
+        kwargs.pop('path'),
+        retry_interval=kwargs.pop('retry_interval', DEFAULT_RETRY_INTERVAL)
+    )
+    hdlr.setLevel(level)
+    hdlr.setFormatter(fmt)
+    logger.addHandler(hdlr)
+    logger.propagate = propagate
+    return logger
+
+
+def fixture_json_socket(
+        name: str,
+        level: int,
+        loop: asyncio.AbstractEventLoop,
+        **kwargs
+) -> logging.Logger:
+    '''
+    Json socket logger constructor - records are sent in batches as
+    newline-delimited Json to a collector at `host` and `port` or at the
+    Unix socket `path` (`AsyncSocketHandler`). Further keyword arguments
+    are `buffer_size`, `flush_interval`, `max_buffer` and `backoff`.
+    :param name: logger name
+    :param level: logging level
+    :param loop: event loop, which runs the connection
+    :return: logger with Json format
+    '''
+    if has_logger_by_name(name):
+        return logging.getLogger(name=name)
+
+    fmt = _make_json_formatter(kwargs)
+    propagate = bool(kwargs.pop('propagate', True))
+    #
+    logger = logging.getLogger(name=name)
+    logger.setLevel(level)
+    options = {
+        key: kwargs.pop(key) for key in (
+            'host', 'port', 'path', 'buffer_size', 'flush_interval',
+            'max_buffer', 'backoff'
+        ) if key in kwargs
+    }
+    hdlr = AsyncSocketHandler(loop, **options)
     hdlr.setLevel(level)
     hdlr.setFormatter(fmt)
     logger.addHandler(hdlr)
@@ -424,6 +1390,21 @@ class JanusLogger(object):
             level: int=logging.WARNING,
             loop: asyncio.AbstractEventLoop=None,
             fixture: typing.Callable[..., logging.Logger]=None,
+            queue_size: typing.Optional[int]=None,
+            batch_size: int=256,
+            batch_delay: float=0.0,
+            overflow: typing.Optional[str]=None,
+            overflow_level: int=logging.WARNING,
+            workers: int=1,
+            ordered: bool=False,
+            contextvars: typing.Iterable['contextvars.ContextVar']=(),
+            strip_levels: bool=False,
+            sampler: typing.Optional[Sampler]=None,
+            sampling_interval: float=60.0,
+            metrics: bool=False,
+            metrics_port: typing.Optional[int]=None,
+            metrics_callback: typing.Optional[typing.Callable[[str], None]]=None,  # noqa E501
+            metrics_interval: float=60.0,
             **kwargs
     ) -> None:
         '''
@@ -432,7 +1413,47 @@ class JanusLogger(object):
         :param level: logging level
         :param loop: event loop
         :param fixture: logging fixture for logger
+        :param queue_size: if set, async log records are put into a queue
+            of this size and written by a dedicated writer thread
+        :param batch_size: maximal number of async log records handed over
+            to the writer thread at once, `1` disables batching
+        :param batch_delay: maximal time in seconds to collect a batch of
+            async log records, `0` means one loop iteration
+        :param overflow: if set, async log records are put into the queue
+            (like `queue_size`) and this policy applies, if it is full -
+            `block`, `drop_newest`, `drop_oldest` or `drop_below`. Beyond
+            `queue_size` waiting records, log calls wait only if they are
+            awaited, otherwise the records are dropped.
+        :param overflow_level: records below this level are dropped by the
+            `drop_below` policy, others wait for a free slot
+        :param workers: number of threads of the own executor, which runs
+            async log calls (without queue) and timed flushes. One thread
+            keeps the order of log records.
+        :param ordered: if `True`, log records carry a `seq` number, which
+            is monotonic per logger, and async log records are written in
+            the order of the calls also with several `workers` and if the
+            log call is cancelled. Sync log records are written at once.
+        :param contextvars: context variables, which values are captured by
+            log calls and added to the log records (see
+            `register_contextvar`)
+        :param strip_levels: if `True`, log methods of disabled levels of
+            the adapters are bound to a no-op, they are rebuilt by
+            `setLevel`
+        :param sampler: sampler of the log calls of all adapters
+        :param sampling_interval: interval in seconds of summary records
+            with the numbers of suppressed log calls
+        :param metrics: if `True`, collect metrics of the logger, see
+            `metrics`
+        :param metrics_port: if set, collect metrics and serve them in the
+            Prometheus text format at `http://127.0.0.1:<port>/metrics`,
+            `0` - any free port
+        :param metrics_callback: if set, collect metrics and call it with
+            the metrics in the Prometheus text format every
+            `metrics_interval` seconds and at shutdown
+        :param metrics_interval: interval in seconds of `metrics_callback`
         '''
+        if overflow is not None and overflow not in OVERFLOW_POLICIES:
+            raise ValueError('unknown overflow policy: %s' % overflow)
         if loop is None:
             loop = asyncio.get_event_loop()
         if fixture is None:
@@ -441,14 +1462,267 @@ class JanusLogger(object):
         self.name = name
 
         self._extra = kwargs.pop('extra', {})
+        self._context = Context(self._extra)
         self._level = level
         self._loop = loop
         self._log = fixture(name, level, loop, **kwargs)
+        self._log.addFilter(_resolve_record_args)
+        self._queue_size = queue_size
+        self._batch_size = batch_size
+        self._batch_delay = batch_delay
+        self._overflow = overflow
+        self._overflow_level = overflow_level
+        self._sequence = itertools.count() if ordered else None
+        self._contextvars = []
+        self._strip_levels = strip_levels
+        self._sampler = sampler
+        self._sampling_interval = sampling_interval
+        for var in contextvars:
+            self.register_contextvar(var)
+        self._sequencer = Sequencer() if ordered else None
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='janus-logging-%s' % name
+        )
+        self._queue: typing.Optional[JanusQueue] = None
+        self._writer: typing.Optional[QueueWriter] = None
+        # dropped records per level, kept after `shutdown`
+        self._dropped: typing.Dict[int, int] = {}
+        # handlers with a timed flush policy
+        self._flush_handlers = [
+            hdlr for hdlr in self._log.handlers
+            if getattr(hdlr, 'flush_interval', None)
+            if hasattr(hdlr, 'flush_due')
+        ]
+        self._flush_interval = min(
+            (hdlr.flush_interval for hdlr in self._flush_handlers),
+            default=None
+        )
+        self._flush_handle: typing.Optional[asyncio.TimerHandle] = None
+        if self._flush_interval:
+            self._flush_handle = self._loop.call_later(
+                self._flush_interval, self._flush_tick
+            )
+        self._sampling_handle: typing.Optional[asyncio.TimerHandle] = None
+        if self._sampler is not None:
+            self._sampling_handle = self._loop.call_later(
+                self._sampling_interval, self._sampling_tick
+            )
+        self._metrics: typing.Optional[Metrics] = None
+        self._metrics_server: typing.Optional[MetricsServer] = None
+        self._metrics_callback = metrics_callback
+        self._metrics_interval = metrics_interval
+        self._metrics_handle: typing.Optional[asyncio.TimerHandle] = None
+        if any((metrics, metrics_port is not None, metrics_callback)):
+            self._metrics = Metrics()
+            self._log.addFilter(self._metrics)
+            for hdlr in self._log.handlers:
+                if isinstance(hdlr, HandlerMetrics):
+                    hdlr.metrics = self._metrics
+            if metrics_port is not None:
+                self._metrics_server = MetricsServer(
+                    self.metrics_text, port=metrics_port
+                )
+                self._metrics_server.start()
+            if metrics_callback is not None:
+                self._metrics_handle = self._loop.call_later(
+                    self._metrics_interval, self._metrics_tick
+                )
+
+    def _sampling_summary(self) -> None:
+        '''
+        Log the numbers of suppressed log calls since the last summary
+        '''
+        suppressed = self._sampler.summary()
+        if suppressed:
+            self._log.log(
+                self._sampler.max_level,
+                'sampling suppressed %s log calls',
+                sum(suppressed.values()),
+                extra=dict(suppressed=suppressed)
+            )
+
+    def _sampling_tick(self) -> None:
+        '''
+        Log a sampling summary in the executor - in the event loop
+        '''
+        self._loop.run_in_executor(self._executor, self._sampling_summary)
+        self._sampling_handle = self._loop.call_later(
+            self._sampling_interval, self._sampling_tick
+        )
+
+    def _metrics_tick(self) -> None:
+        '''
+        Call the metrics callback in the executor - in the event loop
+        '''
+        self._loop.run_in_executor(
+            self._executor,
+            lambda: self._metrics_callback(self.metrics_text())
+        )
+        self._metrics_handle = self._loop.call_later(
+            self._metrics_interval, self._metrics_tick
+        )
+
+    def _flush_due(self) -> None:
+        '''
+        Flush handlers with a passed flush interval - in the writer thread
+        '''
+        for hdlr in self._flush_handlers:
+            hdlr.flush_due()
+
+    def _flush_tick(self) -> None:
+        '''
+        Flush handlers with a passed flush interval - in the event loop, the
+        flush itself runs in the executor. Once the writer thread is
+        running, it takes over.
+        '''
+        self._flush_handle = None
+        if self._writer is not None:
+            return
+        now = time.monotonic()
+        for hdlr in self._flush_handlers:
+            deadline = hdlr.flush_deadline
+            if deadline is not None and deadline <= now:
+                self._loop.run_in_executor(self._executor, hdlr.flush_due)
+        self._flush_handle = self._loop.call_later(
+            self._flush_interval, self._flush_tick
+        )
+
+    def _get_queue(self) -> typing.Union[JanusQueue, QueueBatcher]:
+        '''
+        Get the queue, start the writer thread on first use
+        :return: queue drained by the writer thread
+        '''
+        if self._queue is None:
+            size = self._queue_size or DEFAULT_QUEUE_SIZE
+            # log calls, which are not awaited, wait in a bounded line
+            queue = JanusQueue(
+                size,
+                self._loop,
+                self._overflow or 'block',
+                self._overflow_level,
+                max_waiting=size
+            )
+            writer = QueueWriter(
+                queue,
+                functools.partial(
+                    _handle_items, self._log, metrics=self._metrics
+                ),
+                name='janus-logging-writer-%s' % self.name,
+                idle=self._flush_due if self._flush_handlers else None,
+                interval=self._flush_interval
+            )
+            writer.start()
+            if self._batch_size > 1:
+                queue = QueueBatcher(
+                    queue,
+                    self._loop,
+                    self._batch_size,
+                    self._batch_delay
+                )
+            self._queue, self._writer = queue, writer
+        return self._queue
+
+    def setLevel(self, level: int) -> None:
+        '''
+        Set the logging level of the logger and of its handlers, which have
+        the previous level, and refresh the cached levels of the adapters
+        :param level: logging level
+        '''
+        for hdlr in self._log.handlers:
+            if hdlr.level == self._level:
+                hdlr.setLevel(level)
+        self._log.setLevel(level)
+        self._level = level
+        refresh_levels()
+
+    def register_contextvar(
+            self,
+            var: 'contextvars.ContextVar',
+            field: typing.Optional[str]=None
+    ) -> None:
+        '''
+        Register a context variable - its value at the time of a log call is
+        added to the log record as extra field (if the variable is set). It
+        applies to all adapters of this logger.
+        :param var: context variable
+        :param field: name of the extra field, default is the name of the
+            variable
+        '''
+        self._contextvars.append((field or var.name, var))
+
+    @property
+    def dropped(self) -> typing.Dict[str, int]:
+        '''
+        Number of log records dropped by the overflow policy per level
+        '''
+        if self._queue is None:
+            return _dropped_by_name(self._dropped)
+        return _dropped_by_name(self._queue.dropped)
+
+    def metrics(self) -> typing.Optional[typing.Dict]:
+        '''
+        Get a snapshot of the metrics
+        :return: dictionary with `records` passed to the handlers per level
+            name, async log calls `submitted`, `completed` and `pending`,
+            `dropped` per level name, `queue_depth`, `latency` histogram in
+            seconds from async log calls to the write, `bytes` written,
+            `flushes` and handler `errors` - or `None`, if metrics are not
+            collected
+        '''
+        if self._metrics is None:
+            return None
+        res = self._metrics.snapshot()
+        queue = self._queue
+        dropped = queue.dropped if queue is not None else self._dropped
+        res['dropped'] = _dropped_by_name(dropped)
+        res['pending'] = max(
+            0, res['submitted'] - res['completed'] - sum(dropped.values())
+        )
+        res['queue_depth'] = (
+            self._queue.qsize() if self._queue is not None else 0
+        )
+        return res
+
+    def metrics_text(self) -> str:
+        '''
+        Get the metrics in the Prometheus text format
+        :return: text, empty if metrics are not collected
+        '''
+        res = self.metrics()
+        if res is None:
+            return ''
+        return to_prometheus(res, labels={'logger': self.name})
 
     def shutdown(self) -> None:
         '''
         Shutdown logging
         '''
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._sampling_handle is not None:
+            self._sampling_handle.cancel()
+        if self._writer is not None:
+            if isinstance(self._queue, QueueBatcher):
+                self._queue.flush()
+            self._writer.stop()
+            self._dropped = dict(self._queue.dropped)
+            self._queue = self._writer = None
+        self._executor.shutdown(wait=True)
+        # the summary follows all queued records, before handlers are closed
+        if self._sampling_handle is not None:
+            self._sampling_handle = None
+            self._sampling_summary()
+        if self._metrics is not None:
+            if self._metrics_handle is not None:
+                self._metrics_handle.cancel()
+                self._metrics_handle = None
+                self._metrics_callback(self.metrics_text())
+            if self._metrics_server is not None:
+                self._metrics_server.stop()
+                self._metrics_server = None
+            self._log.removeFilter(self._metrics)
         logging.shutdown()
 
         # my_shutdown()
@@ -462,20 +1736,66 @@ class JanusLogger(object):
 #             )
 #         )
 
-    def logger_async(self, **kwargs) -> AsyncLoggerAdapter:
+    def _setup(self, adapter: ILoggerAdapter) -> ILoggerAdapter:
+        '''
+        Set up an adapter with the options of this logger
+        :param adapter: adapter
+        :return: adapter
+        '''
+        adapter.sequence = self._sequence
+        adapter.contextvars = self._contextvars
+        if self._metrics is not None:
+            adapter.metrics = self._metrics
+        if self._sampler is not None:
+            adapter.sampler = self._sampler
+            if isinstance(adapter, SyncLoggerAdapter):
+                adapter.log = adapter._log_sampled
+        if self._strip_levels:
+            adapter.strip_levels = True
+            adapter._update_level()
+        return adapter
+
+    def logger_async(
+            self,
+            nowait: bool=False,
+            **kwargs
+    ) -> AsyncLoggerAdapter:
         '''
         Get async logger
+        :param nowait: if `True`, get a fire-and-forget logger, which log
+            calls return `None`. It always uses the writer thread.
         :return: async logger
         '''
-        return AsyncLoggerAdapter(
-            self._log,
-            {**self._extra, **kwargs},
-            self._loop
-        )
+        if nowait:
+            adapter = AsyncNowaitLoggerAdapter(
+                self._log,
+                self._context.bind(**kwargs),
+                self._loop,
+                self._get_queue()
+            )
+        elif self._queue_size or self._overflow:
+            adapter = AsyncQueueLoggerAdapter(
+                self._log,
+                self._context.bind(**kwargs),
+                self._loop,
+                self._get_queue()
+            )
+        else:
+            adapter = AsyncLoggerAdapter(
+                self._log,
+                self._context.bind(**kwargs),
+                self._loop,
+                self._executor,
+                self._sequencer
+            )
+        return self._setup(adapter)
 
     def logger_sync(self, **kwargs) -> SyncLoggerAdapter:
         '''
         Get sync logger
         :return: sync logger
         '''
-        return SyncLoggerAdapter(self._log, {**self._extra, **kwargs})
+        adapter = SyncLoggerAdapter(
+            self._log, self._context.bind(**kwargs)
+        )
+        return self._setup(adapter)
@@ -0,0 +1,416 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.aggregator
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.aggregator
+------------------------
+Log aggregation of several processes (e.g. workers of a pre-fork server)
+into one writer. Workers send formatted records over a Unix socket
+(`AggregatorHandler`), the aggregator writes whole records only, collected
+from all workers, with one write per batch - records of different workers
+never interleave or tear.
+
+Frames on the socket are `length u32 | payload`, the aggregator writes the
+payload with a newline. The aggregator runs as a thread of the master
+(`LogAggregator.start`), as a spawned process (`spawn_aggregator`) or on
+the command line:
+
+    janus-logging-aggregator /run/my_app/log.sock >> my_app.log
+'''
+
+from __future__ import absolute_import
+
+import argparse
+import logging
+import multiprocessing
+import os
+import selectors
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+import typing
+
+from .metrics import HandlerMetrics
+from .version import VERSION
+
+__all__ = [
+    'AggregatorHandler', 'LogAggregator', 'main', 'run_aggregator',
+    'spawn_aggregator'
+]
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+_FRAME = struct.Struct('<I')
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+DEFAULT_RETRY_INTERVAL = 1.0
+_READ_SIZE = 256 * 1024
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    with memoryview(data) as view:
+        offset, size = 0, len(view)
+        while offset < size:
+            offset += os.write(fd, view[offset:])
+
+
+class LogAggregator(object):
+    '''
+    Writer of the records sent by `AggregatorHandler` of several processes
+    '''
+    def __init__(
+            self,
+            path: str,
+            fd: typing.Optional[int]=None,
+            filename: typing.Optional[str]=None,
+            max_frame_size: int=MAX_FRAME_SIZE
+    ):
+        '''
+        Constructor with socket path and output - the socket is bound now,
+        so workers can connect once the constructor returns
+        :param path: path of the Unix socket
+        :param fd: file descriptor to write to, default is stdout
+        :param filename: file to append to, instead of `fd`
+        :param max_frame_size: connections sending larger frames are closed
+        '''
+        self.path = path
+        self.max_frame_size = max_frame_size
+        self._own_fd = filename is not None
+        if filename is not None:
+            fd = os.open(
+                filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+            )
+        elif fd is None:
+            fd = sys.stdout.fileno()
+        self.fd = fd
+        if os.path.exists(path):
+            os.unlink(path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(path)
+        self._sock.listen(128)
+        self._sock.setblocking(False)
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._stopping = False
+        self._thread: typing.Optional[threading.Thread] = None
+        self.records = 0
+
+    def _read(self, conn: socket.socket, buffer: bytearray, out: bytearray):
+        '''
+        Read available data of a connection and move whole frames to `out`
+        :return: `False` if the connection is closed
+        '''
+        is_open = True
+        while True:
+            try:
+                chunk = conn.recv(_READ_SIZE)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                chunk = b''
+            if not chunk:
+                is_open = False
+                break
+            buffer += chunk
+            if len(chunk) < _READ_SIZE:
+                break
+        offset = 0
+        size = len(buffer)
+        while size - offset >= _FRAME.size:
+            length = _FRAME.unpack_from(buffer, offset)[0]
+            if length > self.max_frame_size:
+                return False
+            end = offset + _FRAME.size + length
+            if end > size:
+                break
+            out += buffer[offset + _FRAME.size:end]
+            out += b'\n'
+            self.records += 1
+            offset = end
+        del buffer[:offset]
+        return is_open
+
+    def serve_forever(self, poll_interval: float=0.5) -> None:
+        '''
+        Accept workers and write their records until `stop` is called
+        :param poll_interval: maximal time in seconds between checks of
+            the stop flag
+        '''
+        selector = selectors.DefaultSelector()
+        selector.register(self._sock, selectors.EVENT_READ)
+        selector.register(self._wakeup_r, selectors.EVENT_READ)
+        buffers = {}
+
+        def _close(conn):
+            selector.unregister(conn)
+            del buffers[conn]
+            conn.close()
+
+        try:
+            while not self._stopping:
+                out = bytearray()
+                for key, _ in selector.select(poll_interval):
+                    if key.fileobj is self._sock:
+                        try:
+                            conn = self._sock.accept()[0]
+                        except (BlockingIOError, InterruptedError):
+                            continue
+                        conn.setblocking(False)
+                        buffers[conn] = bytearray()
+                        selector.register(conn, selectors.EVENT_READ)
+                    elif key.fileobj == self._wakeup_r:
+                        os.read(self._wakeup_r, 64)
+                    else:
+                        conn = key.fileobj
+                        if not self._read(conn, buffers[conn], out):
+                            _close(conn)
+                if out:
+                    _write_all(self.fd, out)
+            # records already sent by the workers are written
+            out = bytearray()
+            for conn in list(buffers):
+                self._read(conn, buffers[conn], out)
+                _close(conn)
+            if out:
+                _write_all(self.fd, out)
+        finally:
+            selector.close()
+            self._close()
+
+    def _close(self) -> None:
+        self._sock.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+        if self._own_fd:
+            os.close(self.fd)
+
+    def start(self) -> None:
+        '''
+        Serve in a thread
+        '''
+        self._thread = threading.Thread(
+            target=self.serve_forever,
+            name='janus-logging-aggregator',
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        '''
+        Stop serving - records already sent are written. It can be called
+        by a signal handler.
+        '''
+        if not self._stopping:
+            self._stopping = True
+            os.write(self._wakeup_w, b'x')
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+
+class AggregatorHandler(HandlerMetrics, logging.Handler):
+    '''
+    Handler, which sends records to a `LogAggregator` - a batch of records is
+    sent at once. While the aggregator is not reachable, records are dropped
+    and counted in `dropped`, the connection is retried every
+    `retry_interval` seconds. A forked process opens its own connection.
+    '''
+    def __init__(
+            self,
+            path: str,
+            retry_interval: float=DEFAULT_RETRY_INTERVAL,
+            timeout: typing.Optional[float]=None
+    ):
+        '''
+        Constructor with socket path
+        :param path: path of the Unix socket of the aggregator
+        :param retry_interval: time in seconds between connection attempts
+        :param timeout: timeout in seconds of a send, `None` - blocking
+        '''
+        super(AggregatorHandler, self).__init__()
+        self.path = path
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.dropped = 0
+        self._sock: typing.Optional[socket.socket] = None
+        self._pid = os.getpid()
+        self._retry_at = 0.0
+
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        '''
+        Format log record to UTF-8 encoded bytes
+        :param record: log record
+        :return: log bytes
+        '''
+        fmt = self.formatter
+        if hasattr(fmt, 'format_bytes'):
+            return fmt.format_bytes(record)
+        return self.format(record).encode('utf-8')
+
+    def _connect(self) -> typing.Optional[socket.socket]:
+        if self._pid != os.getpid():
+            # the connection of the parent process must not be shared,
+            # closing it in this process keeps it open in the parent
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+            self._pid = os.getpid()
+            self._retry_at = 0.0
+        if self._sock is None and time.monotonic() >= self._retry_at:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                self._retry_at = time.monotonic() + self.retry_interval
+            else:
+                self._sock = sock
+        return self._sock
+
+    def send(self, frames: typing.List[bytes], record: logging.LogRecord):
+        '''
+        Send frames with one call
+        :param frames: formatted records
+        :param record: record reported on errors
+        '''
+        sock = self._connect()
+        if sock is None:
+            self.dropped += len(frames)
+            return
+        data = b''.join(
+            _FRAME.pack(len(frame)) + frame for frame in frames
+        )
+        try:
+            sock.sendall(data)
+        except OSError:
+            self.dropped += len(frames)
+            self._sock = None
+            self._retry_at = time.monotonic() + self.retry_interval
+            sock.close()
+            self.handleError(record)
+        else:
+            if self.metrics is not None:
+                self.metrics.written(len(data))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.send([self.format_bytes(record)], record)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def handle_batch(self, records: typing.List[logging.LogRecord]) -> None:
+        '''
+        Handle a batch of log records
+        :param records: log records
+        '''
+        frames = []
+        for record in records:
+            if self.filter(record):
+                try:
+                    frames.append(self.format_bytes(record))
+                except RecursionError:
+                    raise
+                except Exception:
+                    self.handleError(record)
+        if frames:
+            self.acquire()
+            try:
+                self.send(frames, records[-1])
+            finally:
+                self.release()
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            sock, self._sock = self._sock, None
+            if sock is not None:
+                sock.close()
+        finally:
+            self.release()
+        super(AggregatorHandler, self).close()
+
+    def __repr__(self):
+        level = logging.getLevelName(self.level)
+        return '<%s %s (%s)>' % (self.__class__.__name__, self.path, level)
+
+
+def run_aggregator(
+        path: str,
+        filename: typing.Optional[str]=None,
+        ready: typing.Optional[typing.Any]=None,
+        **kwargs
+) -> None:
+    '''
+    Run an aggregator until SIGTERM or SIGINT - the target of a process
+    :param path: path of the Unix socket
+    :param filename: file to append to, default is stdout
+    :param ready: event, which is set once workers can connect
+    '''
+    aggregator = LogAggregator(path, filename=filename, **kwargs)
+
+    def _stop(*args):  # @UnusedVariable
+        aggregator.stop()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    if ready is not None:
+        ready.set()
+    aggregator.serve_forever()
+
+
+def spawn_aggregator(
+        path: str,
+        filename: typing.Optional[str]=None,
+        timeout: float=10.0,
+        **kwargs
+) -> multiprocessing.Process:
+    '''
+    Start an aggregator process, stop it by `terminate()` - records already
+    sent are written
+    :param path: path of the Unix socket
+    :param filename: file to append to, default is stdout
+    :param timeout: maximal time in seconds to wait for the process
+    :return: started process, workers can connect
+    '''
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(
+        target=run_aggregator,
+        args=(path, filename, ready),
+        kwargs=kwargs,
+        name='janus-logging-aggregator',
+        daemon=True
+    )
+    process.start()
+    if not ready.wait(timeout):
+        process.terminate()
+        raise RuntimeError('aggregator process did not start')
+    return process
+
+
+def main(argv: typing.List[str]=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='janus-logging-aggregator',
+        description='Write records of janus-logging workers to stdout or '
+                    'a file'
+    )
+    parser.add_argument('path', help='path of the Unix socket')
+    parser.add_argument('-o', '--output', help='file to append to')
+    args = parser.parse_args(argv)
+    run_aggregator(args.path, filename=args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.benchmark
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.benchmark
+-----------------------
+Benchmarks
+
+    janus-logging-benchmark formatter
+    janus-logging-benchmark adapter
+    janus-logging-benchmark suite --output new.json --compare old.json
+    janus-logging-benchmark compare old.json new.json
+
+or `python -m janus_logging.benchmark ...`
+'''
+
+from __future__ import absolute_import
+
+import argparse
+import sys
+import typing
+
+from .micro import bench_adapter, bench_formatter
+from .suite import (
+    ADAPTERS, CONCURRENCY, EXTRAS, FIXTURES, LEVELS, bench_suite, compare,
+    load_results, save_results
+)
+from ..version import VERSION
+
+__all__ = [
+    'bench_adapter', 'bench_formatter', 'bench_suite', 'compare',
+    'load_results', 'save_results', 'main'
+]
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+def _print_result(res: typing.Dict) -> None:
+    print(
+        '%(adapter)-5s %(fixture)-7s %(level)-8s %(extra)-5s '
+        '%(concurrency)5d: %(records_per_sec)10.0f rec/s, '
+        'p50 %(p50_us)8.1f us, p99 %(p99_us)8.1f us, '
+        'p999 %(p999_us)8.1f us, loop lag p99 %(loop_lag_p99_us)8.1f us, '
+        'max %(loop_lag_max_us)8.1f us' % res
+    )
+
+
+def _print_changes(changes: typing.List[typing.Dict]) -> None:
+    for change in changes:
+        print(
+            '%-5s %-7s %-8s %-5s %5d: %10.0f -> %10.0f rec/s (%+6.1f%%), '
+            'p99 %8.1f -> %8.1f us' % (
+                change['adapter'], change['fixture'], change['level'],
+                change['extra'], change['concurrency'],
+                change['records_per_sec'][0], change['records_per_sec'][1],
+                change['throughput_change'] * 100,
+                change['p99_us'][0], change['p99_us'][1]
+            )
+        )
+
+
+def main(argv: typing.List[str]=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='janus-logging-benchmark',
+        description='janus-logging benchmarks'
+    )
+    commands = parser.add_subparsers(dest='benchmark')
+    commands.required = True
+    for name in ('formatter', 'adapter'):
+        command = commands.add_parser(name, help='%s micro benchmark' % name)
+        command.add_argument('-n', '--number', type=int, default=20000)
+        command.add_argument('-r', '--repeat', type=int, default=5)
+    command = commands.add_parser(
+        'suite', help='throughput and latency of log calls'
+    )
+    command.add_argument(
+        '-n', '--records', type=int, default=10000,
+        help='log calls per scenario'
+    )
+    command.add_argument(
+        '-c', '--concurrency', type=int, nargs='+', default=CONCURRENCY,
+        help='numbers of concurrent coroutines or threads'
+    )
+    command.add_argument(
+        '--adapter', nargs='+', choices=ADAPTERS, default=ADAPTERS
+    )
+    command.add_argument(
+        '--fixture', nargs='+', choices=tuple(FIXTURES),
+        default=tuple(FIXTURES)
+    )
+    command.add_argument(
+        '--level', nargs='+', choices=LEVELS, default=LEVELS
+    )
+    command.add_argument(
+        '--extra', nargs='+', choices=tuple(EXTRAS), default=tuple(EXTRAS)
+    )
+    command.add_argument('-o', '--output', help='save results as Json')
+    command.add_argument(
+        '--compare', metavar='BASELINE', help='compare with saved results'
+    )
+    command = commands.add_parser('compare', help='compare saved results')
+    command.add_argument('baseline')
+    command.add_argument('current')
+    args = parser.parse_args(argv)
+    if args.benchmark == 'formatter':
+        for extra_fields, static_fields in ((0, 0), (4, 4), (16, 16)):
+            res = bench_formatter(
+                args.number, args.repeat, extra_fields, static_fields
+            )
+            print(
+                'formatter extra=%2d static=%2d: reference %6.2f us, '
+                'current %6.2f us, speedup x%.2f' % (
+                    extra_fields, static_fields,
+                    res['reference'] * 1e6, res['current'] * 1e6,
+                    res['speedup']
+                )
+            )
+    elif args.benchmark == 'adapter':
+        res = bench_adapter(args.number * 10, args.repeat)
+        for name, value in res.items():
+            print('disabled call %-30s %6.3f us' % (name, value * 1e6))
+    elif args.benchmark == 'suite':
+        baseline = load_results(args.compare) if args.compare else None
+        results = bench_suite(
+            records=args.records,
+            adapters=args.adapter,
+            fixtures=args.fixture,
+            levels=args.level,
+            extras=args.extra,
+            concurrency=args.concurrency,
+            progress=_print_result
+        )
+        if args.output:
+            save_results(args.output, results)
+        if baseline is not None:
+            print('compared with %s (version %s)' % (
+                args.compare, baseline.get('version')
+            ))
+            _print_changes(compare(baseline, results))
+    elif args.benchmark == 'compare':
+        _print_changes(compare(
+            load_results(args.baseline), load_results(args.current)
+        ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.benchmark.__main__
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.benchmark.__main__
+--------------------------------
+Run benchmarks by `python -m janus_logging.benchmark`
+'''
+
+from __future__ import absolute_import
+
+import sys
+
+from . import main
+
+if __name__ == '__main__':
+    sys.exit(main())
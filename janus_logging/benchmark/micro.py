@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.benchmark.micro
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.benchmark.micro
+-----------------------------
+Micro benchmarks of the Json formatter and of disabled log calls
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import datetime
+import json
+import logging
+import timeit
+import typing
+
+from .. import AsyncLoggerAdapter, SyncJsonFormatter, SyncLoggerAdapter
+from ..version import VERSION
+
+__all__ = ['bench_adapter', 'bench_formatter']
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+class _ReferenceJsonFormatter(logging.Formatter):
+    '''
+    Json formatter of version 1.3.2 - the reference for benchmarks
+    '''
+    RESERVED_ATTRS = (
+        'args', 'asctime', 'created', 'exc_info', 'exc_text', 'filename',
+        'funcName', 'levelname', 'levelno', 'lineno', 'module',
+        'msecs', 'message', 'msg', 'name', 'pathname', 'process',
+        'processName', 'relativeCreated', 'stack_info', 'thread', 'threadName'
+    )
+
+    def __init__(self, serializer=json.dumps, **kwargs):
+        super(_ReferenceJsonFormatter, self).__init__()
+        self.extra = kwargs
+        self.serializer = serializer
+
+    def format(self, record):
+        details = {**self.extra, **dict(
+            (key, value)
+            for key, value in record.__dict__.items()
+            if (
+                key not in self.RESERVED_ATTRS and not (
+                    hasattr(key, 'startswith') and key.startswith('_')
+                )
+            )
+        )}
+        details.update(
+            logged_at=datetime.datetime.now(datetime.timezone.utc).astimezone(None).isoformat(),  # noqa E501
+            line_numer=record.lineno,
+            function=record.funcName,
+            level=record.levelname.upper(),
+            msg=record.getMessage(),
+            file_path=record.pathname
+        )
+        return self.serializer(details)
+
+
+def _make_record(extra_fields: int) -> logging.LogRecord:
+    logger = logging.getLogger('janus_logging.benchmark')
+    return logger.makeRecord(
+        logger.name, logging.INFO, __file__, 1, 'Hello #%s', (1,), None,
+        'bench', {'field_%s' % i: i for i in range(extra_fields)}
+    )
+
+
+def _per_record(func: typing.Callable, number: int, repeat: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def bench_formatter(
+        number: int=20000,
+        repeat: int=5,
+        extra_fields: int=4,
+        static_fields: int=4
+) -> typing.Dict:
+    '''
+    Benchmark `SyncJsonFormatter.format` against the reference formatter
+    :param number: number of records per run
+    :param repeat: number of runs, the best run is reported
+    :param extra_fields: number of extra fields of a record
+    :param static_fields: number of static fields of the formatter
+    :return: dictionary with seconds per record and speedup
+    '''
+    static = {'static_%s' % i: 'value_%s' % i for i in range(static_fields)}
+    record = _make_record(extra_fields)
+    reference = _ReferenceJsonFormatter(**static)
+    current = SyncJsonFormatter(**static)
+    res_reference = _per_record(
+        lambda: reference.format(record), number, repeat
+    )
+    res_current = _per_record(lambda: current.format(record), number, repeat)
+    return dict(
+        reference=res_reference,
+        current=res_current,
+        speedup=res_reference / res_current
+    )
+
+
+def bench_adapter(
+        number: int=200000,
+        repeat: int=5
+) -> typing.Dict:
+    '''
+    Benchmark disabled log calls of adapters with and without stripped
+    levels
+    :param number: number of calls per run
+    :param repeat: number of runs, the best run is reported
+    :return: dictionary with seconds per call per adapter
+    '''
+    logger = logging.getLogger('janus_logging.benchmark.adapter')
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+    loop = asyncio.new_event_loop()
+    try:
+        res = {}
+        for strip_levels in (False, True):
+            for adapter in (
+                    AsyncLoggerAdapter(logger, {}, loop),
+                    SyncLoggerAdapter(logger, {})
+            ):
+                if strip_levels:
+                    adapter.strip_levels = True
+                    adapter._update_level()
+                res['%s%s' % (
+                    adapter.__class__.__name__,
+                    ' (stripped)' if strip_levels else ''
+                )] = _per_record(
+                    lambda: adapter.debug('Hello #%s', 1, extra={'a': 1}),
+                    number, repeat
+                )
+        return res
+    finally:
+        loop.close()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.benchmark.suite
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.benchmark.suite
+-----------------------------
+Throughput and latency benchmarks of `JanusLogger` - a matrix of adapters,
+fixtures, enabled and disabled levels, small and large extra fields, run by
+concurrent coroutines (async adapter) or threads (sync adapter). The event
+loop lag is sampled while the log calls run.
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import threading
+import time
+import typing
+
+from .. import JanusLogger, fixture_default, fixture_json
+from ..version import VERSION
+
+__all__ = [
+    'ADAPTERS', 'CONCURRENCY', 'EXTRAS', 'FIXTURES', 'LEVELS',
+    'bench_suite', 'compare', 'load_results', 'save_results'
+]
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+ADAPTERS = ('sync', 'async')
+FIXTURES = {'default': fixture_default, 'json': fixture_json}
+LEVELS = ('enabled', 'disabled')
+EXTRAS = {
+    'small': {'request_id': 'abc123', 'user': 42},
+    'large': {
+        'field_%02d' % i: 'value %02d %s' % (i, 'x' * 48) for i in range(32)
+    }
+}
+CONCURRENCY = (1, 10, 1000)
+
+LAG_INTERVAL = 0.001
+
+_NAMES = itertools.count()
+
+
+def _percentile(values: typing.List[float], q: float) -> float:
+    '''
+    Get a percentile of sorted values
+    :param values: sorted values
+    :param q: quantile between 0 and 1
+    :return: value
+    '''
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _watch_loop(
+        lags: typing.List[float],
+        done: typing.Callable[[], bool]
+) -> None:
+    '''
+    Sample the lag of the event loop until `done` returns `True`
+    :param lags: list, the lags in seconds are appended to
+    :param done: function telling whether the benchmark is finished
+    '''
+    while not done():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - start - LAG_INTERVAL))
+
+
+def _run_async(
+        loop: asyncio.AbstractEventLoop,
+        log,
+        method: str,
+        extra: typing.Dict,
+        calls: int,
+        concurrency: int,
+        lags: typing.List[float]
+) -> typing.List[float]:
+    '''
+    Run log calls of an async adapter by concurrent coroutines
+    :return: latencies of the calls in seconds
+    '''
+    latencies = []
+    pending = [concurrency]
+
+    async def _worker():
+        func = getattr(log, method)
+        timer = time.perf_counter
+        append = latencies.append
+        for i in range(calls):
+            start = timer()
+            await func('Hello #%s', i, extra=extra)
+            append(timer() - start)
+        pending[0] -= 1
+
+    async def _main():
+        watch = asyncio.ensure_future(
+            _watch_loop(lags, lambda: not pending[0])
+        )
+        await asyncio.gather(*(_worker() for _ in range(concurrency)))
+        await watch
+
+    loop.run_until_complete(_main())
+    return latencies
+
+
+def _run_threads(
+        loop: asyncio.AbstractEventLoop,
+        log,
+        method: str,
+        extra: typing.Dict,
+        calls: int,
+        concurrency: int,
+        lags: typing.List[float]
+) -> typing.List[float]:
+    '''
+    Run log calls of a sync adapter by concurrent threads
+    :return: latencies of the calls in seconds
+    '''
+    results = [None] * concurrency
+
+    def _worker(index):
+        func = getattr(log, method)
+        timer = time.perf_counter
+        latencies = []
+        append = latencies.append
+        for i in range(calls):
+            start = timer()
+            func('Hello #%s', i, extra=extra)
+            append(timer() - start)
+        results[index] = latencies
+
+    threads = [
+        threading.Thread(target=_worker, args=(i,), daemon=True)
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    loop.run_until_complete(_watch_loop(
+        lags, lambda: not any(thread.is_alive() for thread in threads)
+    ))
+    for thread in threads:
+        thread.join()
+    return list(itertools.chain.from_iterable(results))
+
+
+def _run_scenario(
+        adapter: str,
+        fixture: str,
+        level: str,
+        extra: str,
+        concurrency: int,
+        records: int
+) -> typing.Dict:
+    '''
+    Run one scenario of the benchmark suite
+    :return: dictionary with the scenario and its results
+    '''
+    calls = max(1, records // concurrency)
+    loop = asyncio.new_event_loop()
+    stream = open(os.devnull, 'w')
+    logger = JanusLogger(
+        name='janus_logging.benchmark.suite.%s' % next(_NAMES),
+        level=logging.INFO,
+        loop=loop,
+        fixture=FIXTURES[fixture],
+        stream=stream,
+        propagate=False
+    )
+    lags = []
+    try:
+        method = 'info' if level == 'enabled' else 'debug'
+        start = time.perf_counter()
+        if adapter == 'async':
+            latencies = _run_async(
+                loop, logger.logger_async(), method, EXTRAS[extra], calls,
+                concurrency, lags
+            )
+        else:
+            latencies = _run_threads(
+                loop, logger.logger_sync(), method, EXTRAS[extra], calls,
+                concurrency, lags
+            )
+        elapsed = time.perf_counter() - start
+    finally:
+        logger.shutdown()
+        loop.close()
+        stream.close()
+    latencies.sort()
+    lags.sort()
+    return dict(
+        adapter=adapter,
+        fixture=fixture,
+        level=level,
+        extra=extra,
+        concurrency=concurrency,
+        records=len(latencies),
+        records_per_sec=len(latencies) / elapsed,
+        p50_us=_percentile(latencies, 0.5) * 1e6,
+        p99_us=_percentile(latencies, 0.99) * 1e6,
+        p999_us=_percentile(latencies, 0.999) * 1e6,
+        loop_lag_p99_us=_percentile(lags, 0.99) * 1e6,
+        loop_lag_max_us=(lags[-1] if lags else 0.0) * 1e6
+    )
+
+
+def bench_suite(
+        records: int=10000,
+        adapters: typing.Iterable[str]=ADAPTERS,
+        fixtures: typing.Iterable[str]=tuple(FIXTURES),
+        levels: typing.Iterable[str]=LEVELS,
+        extras: typing.Iterable[str]=tuple(EXTRAS),
+        concurrency: typing.Iterable[int]=CONCURRENCY,
+        progress: typing.Optional[typing.Callable[[typing.Dict], None]]=None
+) -> typing.Dict:
+    '''
+    Run the benchmark suite
+    :param records: number of log calls per scenario, split among the
+        coroutines or threads
+    :param adapters: adapters - `sync` (run by threads) and `async` (run by
+        coroutines)
+    :param fixtures: fixtures - `default` and `json`
+    :param levels: levels of the log calls - `enabled` and `disabled`
+    :param extras: extra fields of the log calls - `small` and `large`
+    :param concurrency: numbers of concurrent coroutines or threads
+    :param progress: function called with the result of each scenario
+    :return: dictionary with the environment and the results
+    '''
+    results = []
+    for scenario in itertools.product(
+            adapters, fixtures, levels, extras, concurrency
+    ):
+        res = _run_scenario(*scenario, records=records)
+        if progress is not None:
+            progress(res)
+        results.append(res)
+    return dict(
+        version=__version__,
+        python=platform.python_version(),
+        platform=platform.platform(),
+        created=time.time(),
+        results=results
+    )
+
+
+def _key(res: typing.Dict) -> typing.Tuple:
+    return (
+        res['adapter'], res['fixture'], res['level'], res['extra'],
+        res['concurrency']
+    )
+
+
+def save_results(path: str, results: typing.Dict) -> None:
+    '''
+    Save results of the benchmark suite as Json
+    :param path: path of the file
+    :param results: results of `bench_suite`
+    '''
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> typing.Dict:
+    '''
+    Load results of the benchmark suite
+    :param path: path of the file
+    :return: results of `bench_suite`
+    '''
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(
+        baseline: typing.Dict,
+        current: typing.Dict
+) -> typing.List[typing.Dict]:
+    '''
+    Compare results of the benchmark suite, e.g. of two versions
+    :param baseline: results of `bench_suite` to compare against
+    :param current: results of `bench_suite`
+    :return: list with the change of throughput and latency per scenario,
+        which is part of both results
+    '''
+    base = {_key(res): res for res in baseline['results']}
+    changes = []
+    for res in current['results']:
+        old = base.get(_key(res))
+        if old is None:
+            continue
+        changes.append(dict(
+            zip(('adapter', 'fixture', 'level', 'extra', 'concurrency'),
+                _key(res)),
+            records_per_sec=(
+                old['records_per_sec'], res['records_per_sec']
+            ),
+            p99_us=(old['p99_us'], res['p99_us']),
+            throughput_change=(
+                res['records_per_sec'] / old['records_per_sec'] - 1
+                if old['records_per_sec'] else 0.0
+            )
+        ))
+    return changes
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.binary
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.binary
+--------------------
+Compact binary encoding of log records - key names, message templates, level
+names, functions and file paths are interned: they are defined once per file
+or stream and referenced by id. A record stores the template and its
+arguments, not the formatted message.
+
+A stream is a sequence of frames `length u32 | type u8 | payload`::
+
+    HEADER  magic - starts a stream, the decoder forgets all definitions
+    DEFINE  id u32 | UTF-8 string
+    RECORD  created f64 | line u32 | level, function, file path, message
+            template (names) | arguments (u16 count, values) | fields (u16
+            count, name and value)
+
+A name is an id u32, `INLINE` is followed by a string. A value is a tag
+with data: `N` None, `T` True, `F` False, `i` int64, `f` float64, `s` string
+(u32 length | UTF-8) and `j` Json text of other values. The decoder converts
+records to the Json layout of `SyncJsonFormatter`:
+
+    janus-logging-decode my_app.jlb > my_app.log
+'''
+
+from __future__ import absolute_import
+
+import argparse
+import json
+import logging
+import struct
+import sys
+import typing
+
+from .handlers import BufferedBytesHandler, ThreadedFileHandler
+from .version import VERSION
+
+__all__ = [
+    'BinaryDecoder', 'BinaryEncoder', 'BinaryFileHandler',
+    'BinaryStreamHandler', 'main'
+]
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+MAGIC = b'JLB1'
+HEADER, DEFINE, RECORD = 1, 2, 3
+INLINE = 0xFFFFFFFF
+DEFAULT_MAX_NAMES = 1 << 16
+
+_FRAME = struct.Struct('<IB')
+_RECORD = struct.Struct('<dI')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_INT_RANGE = (-(1 << 63), (1 << 63) - 1)
+# values of message arguments, which are formatted alike by the decoder
+_PLAIN_ARGS = frozenset((type(None), bool, int, float, str))
+
+
+def _frame(kind: int, payload: bytes) -> bytes:
+    return _FRAME.pack(len(payload), kind) + payload
+
+
+def _string(value: str) -> bytes:
+    data = value.encode('utf-8')
+    return _U32.pack(len(data)) + data
+
+
+class BinaryEncoder(object):
+    '''
+    Encoder of records - it keeps the interned names of one file or stream
+    '''
+    def __init__(self, max_names: int=DEFAULT_MAX_NAMES):
+        '''
+        Constructor with the size of the dictionary
+        :param max_names: maximal number of interned names, further names
+            are written inline
+        '''
+        self.max_names = max_names
+        self.names = {}
+        self.started = False
+
+    def header(self) -> bytes:
+        '''
+        Get the header of a file or stream with all interned names
+        :return: frames
+        '''
+        self.started = True
+        frames = [_frame(HEADER, MAGIC)]
+        for name, index in self.names.items():
+            frames.append(_frame(DEFINE, _U32.pack(index) + name.encode('utf-8')))  # noqa E501
+        return b''.join(frames)
+
+    def _name(self, value: str, out: typing.List[bytes]) -> bytes:
+        '''
+        Get the reference of a name, define it in `out` on first use
+        '''
+        index = self.names.get(value)
+        if index is not None:
+            return _U32.pack(index)
+        if len(self.names) >= self.max_names:
+            return _U32.pack(INLINE) + _string(value)
+        index = self.names[value] = len(self.names)
+        out.append(_frame(DEFINE, _U32.pack(index) + value.encode('utf-8')))
+        return _U32.pack(index)
+
+    def _value(self, value: typing.Any) -> bytes:
+        cls = value.__class__
+        if value is None:
+            return b'N'
+        if cls is bool:
+            return b'T' if value else b'F'
+        if cls is int and _INT_RANGE[0] <= value <= _INT_RANGE[1]:
+            return b'i' + _I64.pack(value)
+        if cls is float:
+            return b'f' + _F64.pack(value)
+        if cls is str:
+            return b's' + _string(value)
+        return b'j' + _string(json.dumps(value, default=str))
+
+    def encode(
+            self,
+            created: float,
+            lineno: int,
+            level: str,
+            function: str,
+            path: str,
+            msg: typing.Any,
+            args: typing.Any,
+            fields: typing.Dict[str, typing.Any]
+    ) -> bytes:
+        '''
+        Encode a record with the definitions of its new names
+        :param created: time of the record
+        :param lineno: line number
+        :param level: level name
+        :param function: function name
+        :param path: file path
+        :param msg: message template
+        :param args: arguments of the message
+        :param fields: extra fields
+        :return: frames
+        '''
+        out = [] if self.started else [self.header()]
+        if args and any((
+                msg.__class__ is not str,
+                args.__class__ is not tuple,
+                not _PLAIN_ARGS.issuperset(map(type, args))
+        )):
+            # formatted here, e.g. objects with `__str__` or a mapping
+            msg, args = str(msg) % args, ()
+        elif msg.__class__ is not str:
+            msg, args = str(msg), ()
+        parts = [_RECORD.pack(created, lineno)]
+        for name in (level, function, path):
+            parts.append(self._name(name, out))
+        if args:
+            parts.append(self._name(msg, out))
+        else:
+            parts.append(_U32.pack(INLINE) + _string(msg))
+        parts.append(_U16.pack(len(args)))
+        parts.extend(self._value(arg) for arg in args)
+        parts.append(_U16.pack(len(fields)))
+        for key, value in fields.items():
+            parts.append(self._name(key, out))
+            parts.append(self._value(value))
+        out.append(_frame(RECORD, b''.join(parts)))
+        return b''.join(out)
+
+
+class BinaryDecoder(object):
+    '''
+    Decoder of frames to records in the Json layout of `SyncJsonFormatter`
+    '''
+    def __init__(
+            self,
+            timestamp: typing.Optional[typing.Callable[[float], typing.Any]]=None  # noqa E501
+    ):
+        '''
+        Constructor with timestamp format
+        :param timestamp: function formatting `logged_at`, default are
+            seconds since the epoch
+        '''
+        self.timestamp = timestamp or float
+        self.names = {}
+        self._buffer = bytearray()
+
+    def _name(self, data: bytes, offset: int) -> typing.Tuple[str, int]:
+        index = _U32.unpack_from(data, offset)[0]
+        offset += _U32.size
+        if index == INLINE:
+            return self._string(data, offset)
+        return self.names[index], offset
+
+    def _string(self, data: bytes, offset: int) -> typing.Tuple[str, int]:
+        size = _U32.unpack_from(data, offset)[0]
+        offset += _U32.size
+        return data[offset:offset + size].decode('utf-8'), offset + size
+
+    def _value(self, data: bytes, offset: int) -> typing.Tuple[typing.Any, int]:  # noqa E501
+        tag = data[offset:offset + 1]
+        offset += 1
+        if tag == b'N':
+            return None, offset
+        if tag == b'T':
+            return True, offset
+        if tag == b'F':
+            return False, offset
+        if tag == b'i':
+            return _I64.unpack_from(data, offset)[0], offset + _I64.size
+        if tag == b'f':
+            return _F64.unpack_from(data, offset)[0], offset + _F64.size
+        if tag == b's':
+            return self._string(data, offset)
+        if tag == b'j':
+            text, offset = self._string(data, offset)
+            return json.loads(text), offset
+        raise ValueError('unknown value tag: %r' % tag)
+
+    def _record(self, data: bytes) -> typing.Dict:
+        created, lineno = _RECORD.unpack_from(data, 0)
+        offset = _RECORD.size
+        level, offset = self._name(data, offset)
+        function, offset = self._name(data, offset)
+        path, offset = self._name(data, offset)
+        msg, offset = self._name(data, offset)
+        count = _U16.unpack_from(data, offset)[0]
+        offset += _U16.size
+        args = []
+        for _ in range(count):
+            value, offset = self._value(data, offset)
+            args.append(value)
+        count = _U16.unpack_from(data, offset)[0]
+        offset += _U16.size
+        record = {}
+        for _ in range(count):
+            key, offset = self._name(data, offset)
+            record[key], offset = self._value(data, offset)
+        record.update(
+            logged_at=self.timestamp(created),
+            line_numer=lineno,
+            function=function,
+            level=level,
+            msg=msg % tuple(args) if args else msg,
+            file_path=path
+        )
+        return record
+
+    def feed(self, data: bytes) -> typing.List[typing.Dict]:
+        '''
+        Decode data - an incomplete frame at the end is kept for the next
+        call
+        :param data: data of a file or stream
+        :return: decoded records
+        '''
+        buffer = self._buffer
+        buffer += data
+        records = []
+        offset = 0
+        size = len(buffer)
+        while size - offset >= _FRAME.size:
+            length, kind = _FRAME.unpack_from(buffer, offset)
+            end = offset + _FRAME.size + length
+            if end > size:
+                break
+            payload = bytes(buffer[offset + _FRAME.size:end])
+            offset = end
+            if kind == RECORD:
+                records.append(self._record(payload))
+            elif kind == DEFINE:
+                index = _U32.unpack_from(payload, 0)[0]
+                self.names[index] = payload[_U32.size:].decode('utf-8')
+            elif kind == HEADER:
+                if payload != MAGIC:
+                    raise ValueError('not a janus-logging binary stream')
+                self.names = {}
+            else:
+                raise ValueError('unknown frame type: %s' % kind)
+        del buffer[:offset]
+        return records
+
+    @property
+    def pending(self) -> int:
+        '''
+        Size in bytes of an incomplete frame
+        '''
+        return len(self._buffer)
+
+
+class BinaryStreamHandler(BufferedBytesHandler):
+    '''
+    Buffered handler for binary streams, the formatter must have
+    `format_bytes` producing frames (e.g. `SyncBinaryFormatter`)
+    '''
+    terminator = b''
+
+
+class BinaryFileHandler(ThreadedFileHandler):
+    '''
+    File handler for binary records (e.g. `SyncBinaryFormatter`) - every
+    file starts with a header with the interned names
+    '''
+    def _format(self, records: typing.List[logging.LogRecord]) -> bytes:
+        if getattr(self.formatter, 'encoder', None) is None:
+            return super(BinaryFileHandler, self)._format(records)
+        if self._stream is None:
+            # the header is written before the first records are encoded
+            self._open(self.mode)
+        frames = []
+        for record in records:
+            try:
+                frames.append(self.format_bytes(record))
+            except RecursionError:
+                raise
+            except Exception:
+                self.handleError(record)
+        return b''.join(frames)
+
+    def _open(self, mode: str) -> None:
+        super(BinaryFileHandler, self)._open(mode)
+        encoder = getattr(self.formatter, 'encoder', None)
+        if encoder is not None:
+            header = encoder.header()
+            if self._compressor is not None:
+                header = self._compressor.compress(header)
+            self._stream.write(header)
+            self._size += len(header)
+
+
+def main(argv: typing.List[str]=None) -> int:
+    from . import TIMESTAMP_FORMATS
+
+    parser = argparse.ArgumentParser(
+        prog='janus-logging-decode',
+        description='Convert janus-logging binary records to Json lines'
+    )
+    parser.add_argument(
+        'files', nargs='*', help='binary files, default is stdin'
+    )
+    parser.add_argument(
+        '-t', '--timestamp-format', choices=tuple(TIMESTAMP_FORMATS),
+        default='iso', help='format of logged_at'
+    )
+    args = parser.parse_args(argv)
+    out = sys.stdout
+    sources = args.files or [None]
+    for source in sources:
+        decoder = BinaryDecoder(TIMESTAMP_FORMATS[args.timestamp_format]())
+        f = sys.stdin.buffer if source is None else open(source, 'rb')
+        try:
+            while True:
+                data = f.read(1024 * 1024)
+                if not data:
+                    break
+                for record in decoder.feed(data):
+                    out.write(json.dumps(record) + '\n')
+        finally:
+            if source is not None:
+                f.close()
+        if decoder.pending:
+            sys.stderr.write(
+                'janus-logging-decode: incomplete record at the end of %s\n' %
+                (source or 'stdin')
+            )
+    out.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
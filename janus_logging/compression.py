@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.compression
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.compression
+-------------------------
+Streaming compression of log files and streams - `gzip` and, if installed,
+`zstd` (`zstandard`). A flush ends the current block, so everything written
+up to the last flush can be decompressed from a partial file.
+'''
+
+from __future__ import absolute_import
+
+import collections
+import typing
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+from .version import VERSION
+
+__all__ = [
+    'COMPRESSIONS', 'Compression', 'get_compression', 'make_compressor'
+]
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+Compression = collections.namedtuple(
+    'Compression',
+    ('name', 'suffix', 'default_level', 'compressor')
+)
+Compression.__doc__ = '''
+Streaming compression
+:param name: name of the compression
+:param suffix: usual file name suffix
+:param default_level: default compression level
+:param compressor: function of the level returning a compressor with
+    `compress(data)`, `flush()` (end of a block) and `finish()` (end of the
+    stream), each returning bytes to be written
+'''
+
+
+class _GzipCompressor(object):
+    __slots__ = ('_obj',)
+
+    def __init__(self, level: int):
+        # a gzip member, concatenated members are one gzip file
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _ZstdCompressor(object):
+    __slots__ = ('_obj',)
+
+    def __init__(self, level: int):
+        # a zstd frame, concatenated frames are one zstd file
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+COMPRESSIONS = collections.OrderedDict()
+COMPRESSIONS['gzip'] = Compression('gzip', '.gz', 6, _GzipCompressor)
+if zstandard is not None:
+    COMPRESSIONS['zstd'] = Compression('zstd', '.zst', 3, _ZstdCompressor)
+
+
+def get_compression(name: str) -> Compression:
+    '''
+    Get a compression
+    :param name: name of the compression (`gzip`, `zstd`)
+    :return: compression
+    '''
+    try:
+        return COMPRESSIONS[name]
+    except KeyError:
+        raise ValueError('compression is not available: %s' % name)
+
+
+def make_compressor(
+        name: typing.Optional[str],
+        level: typing.Optional[int]=None
+) -> typing.Any:
+    '''
+    Make a compressor
+    :param name: name of the compression, `None` - no compression
+    :param level: compression level, default of the compression
+    :return: compressor or `None`
+    '''
+    if name is None:
+        return None
+    compression = get_compression(name)
+    if level is None:
+        level = compression.default_level
+    return compression.compressor(level)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.context
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.context
+---------------------
+Context fields of logger adapters - a child context shares the fields of its
+parent, so binding new fields costs only the new fields. The merged fields
+and their Json fragments are computed once per context (and after a change
+of the fields), a formatter, which can not splice the fragment, copies the
+merged fields per record. The fields are set as attributes of the log
+records, like `extra` of a `logging.LoggerAdapter` - except fields named
+like attributes of a log record (e.g. `name`), which `logging` rejects, they
+are logged only by the Json formatters.
+'''
+
+from __future__ import absolute_import
+
+import collections.abc
+import logging
+import typing
+
+from .lazy import Lazy
+from .serializers import Serializer
+from .version import VERSION
+
+__all__ = ['Context']
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+# keys, which `logging.Logger.makeRecord` does not accept in `extra`
+_RECORD_ATTRS = frozenset(
+    logging.LogRecord('', logging.NOTSET, '', 0, '', (), None).__dict__
+) | frozenset(('message', 'asctime'))
+
+
+class Context(collections.abc.MutableMapping):
+    '''
+    Mapping of context fields with a parent context - it can be changed like
+    the `extra` dict of a `logging.LoggerAdapter`, the change is seen by the
+    child contexts. Only own fields can be deleted.
+    '''
+    __slots__ = (
+        'parent', 'fields', '_extra', '_flat', '_fragments', '_seen'
+    )
+    # number of changes of all contexts, the cached values of a context are
+    # computed again after a change
+    _changes = 0
+
+    def __init__(
+            self,
+            fields: typing.Optional[typing.Mapping]=None,
+            parent: typing.Optional['Context']=None
+    ):
+        '''
+        Constructor with own fields and parent
+        :param fields: own fields, they override the fields of the parent
+        :param parent: parent context
+        '''
+        self.parent = parent
+        self.fields = dict(fields) if fields else {}
+        self._extra = None
+        self._flat = None
+        self._fragments = {}
+        self._seen = Context._changes
+
+    def _check(self) -> None:
+        '''
+        Forget the cached values after a change of any context
+        '''
+        if self._seen != Context._changes:
+            self._extra = None
+            self._flat = None
+            self._fragments = {}
+            self._seen = Context._changes
+
+    def bind(self, **fields) -> 'Context':
+        '''
+        Get a child context with additional fields
+        :return: child context
+        '''
+        if not fields:
+            return self
+        return Context(fields, self)
+
+    def flat(self) -> typing.Dict:
+        '''
+        Get all fields as a dictionary - it is computed once and must not be
+        changed
+        :return: fields
+        '''
+        self._check()
+        flat = self._flat
+        if flat is None:
+            if self.parent is None:
+                flat = self.fields
+            elif not self.fields:
+                flat = self.parent.flat()
+            else:
+                flat = {**self.parent.flat(), **self.fields}
+            self._flat = flat
+        return flat
+
+    @property
+    def extra(self) -> typing.Dict:
+        '''
+        Get `extra` of log records - all fields, except those named like
+        attributes of a log record, and the context itself as `_context`,
+        from which formatters take all fields at once. It is computed once
+        and must not be changed.
+        :return: extra fields
+        '''
+        self._check()
+        extra = self._extra
+        if extra is None:
+            extra = {
+                key: value for key, value in self.flat().items()
+                if key not in _RECORD_ATTRS
+            }
+            extra['_context'] = self
+            self._extra = extra
+        return extra
+
+    def fragment(
+            self,
+            backend: Serializer,
+            reserved: typing.FrozenSet
+    ) -> typing.Optional[typing.Tuple[str, bytes]]:
+        '''
+        Get the fields serialized as a Json fragment (without braces, with a
+        trailing separator), which can be spliced into a Json object
+        :param backend: serializer backend
+        :param reserved: keys, which are set by the formatter
+        :return: tuple with the fragment as `str` and `bytes` or `None`, if
+            the context is empty, has lazy values or reserved keys
+        '''
+        self._check()
+        key = (backend.name, reserved)
+        try:
+            return self._fragments[key]
+        except KeyError:
+            pass
+        fragment = None
+        fields = self.fields
+        head = ('', b'')
+        parent = self.parent
+        if parent is not None and parent.flat():
+            if parent.flat().keys().isdisjoint(fields):
+                head = parent.fragment(backend, reserved)
+            else:
+                # own fields override the parent, serialize all of them
+                fields = self.flat()
+        lazy = any(value.__class__ is Lazy for value in fields.values())
+        if head is not None and (fields or head[0]) and not lazy:
+            if reserved.isdisjoint(fields):
+                try:
+                    text = backend.dumps(fields)[1:-1]
+                except Exception:
+                    text = None
+                if text is not None:
+                    if text:
+                        text += backend.separator
+                    text = head[0] + text
+                    fragment = (text, text.encode('utf-8'))
+        self._fragments[key] = fragment
+        return fragment
+
+    def __getitem__(self, key: str) -> typing.Any:
+        return self.flat()[key]
+
+    def __setitem__(self, key: str, value: typing.Any) -> None:
+        self.fields[key] = value
+        Context._changes += 1
+
+    def __delitem__(self, key: str) -> None:
+        del self.fields[key]
+        Context._changes += 1
+
+    def __contains__(self, key) -> bool:
+        context = self
+        while context is not None:
+            if key in context.fields:
+                return True
+            context = context.parent
+        return False
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self.flat())
+
+    def __len__(self) -> int:
+        return len(self.flat())
+
+    def __repr__(self) -> str:
+        return '<%s %r>' % (self.__class__.__name__, self.flat())
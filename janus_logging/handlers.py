@@ -0,0 +1,830 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.handlers
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.handlers
+----------------------
+Logging handlers
+'''
+
+from __future__ import absolute_import
+
+import abc
+import codecs
+import collections
+import io
+import logging
+import os
+import sys
+import threading
+import time
+import typing
+
+from .compression import get_compression, make_compressor
+from .metrics import HandlerMetrics
+from .version import VERSION
+
+__all__ = [
+    'BufferedBytesHandler', 'FlushPolicy', 'JanusStreamHandler',
+    'ThreadedHandler', 'ThreadedFileHandler', 'ThreadedStreamHandler',
+]
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+class FlushPolicy(collections.namedtuple(
+        'FlushPolicy', ('records', 'interval', 'level')
+)):
+    '''
+    Flush policy of a handler - flush after `records` records (`0` never),
+    `interval` seconds after the first unflushed record (`None` never) and
+    always for records with `level` or above.
+    '''
+    __slots__ = ()
+
+    @classmethod
+    def per_record(cls) -> 'FlushPolicy':
+        '''
+        Flush after every record
+        '''
+        return cls(1, None, logging.ERROR)
+
+    @classmethod
+    def every(
+            cls,
+            records: int,
+            interval: typing.Optional[float]=None
+    ) -> 'FlushPolicy':
+        '''
+        Flush after every `records` records and optionally after `interval`
+        '''
+        return cls(records, interval, logging.ERROR)
+
+    @classmethod
+    def timed(cls, interval: float) -> 'FlushPolicy':
+        '''
+        Flush `interval` seconds after the first unflushed record
+        '''
+        return cls(0, interval, logging.ERROR)
+
+
+class JanusStreamHandler(HandlerMetrics, logging.StreamHandler):
+    '''
+    Stream handler, which can handle a batch of log records - all records
+    are formatted and written with a single `write` and `flush`.
+
+    If the formatter has `format_bytes` (e.g. `SyncJsonFormatter`) and the
+    stream is a UTF-8 text stream with a binary `buffer`, the bytes are
+    written directly into the buffer.
+
+    The stream is flushed according to the flush policy, by default after
+    every record. A timed flush is done by `flush_due`, which has to be
+    called periodically (see `JanusLogger`).
+    '''
+    def __init__(self, stream=None, flush_policy: FlushPolicy=None):
+        super(JanusStreamHandler, self).__init__(stream)
+        if flush_policy is None:
+            flush_policy = FlushPolicy.per_record()
+        self.flush_policy = flush_policy
+        self._buffer_of = (None, None)
+        self._pending = 0
+        self._deadline: typing.Optional[float] = None
+
+    @property
+    def flush_interval(self) -> typing.Optional[float]:
+        return self.flush_policy.interval
+
+    @property
+    def flush_deadline(self) -> typing.Optional[float]:
+        return self._deadline
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            super(JanusStreamHandler, self).flush()
+            if self._pending and self.metrics is not None:
+                self.metrics.flushed()
+            self._pending = 0
+            self._deadline = None
+        finally:
+            self.release()
+
+    def flush_due(self) -> None:
+        '''
+        Flush the stream, if the flush interval passed
+        '''
+        deadline = self._deadline
+        if deadline is not None and time.monotonic() >= deadline:
+            self.flush()
+
+    def written(self, count: int, level: int) -> None:
+        '''
+        Records are written to the stream - flush according to the policy
+        :param count: number of written records
+        :param level: highest level of the written records
+        '''
+        policy = self.flush_policy
+        self._pending += count
+        if level >= policy.level or (
+                policy.records and self._pending >= policy.records
+        ):
+            self.flush()
+        elif policy.interval is not None and self._deadline is None:
+            self._deadline = time.monotonic() + policy.interval
+
+    def get_buffer(self) -> typing.Optional[typing.BinaryIO]:
+        '''
+        Get the binary buffer of the stream, if the formatter produces bytes
+        :return: binary buffer or `None`
+        '''
+        if not hasattr(self.formatter, 'format_bytes'):
+            return None
+        stream = self.stream
+        if self._buffer_of[0] is not stream:
+            buffer = getattr(stream, 'buffer', None)
+            encoding = getattr(stream, 'encoding', None)
+            if buffer is not None and encoding is not None:
+                if codecs.lookup(encoding).name != 'utf-8':
+                    buffer = None
+            self._buffer_of = (stream, buffer)
+        return self._buffer_of[1]
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            buffer = self.get_buffer()
+            if buffer is None:
+                data = self.format(record) + self.terminator
+                self.stream.write(data)
+            else:
+                data = self.formatter.format_bytes(record)
+                data += self.terminator.encode('utf-8')
+                self.write_bytes(buffer, data)
+            if self.metrics is not None:
+                self.metrics.written(len(data))
+            self.written(1, record.levelno)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def write_bytes(self, buffer: typing.BinaryIO, data: bytes) -> None:
+        '''
+        Write bytes to the buffer of the stream
+        :param buffer: binary buffer of the stream
+        :param data: data to be written
+        '''
+        # pending text must be written first
+        if not self._pending:
+            self.stream.flush()
+        buffer.write(data)
+
+    def handle_batch(self, records: typing.List[logging.LogRecord]) -> None:
+        '''
+        Handle a batch of log records
+        :param records: log records
+        '''
+        records = [record for record in records if self.filter(record)]
+        if records:
+            self.acquire()
+            try:
+                self.emit_batch(records)
+            finally:
+                self.release()
+
+    def format_batch(self, records: typing.List[logging.LogRecord]) -> str:
+        '''
+        Format a batch of log records
+        :param records: log records
+        :return: joined log strings
+        '''
+        fmt = self.format
+        lines = []
+        for record in records:
+            try:
+                lines.append(fmt(record))
+            except RecursionError:
+                raise
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return ''
+        lines.append('')
+        return self.terminator.join(lines)
+
+    def format_batch_bytes(
+            self,
+            records: typing.List[logging.LogRecord]
+    ) -> bytes:
+        '''
+        Format a batch of log records to UTF-8 encoded bytes
+        :param records: log records
+        :return: joined log bytes
+        '''
+        fmt = self.formatter.format_bytes
+        lines = []
+        for record in records:
+            try:
+                lines.append(fmt(record))
+            except RecursionError:
+                raise
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return b''
+        lines.append(b'')
+        return self.terminator.encode('utf-8').join(lines)
+
+    def emit_batch(self, records: typing.List[logging.LogRecord]) -> None:
+        '''
+        Emit a batch of log records
+        :param records: log records
+        '''
+        try:
+            buffer = self.get_buffer()
+            if buffer is not None:
+                data = self.format_batch_bytes(records)
+                if data:
+                    self.write_bytes(buffer, data)
+            else:
+                data = self.format_batch(records)
+                if data:
+                    self.stream.write(data)
+            if data:
+                if self.metrics is not None:
+                    self.metrics.written(len(data))
+                self.written(
+                    len(records), max(record.levelno for record in records)
+                )
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(records[-1])
+
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class BufferedBytesHandler(HandlerMetrics, logging.Handler):
+    '''
+    Handler, which collects UTF-8 encoded log records in a reusable buffer
+    and writes them to the raw file descriptor of the stream, once
+    `buffer_size` bytes are collected or `flush_interval` seconds passed.
+    Streams without a file descriptor are written through their binary
+    buffer.
+    '''
+    terminator = b'\n'
+
+    def __init__(
+            self,
+            stream: typing.IO=None,
+            buffer_size: int=DEFAULT_BUFFER_SIZE,
+            flush_interval: float=DEFAULT_FLUSH_INTERVAL,
+            use_fd: bool=True,
+            flush_level: int=logging.ERROR
+    ):
+        '''
+        Constructor with stream and flush thresholds
+        :param stream: stream, default is `sys.stderr`
+        :param buffer_size: size in bytes of the buffer
+        :param flush_interval: maximal time in seconds a record is buffered
+        :param use_fd: write to the file descriptor of the stream
+        :param flush_level: records with this level or above are written
+            immediately
+        '''
+        super(BufferedBytesHandler, self).__init__()
+        if stream is None:
+            stream = sys.stderr
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self._buffer = bytearray()
+        self._deadline: typing.Optional[float] = None
+        self._fd: typing.Optional[int] = None
+        if use_fd:
+            try:
+                self._fd = stream.fileno()
+            except (AttributeError, OSError, ValueError):
+                pass
+        if isinstance(stream, io.TextIOBase):
+            self._target = getattr(stream, 'buffer', None)
+        else:
+            self._target = stream
+
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        '''
+        Format log record to UTF-8 encoded bytes
+        :param record: log record
+        :return: log bytes
+        '''
+        fmt = self.formatter
+        if hasattr(fmt, 'format_bytes'):
+            return fmt.format_bytes(record)
+        return self.format(record).encode('utf-8')
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buffer += self.format_bytes(record)
+            self._buffer += self.terminator
+            if record.levelno >= self.flush_level:
+                self._write()
+            else:
+                self.flush_due()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def handle_batch(self, records: typing.List[logging.LogRecord]) -> None:
+        '''
+        Handle a batch of log records
+        :param records: log records
+        '''
+        records = [record for record in records if self.filter(record)]
+        if not records:
+            return
+        self.acquire()
+        try:
+            buffer = self._buffer
+            terminator = self.terminator
+            level = 0
+            for record in records:
+                level = max(level, record.levelno)
+                try:
+                    buffer += self.format_bytes(record)
+                    buffer += terminator
+                except RecursionError:
+                    raise
+                except Exception:
+                    self.handleError(record)
+            try:
+                if level >= self.flush_level:
+                    self._write()
+                else:
+                    self.flush_due()
+            except Exception:
+                self.handleError(records[-1])
+        finally:
+            self.release()
+
+    @property
+    def flush_deadline(self) -> typing.Optional[float]:
+        return self._deadline
+
+    def flush_due(self) -> None:
+        '''
+        Write the buffer, if its size or age is over the thresholds
+        '''
+        self.acquire()
+        try:
+            if not self._buffer:
+                return
+            now = time.monotonic()
+            if self._deadline is None:
+                self._deadline = now + self.flush_interval
+            if len(self._buffer) >= self.buffer_size or now >= self._deadline:
+                self._write()
+        finally:
+            self.release()
+
+    def _write(self) -> None:
+        buffer = self._buffer
+        if not buffer:
+            return
+        self._deadline = None
+        if self.metrics is not None:
+            self.metrics.written(len(buffer))
+            self.metrics.flushed()
+        try:
+            if self._fd is not None:
+                # pending data of the stream must be written first
+                self.stream.flush()
+                with memoryview(buffer) as view:
+                    offset, size = 0, len(view)
+                    while offset < size:
+                        offset += os.write(self._fd, view[offset:])
+            elif self._target is not None:
+                self._target.write(buffer)
+                self._target.flush()
+            else:
+                self.stream.write(buffer.decode('utf-8'))
+                self.stream.flush()
+        finally:
+            del buffer[:]
+
+    def flush(self) -> None:
+        '''
+        Write the buffer
+        '''
+        self.acquire()
+        try:
+            self._write()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            super(BufferedBytesHandler, self).close()
+
+    def __repr__(self):
+        level = logging.getLevelName(self.level)
+        name = getattr(self.stream, 'name', '')
+        return '<%s %s(%s)>' % (self.__class__.__name__, name, level)
+
+
+DEFAULT_FILE_BUFFER_SIZE = 1024 * 1024
+
+
+class ThreadedHandler(HandlerMetrics, logging.Handler, abc.ABC):
+    '''
+    Handler with its own I/O thread - `emit` only hands the record over,
+    formatting and writing happen in the I/O thread. The thread is started
+    on the first record and stopped by `close`.
+
+    Subclasses implement `write`, `flush_stream` and `close_stream`, which
+    are called only in the I/O thread (or after it is stopped).
+    '''
+    def __init__(self, flush_policy: FlushPolicy=None):
+        '''
+        Constructor with flush policy
+        :param flush_policy: flush policy, default is a timed flush
+        '''
+        super(ThreadedHandler, self).__init__()
+        if flush_policy is None:
+            flush_policy = FlushPolicy.timed(DEFAULT_FLUSH_INTERVAL)
+        self.flush_policy = flush_policy
+        self._records = collections.deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._thread: typing.Optional[threading.Thread] = None
+        self._stopping = False
+        self._flush_waiters = []
+
+    def _put(self, records: typing.Iterable[logging.LogRecord]) -> None:
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='janus-logging-io-%s' % self.__class__.__name__,
+                    daemon=True
+                )
+                self._thread.start()
+            self._records.extend(records)
+            self._cond.notify()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._put((record,))
+
+    def handle_batch(self, records: typing.List[logging.LogRecord]) -> None:
+        '''
+        Handle a batch of log records
+        :param records: log records
+        '''
+        records = [record for record in records if self.filter(record)]
+        if records:
+            self._put(records)
+
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        '''
+        Format log record to UTF-8 encoded bytes
+        :param record: log record
+        :return: log bytes
+        '''
+        fmt = self.formatter
+        if hasattr(fmt, 'format_bytes'):
+            return fmt.format_bytes(record)
+        return self.format(record).encode('utf-8')
+
+    def _format(self, records: typing.List[logging.LogRecord]) -> bytes:
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format_bytes(record))
+            except RecursionError:
+                raise
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return b''
+        lines.append(b'')
+        return b'\n'.join(lines)
+
+    def _run(self) -> None:
+        policy = self.flush_policy
+        pending = 0
+        deadline = None
+        last = None
+        while True:
+            with self._cond:
+                while not any((
+                        self._records, self._stopping, self._flush_waiters
+                )):
+                    if deadline is None:
+                        self._cond.wait()
+                    else:
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        self._cond.wait(timeout)
+                records = list(self._records)
+                self._records.clear()
+                waiters, self._flush_waiters = self._flush_waiters, []
+                stopping = self._stopping
+            level = 0
+            if records:
+                last = records[-1]
+                level = max(record.levelno for record in records)
+                try:
+                    data = self._format(records)
+                    if data:
+                        self.write(data)
+                        if self.metrics is not None:
+                            self.metrics.written(len(data))
+                except Exception:
+                    self.handleError(last)
+                pending += len(records)
+                if deadline is None and policy.interval is not None:
+                    deadline = time.monotonic() + policy.interval
+            if pending and any((
+                    waiters,
+                    stopping,
+                    level >= policy.level,
+                    policy.records and pending >= policy.records,
+                    deadline is not None and time.monotonic() >= deadline
+            )):
+                try:
+                    self.flush_stream()
+                    if self.metrics is not None:
+                        self.metrics.flushed()
+                except Exception:
+                    self.handleError(last)
+                pending = 0
+                deadline = None
+            for waiter in waiters:
+                waiter.set()
+            if stopping:
+                break
+
+    def flush(self) -> None:
+        '''
+        Wait until all handed over records are written and flushed
+        '''
+        with self._cond:
+            if self._thread is None:
+                return
+            waiter = threading.Event()
+            self._flush_waiters.append(waiter)
+            self._cond.notify()
+        waiter.wait()
+
+    def close(self) -> None:
+        '''
+        Write all records, stop the I/O thread and close the stream
+        '''
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+        with self._cond:
+            self._thread = None
+            self._stopping = False
+        try:
+            self.close_stream()
+        finally:
+            super(ThreadedHandler, self).close()
+
+    @abc.abstractmethod
+    def write(self, data: bytes) -> None:
+        '''
+        Write data - in the I/O thread
+        :param data: data to be written
+        '''
+
+    @abc.abstractmethod
+    def flush_stream(self) -> None:
+        '''
+        Flush the stream - in the I/O thread
+        '''
+
+    @abc.abstractmethod
+    def close_stream(self) -> None:
+        '''
+        Close the stream - after the I/O thread is stopped
+        '''
+
+
+class ThreadedFileHandler(ThreadedHandler):
+    '''
+    File handler with its own I/O thread and a large write buffer. The file
+    is opened, written and rotated only in the I/O thread.
+
+    The file is rotated once it would exceed `max_bytes` or `interval`
+    seconds after it was opened. Rotated files are renamed to
+    `filename.1` ... `filename.<backup_count>`; without backups the file is
+    truncated.
+
+    With `compression` the file is compressed in the I/O thread, every flush
+    ends a compressed block and every file (or append) is a new gzip member
+    or zstd frame. `max_bytes` is the compressed size, it is checked before
+    compressing, so a file exceeds it by up to one flush.
+    '''
+    def __init__(
+            self,
+            filename: str,
+            mode: str='a',
+            buffer_size: int=DEFAULT_FILE_BUFFER_SIZE,
+            max_bytes: int=0,
+            backup_count: int=0,
+            interval: typing.Optional[float]=None,
+            flush_policy: FlushPolicy=None,
+            compression: typing.Optional[str]=None,
+            compression_level: typing.Optional[int]=None
+    ):
+        '''
+        Constructor with file name and rotation
+        :param filename: file name
+        :param mode: `a` - append or `w` - truncate
+        :param buffer_size: size in bytes of the write buffer
+        :param max_bytes: maximal size in bytes of a file, `0` - no limit
+        :param backup_count: number of rotated files to keep
+        :param interval: maximal age in seconds of a file, `None` - no limit
+        :param flush_policy: flush policy, default is a timed flush
+        :param compression: `gzip`, `zstd` or `None` - no compression
+        :param compression_level: compression level, default of the
+            compression
+        '''
+        if compression is not None:
+            get_compression(compression)
+        super(ThreadedFileHandler, self).__init__(flush_policy=flush_policy)
+        self.baseFilename = os.path.abspath(os.fspath(filename))
+        self.mode = mode
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.interval = interval
+        self.compression = compression
+        self.compression_level = compression_level
+        self._stream: typing.Optional[typing.BinaryIO] = None
+        self._compressor = None
+        self._size = 0
+        self._rollover_at: typing.Optional[float] = None
+
+    def _open(self, mode: str) -> None:
+        self._stream = open(
+            self.baseFilename, mode + 'b', buffering=self.buffer_size
+        )
+        self._size = self._stream.seek(0, os.SEEK_END)
+        self._compressor = make_compressor(
+            self.compression, self.compression_level
+        )
+        if self.interval is not None:
+            self._rollover_at = time.time() + self.interval
+
+    def should_rollover(self, size: int) -> bool:
+        '''
+        Check whether the file has to be rotated before writing
+        :param size: size in bytes of the data to be written
+        :return: `True` if the file has to be rotated
+        '''
+        if self.max_bytes > 0 and self._size > 0:
+            if self._size + size > self.max_bytes:
+                return True
+        if self._rollover_at is not None and time.time() >= self._rollover_at:
+            return True
+        return False
+
+    def rollover(self) -> None:
+        '''
+        Rotate the file - in the I/O thread
+        '''
+        self.close_stream()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = '%s.%d' % (self.baseFilename, i)
+                if os.path.exists(src):
+                    os.replace(src, '%s.%d' % (self.baseFilename, i + 1))
+            if os.path.exists(self.baseFilename):
+                os.replace(self.baseFilename, self.baseFilename + '.1')
+            self._open('a')
+        else:
+            self._open('w')
+
+    def write(self, data: bytes) -> None:
+        if self._stream is None:
+            self._open(self.mode)
+        if self.should_rollover(0 if self._compressor else len(data)):
+            self.rollover()
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        self._stream.write(data)
+        self._size += len(data)
+
+    def flush_stream(self) -> None:
+        if self._stream is not None:
+            if self._compressor is not None:
+                data = self._compressor.flush()
+                self._stream.write(data)
+                self._size += len(data)
+            self._stream.flush()
+
+    def close_stream(self) -> None:
+        stream, self._stream = self._stream, None
+        compressor, self._compressor = self._compressor, None
+        if stream is not None:
+            try:
+                if compressor is not None:
+                    stream.write(compressor.finish())
+                stream.flush()
+            finally:
+                stream.close()
+            # reopen in append mode, if used again
+            self.mode = 'a'
+
+    def __repr__(self):
+        level = logging.getLevelName(self.level)
+        return '<%s %s (%s)>' % (
+            self.__class__.__name__, self.baseFilename, level
+        )
+
+
+class ThreadedStreamHandler(ThreadedHandler):
+    '''
+    Stream handler with its own I/O thread, which writes UTF-8 encoded
+    records to the binary buffer of the stream - optionally compressed in
+    the I/O thread, every flush ends a compressed block. A text stream
+    without buffer (e.g. `io.StringIO`) gets text and no compression.
+    '''
+    def __init__(
+            self,
+            stream: typing.IO=None,
+            compression: typing.Optional[str]=None,
+            compression_level: typing.Optional[int]=None,
+            flush_policy: FlushPolicy=None
+    ):
+        '''
+        Constructor with stream and compression
+        :param stream: stream, default is `sys.stderr`
+        :param compression: `gzip`, `zstd` or `None` - no compression
+        :param compression_level: compression level, default of the
+            compression
+        :param flush_policy: flush policy, default is a timed flush
+        '''
+        if compression is not None:
+            get_compression(compression)
+        super(ThreadedStreamHandler, self).__init__(flush_policy=flush_policy)
+        if stream is None:
+            stream = sys.stderr
+        self.stream = stream
+        self.compression = compression
+        self.compression_level = compression_level
+        self._compressor = None
+        if isinstance(stream, io.TextIOBase):
+            # `None` - text is written to the stream
+            self._target = getattr(stream, 'buffer', None)
+            if self._target is None and compression is not None:
+                raise ValueError('compression needs a binary stream')
+        else:
+            self._target = stream
+
+    def write(self, data: bytes) -> None:
+        if self.compression is not None:
+            if self._compressor is None:
+                self._compressor = make_compressor(
+                    self.compression, self.compression_level
+                )
+            data = self._compressor.compress(data)
+        if not data:
+            return
+        if self._target is None:
+            self.stream.write(data.decode('utf-8'))
+        else:
+            self._target.write(data)
+
+    def flush_stream(self) -> None:
+        if self._compressor is not None:
+            self._target.write(self._compressor.flush())
+        if self._target is None:
+            self.stream.flush()
+        else:
+            self._target.flush()
+
+    def close_stream(self) -> None:
+        # the stream is not closed, a later record starts a new member
+        compressor, self._compressor = self._compressor, None
+        if compressor is not None:
+            self._target.write(compressor.finish())
+        self.flush_stream()
+
+    def __repr__(self):
+        level = logging.getLevelName(self.level)
+        name = getattr(self.stream, 'name', '')
+        return '<%s %s(%s)>' % (self.__class__.__name__, name, level)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.lazy
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.lazy
+------------------
+Deferred evaluation of log messages and extra fields - values are evaluated
+when a log record is formatted, i.e. in the writer or executor thread, and
+never for records, which are filtered out.
+
+    log.info(Lazy(lambda: 'state: %r' % big_object))
+    log.info('request', extra=dict(stats=Lazy(compute_stats, request)))
+'''
+
+from __future__ import absolute_import
+
+import collections.abc
+import typing
+
+from .version import VERSION
+
+__all__ = ['DeferredExtra', 'Lazy', 'resolve', 'resolve_args']
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+_UNSET = object()
+
+
+class Lazy(object):
+    '''
+    Value, which is computed on first use and then cached
+    '''
+    __slots__ = ('_func', '_args', '_kwargs', '_value')
+
+    def __init__(self, func: typing.Callable, *args, **kwargs):
+        '''
+        Constructor with function and its arguments
+        :param func: function computing the value
+        '''
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._value = _UNSET
+
+    def value(self) -> typing.Any:
+        '''
+        Get the value, compute it on first use
+        :return: value
+        '''
+        value = self._value
+        if value is _UNSET:
+            value = self._value = self._func(*self._args, **self._kwargs)
+        return value
+
+    def __str__(self) -> str:
+        return str(self.value())
+
+    def __repr__(self) -> str:
+        if self._value is _UNSET:
+            return '<%s %r>' % (self.__class__.__name__, self._func)
+        return repr(self._value)
+
+
+def resolve(details: typing.Dict) -> typing.Dict:
+    '''
+    Evaluate lazy values of a dictionary in place
+    :param details: dictionary
+    :return: the same dictionary
+    '''
+    for key, value in details.items():
+        if value.__class__ is Lazy:
+            details[key] = value.value()
+    return details
+
+
+def resolve_args(args: typing.Any) -> typing.Any:
+    '''
+    Evaluate lazy values of message arguments (a tuple or a mapping), so
+    every conversion of `msg % args` (e.g. `%r`, `%d`) sees the value
+    :param args: arguments of a log record
+    :return: the same arguments or a copy with the values
+    '''
+    if args.__class__ is tuple:
+        if any(arg.__class__ is Lazy for arg in args):
+            return tuple(
+                arg.value() if arg.__class__ is Lazy else arg for arg in args
+            )
+    elif isinstance(args, collections.abc.Mapping):
+        if any(value.__class__ is Lazy for value in args.values()):
+            return resolve(dict(args))
+    return args
+
+
+class DeferredExtra(collections.abc.Mapping):
+    '''
+    Extra fields of an adapter and of a log call, merged when the log record
+    is made - keys of the call override the keys of the adapter in their
+    position, like `{**base, **extra}`.
+    '''
+    __slots__ = ('base', 'extra')
+
+    def __init__(self, base: typing.Mapping, extra: typing.Mapping):
+        '''
+        Constructor with extra fields of the adapter and of the call
+        :param base: extra fields of the adapter
+        :param extra: extra fields of the call
+        '''
+        self.base = base
+        self.extra = extra
+
+    def __getitem__(self, key: str) -> typing.Any:
+        try:
+            return self.extra[key]
+        except KeyError:
+            return self.base[key]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        base = self.base
+        yield from base
+        for key in self.extra:
+            if key not in base:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.metrics
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.metrics
+---------------------
+Metrics of the logging pipeline - records per level, pending async log
+calls, enqueue-to-write latency, bytes written, flushes and handler errors.
+Every thread counts into its own counters, they are aggregated on read and
+folded into a shared total, when the thread ends.
+'''
+
+from __future__ import absolute_import
+
+import bisect
+import http.server
+import logging
+import threading
+import typing
+import weakref
+
+from .version import VERSION
+
+__all__ = [
+    'LATENCY_BUCKETS', 'HandlerMetrics', 'Metrics', 'MetricsServer',
+    'to_prometheus'
+]
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+# upper bounds in seconds of the latency histogram
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class _Counters(object):
+    '''
+    Counters of one thread
+    '''
+    __slots__ = (
+        'records', 'submitted', 'completed', 'buckets', 'latency_sum',
+        'bytes', 'flushes', 'errors'
+    )
+
+    def __init__(self, buckets: int):
+        self.records = {}
+        self.submitted = 0
+        self.completed = 0
+        self.buckets = [0] * (buckets + 1)
+        self.latency_sum = 0.0
+        self.bytes = 0
+        self.flushes = 0
+        self.errors = 0
+
+    def add(self, other: '_Counters') -> None:
+        '''
+        Add the counters of another thread
+        :param other: counters
+        '''
+        records = self.records
+        for level, count in dict(other.records).items():
+            records[level] = records.get(level, 0) + count
+        buckets = self.buckets
+        for i, count in enumerate(list(other.buckets)):
+            buckets[i] += count
+        self.submitted += other.submitted
+        self.completed += other.completed
+        self.latency_sum += other.latency_sum
+        self.bytes += other.bytes
+        self.flushes += other.flushes
+        self.errors += other.errors
+
+
+class _Owner(object):
+    '''
+    Thread-local owner of counters - it is dropped, when the thread ends
+    '''
+    __slots__ = ('counters', '__weakref__')
+
+    def __init__(self, counters: _Counters):
+        self.counters = counters
+
+
+def _fold(ref: weakref.ref, counters: _Counters) -> None:
+    metrics = ref()
+    if metrics is not None:
+        metrics._fold(counters)
+
+
+class Metrics(object):
+    '''
+    Metrics of a logger. It is a logging filter, which counts the records
+    per level, and it is told by the adapters and handlers about the other
+    events.
+    '''
+    def __init__(self, buckets: typing.Sequence[float]=LATENCY_BUCKETS):
+        '''
+        Constructor with the bounds of the latency histogram
+        :param buckets: sorted upper bounds in seconds
+        '''
+        self.bounds = tuple(buckets)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # counters of live threads and the total of ended threads
+        self._all = set()
+        self._total = _Counters(len(self.bounds))
+
+    def _counters(self) -> _Counters:
+        try:
+            return self._local.owner.counters
+        except AttributeError:
+            counters = _Counters(len(self.bounds))
+            owner = self._local.owner = _Owner(counters)
+            with self._lock:
+                self._all.add(counters)
+            weakref.finalize(owner, _fold, weakref.ref(self), counters)
+            return counters
+
+    def _fold(self, counters: _Counters) -> None:
+        '''
+        Fold the counters of an ended thread into the total
+        :param counters: counters of the thread
+        '''
+        with self._lock:
+            self._all.discard(counters)
+            self._total.add(counters)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        '''
+        Count a record passed to the handlers
+        :param record: log record
+        :return: always `True`
+        '''
+        records = self._counters().records
+        level = record.levelno
+        records[level] = records.get(level, 0) + 1
+        return True
+
+    def submitted(self, count: int=1) -> None:
+        '''
+        Async log calls are handed over to the executor or the queue
+        :param count: number of log calls
+        '''
+        self._counters().submitted += count
+
+    def completed(self, latencies: typing.Iterable[float]) -> None:
+        '''
+        Async log calls are written
+        :param latencies: seconds from the log call to the write per call
+        '''
+        counters = self._counters()
+        buckets = counters.buckets
+        bounds = self.bounds
+        total = 0.0
+        count = 0
+        for latency in latencies:
+            buckets[bisect.bisect_left(bounds, latency)] += 1
+            total += latency
+            count += 1
+        counters.completed += count
+        counters.latency_sum += total
+
+    def written(self, size: int) -> None:
+        '''
+        A handler wrote data
+        :param size: size of the data, bytes or characters of text streams
+        '''
+        self._counters().bytes += size
+
+    def flushed(self) -> None:
+        '''
+        A handler flushed its stream or buffer
+        '''
+        self._counters().flushes += 1
+
+    def error(self) -> None:
+        '''
+        A handler failed to handle a record
+        '''
+        self._counters().errors += 1
+
+    def snapshot(self) -> typing.Dict:
+        '''
+        Aggregate the counters of all threads
+        :return: dictionary with `records` per level name, `submitted`,
+            `completed`, `latency` histogram (cumulative `buckets` as list
+            of upper bound and count, `count` and `sum`), `bytes`, `flushes`
+            and `errors`
+        '''
+        total = _Counters(len(self.bounds))
+        with self._lock:
+            total.add(self._total)
+            for counters in self._all:
+                total.add(counters)
+        res = dict(
+            submitted=total.submitted,
+            completed=total.completed,
+            bytes=total.bytes,
+            flushes=total.flushes,
+            errors=total.errors
+        )
+        cumulative = []
+        count = 0
+        for bound, value in zip(self.bounds + (float('inf'),), total.buckets):
+            count += value
+            cumulative.append((bound, count))
+        res['records'] = {
+            logging.getLevelName(level): count
+            for level, count in sorted(total.records.items())
+        }
+        res['latency'] = dict(
+            buckets=cumulative, count=count, sum=total.latency_sum
+        )
+        return res
+
+
+class HandlerMetrics(object):
+    '''
+    Mixin of handlers, which report to the metrics of a `JanusLogger` - the
+    logger sets `metrics` of its handlers
+    '''
+    metrics: typing.Optional[Metrics] = None
+
+    def handleError(self, record: logging.LogRecord) -> None:
+        if self.metrics is not None:
+            self.metrics.error()
+        super(HandlerMetrics, self).handleError(record)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace(
+        '"', r'\"'
+    )
+
+
+def _labels(labels: typing.Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (key, _escape(value)) for key, value in labels.items()
+    )
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def to_prometheus(
+        snapshot: typing.Dict,
+        prefix: str='janus_logging',
+        labels: typing.Optional[typing.Dict[str, str]]=None
+) -> str:
+    '''
+    Format a metrics snapshot in the Prometheus text format
+    :param snapshot: metrics snapshot, see `JanusLogger.metrics`
+    :param prefix: prefix of the metric names
+    :param labels: labels of all metrics, e.g. the logger name
+    :return: text
+    '''
+    labels = dict(labels or {})
+    lines = []
+
+    def _metric(name, kind, help_text, samples):
+        name = '%s_%s' % (prefix, name)
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s %s' % (name, kind))
+        for suffix, extra, value in samples:
+            lines.append('%s%s%s %s' % (
+                name, suffix, _labels({**labels, **extra}),
+                _format_value(value)
+            ))
+
+    _metric(
+        'records_total', 'counter', 'Log records passed to the handlers.',
+        [('', {'level': level}, count)
+         for level, count in snapshot['records'].items()]
+    )
+    _metric(
+        'dropped_total', 'counter',
+        'Log records dropped by the overflow policy.',
+        [('', {'level': level}, count)
+         for level, count in snapshot.get('dropped', {}).items()]
+    )
+    _metric(
+        'pending', 'gauge', 'Async log calls not written yet.',
+        [('', {}, snapshot.get('pending', 0))]
+    )
+    _metric(
+        'queue_depth', 'gauge', 'Log records in the queue.',
+        [('', {}, snapshot.get('queue_depth', 0))]
+    )
+    latency = snapshot['latency']
+    _metric(
+        'latency_seconds', 'histogram',
+        'Latency from async log calls to the write.',
+        [('_bucket', {'le': _format_value(float(bound))}, count)
+         for bound, count in latency['buckets']] + [
+            ('_sum', {}, latency['sum']), ('_count', {}, latency['count'])
+        ]
+    )
+    _metric(
+        'written_bytes_total', 'counter',
+        'Data written by the handlers (characters for text streams).',
+        [('', {}, snapshot['bytes'])]
+    )
+    _metric(
+        'flushes_total', 'counter', 'Flushes of the handlers.',
+        [('', {}, snapshot['flushes'])]
+    )
+    _metric(
+        'handler_errors_total', 'counter', 'Errors of the handlers.',
+        [('', {}, snapshot['errors'])]
+    )
+    lines.append('')
+    return '\n'.join(lines)
+
+
+class MetricsServer(object):
+    '''
+    Local HTTP endpoint serving metrics in the Prometheus text format at
+    `/metrics`, in its own thread
+    '''
+    def __init__(
+            self,
+            render: typing.Callable[[], str],
+            host: str='127.0.0.1',
+            port: int=0
+    ):
+        '''
+        Constructor with render function and address
+        :param render: function returning the metrics as text
+        :param host: host to listen on
+        :param port: port to listen on, `0` - any free port
+        '''
+        class _Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa N802
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                data = render().encode('utf-8')
+                self.send_response(200)
+                self.send_header(
+                    'Content-Type', 'text/plain; version=0.0.4; charset=utf-8'
+                )
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):  # @UnusedVariable
+                pass
+
+        self._server = http.server.HTTPServer((host, port), _Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name='janus-logging-metrics',
+            daemon=True
+        )
+
+    @property
+    def address(self) -> typing.Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        '''
+        Stop serving and close the socket
+        '''
+        if self._thread.is_alive():
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.network
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.network
+---------------------
+Batched socket sink for log collectors (e.g. Fluent Bit or Vector) - records
+are formatted in the writer or executor thread and sent as newline-delimited
+Json by a task of the event loop over one persistent TCP or Unix socket
+connection.
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import collections
+import logging
+import threading
+import typing
+
+from .handlers import DEFAULT_BUFFER_SIZE, DEFAULT_FLUSH_INTERVAL
+from .metrics import HandlerMetrics
+from .version import VERSION
+
+__all__ = ['AsyncSocketHandler']
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+DEFAULT_MAX_BUFFER = 8 * 1024 * 1024
+DEFAULT_BACKOFF = (0.1, 30.0)
+DEFAULT_CLOSE_TIMEOUT = 5.0
+
+
+class AsyncSocketHandler(HandlerMetrics, logging.Handler):
+    '''
+    Handler, which sends records in batches to a TCP (`host` and `port`) or
+    Unix socket (`path`) from the event loop.
+
+    A batch is sent once `buffer_size` bytes are collected, `flush_interval`
+    seconds after its first record or at once for records with
+    `flush_level` or above. The connection is kept open and re-established
+    with an exponential backoff. While disconnected, the records are kept up
+    to `max_buffer` bytes, the oldest records beyond are dropped and counted
+    in `dropped`. A batch, which failed, is sent again after reconnecting.
+    '''
+    terminator = b'\n'
+
+    def __init__(
+            self,
+            loop: asyncio.AbstractEventLoop,
+            host: typing.Optional[str]=None,
+            port: typing.Optional[int]=None,
+            path: typing.Optional[str]=None,
+            buffer_size: int=DEFAULT_BUFFER_SIZE,
+            flush_interval: float=DEFAULT_FLUSH_INTERVAL,
+            flush_level: int=logging.ERROR,
+            max_buffer: int=DEFAULT_MAX_BUFFER,
+            backoff: typing.Tuple[float, float]=DEFAULT_BACKOFF,
+            connect_timeout: float=5.0,
+            close_timeout: float=DEFAULT_CLOSE_TIMEOUT
+    ):
+        '''
+        Constructor with event loop and address
+        :param loop: event loop, which runs the connection
+        :param host: host of a TCP collector
+        :param port: port of a TCP collector
+        :param path: path of the Unix socket of a collector
+        :param buffer_size: size in bytes of a batch
+        :param flush_interval: maximal time in seconds a record is buffered
+            while connected
+        :param flush_level: records with this level or above are sent
+            immediately
+        :param max_buffer: maximal size in bytes of the buffered records
+        :param backoff: first and maximal delay in seconds between
+            connection attempts
+        :param connect_timeout: timeout in seconds of a connection attempt
+        :param close_timeout: maximal time in seconds `close` waits for
+            buffered records to be sent
+        '''
+        if (path is None) == (host is None):
+            raise ValueError('either host and port or path is required')
+        super(AsyncSocketHandler, self).__init__()
+        self.loop = loop
+        self.host = host
+        self.port = port
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self.max_buffer = max_buffer
+        self.backoff = backoff
+        self.connect_timeout = connect_timeout
+        self.close_timeout = close_timeout
+        self.dropped = 0
+        self.connected = False
+        # buffered chunks - (data, number of records)
+        self._chunks = collections.deque()
+        self._size = 0
+        self._mutex = threading.Lock()
+        self._urgent = False
+        self._closing = False
+        self._task: typing.Optional[asyncio.Task] = None
+        self._event: typing.Optional[asyncio.Event] = None
+        self._loop_thread: typing.Optional[int] = None
+        self._writer: typing.Optional[asyncio.StreamWriter] = None
+        self._watcher: typing.Optional[asyncio.Task] = None
+
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        '''
+        Format log record to UTF-8 encoded bytes
+        :param record: log record
+        :return: log bytes
+        '''
+        fmt = self.formatter
+        if hasattr(fmt, 'format_bytes'):
+            return fmt.format_bytes(record)
+        return self.format(record).encode('utf-8')
+
+    def _put(self, data: bytes, count: int, level: int) -> None:
+        '''
+        Buffer records and wake up the task of the loop, if needed - in any
+        thread
+        '''
+        with self._mutex:
+            if self._closing:
+                self.dropped += count
+                return
+            chunks = self._chunks
+            wakeup = not chunks
+            chunks.append((data, count))
+            self._size += len(data)
+            while self._size > self.max_buffer and len(chunks) > 1:
+                old, old_count = chunks.popleft()
+                self._size -= len(old)
+                self.dropped += old_count
+            if not self._urgent and any((
+                    self._size >= self.buffer_size, level >= self.flush_level
+            )):
+                self._urgent = wakeup = True
+        if wakeup and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._wakeup)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._put(
+                self.format_bytes(record) + self.terminator, 1,
+                record.levelno
+            )
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def handle_batch(self, records: typing.List[logging.LogRecord]) -> None:
+        '''
+        Handle a batch of log records
+        :param records: log records
+        '''
+        lines = []
+        level = 0
+        for record in records:
+            if self.filter(record):
+                try:
+                    lines.append(self.format_bytes(record))
+                except RecursionError:
+                    raise
+                except Exception:
+                    self.handleError(record)
+                else:
+                    level = max(level, record.levelno)
+        if lines:
+            lines.append(b'')
+            self._put(self.terminator.join(lines), len(lines) - 1, level)
+
+    def _wakeup(self) -> None:
+        '''
+        Start the task or wake it up - in the event loop
+        '''
+        if self._task is None or self._task.done():
+            self._loop_thread = threading.get_ident()
+            self._event = asyncio.Event()
+            self._task = self.loop.create_task(self._run())
+        self._event.set()
+
+    def _take(self) -> typing.List[typing.Tuple[bytes, int]]:
+        with self._mutex:
+            batch = list(self._chunks)
+            self._chunks.clear()
+            self._size = 0
+            self._urgent = False
+        return batch
+
+    def _restore(self, batch: typing.List[typing.Tuple[bytes, int]]) -> None:
+        '''
+        Put a failed batch back in front of the buffer, within `max_buffer`
+        '''
+        with self._mutex:
+            chunks = self._chunks
+            for data, count in reversed(batch):
+                if self._size + len(data) > self.max_buffer:
+                    self.dropped += count
+                    continue
+                chunks.appendleft((data, count))
+                self._size += len(data)
+
+    async def _connect(self) -> typing.Tuple:
+        if self.path is not None:
+            connect = asyncio.open_unix_connection(self.path)
+        else:
+            connect = asyncio.open_connection(self.host, self.port)
+        return await asyncio.wait_for(connect, self.connect_timeout)
+
+    async def _wait(self, timeout: typing.Optional[float]) -> None:
+        event = self._event
+        event.clear()
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _watch(self, reader: asyncio.StreamReader) -> None:
+        '''
+        Discard data of the collector until it closes the connection
+        '''
+        try:
+            while await reader.read(DEFAULT_BUFFER_SIZE):
+                pass
+        except OSError:
+            pass
+        self.connected = False
+        self._event.set()
+
+    def _disconnect(self) -> None:
+        self.connected = False
+        writer, self._writer = self._writer, None
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.cancel()
+        if writer is not None:
+            writer.close()
+
+    async def _run(self) -> None:
+        '''
+        Connect and send batches until the handler is closed
+        '''
+        delay = self.backoff[0]
+        try:
+            while True:
+                if not self._chunks:
+                    if self._closing:
+                        break
+                    await self._wait(None)
+                    continue
+                if not any((self._urgent, self._closing)):
+                    await self._wait(self.flush_interval)
+                if self._writer is not None and not self.connected:
+                    # closed by the collector
+                    self._disconnect()
+                if self._writer is None:
+                    try:
+                        reader, self._writer = await self._connect()
+                    except (OSError, asyncio.TimeoutError):
+                        if self._closing:
+                            break
+                        await asyncio.sleep(delay)
+                        delay = min(delay * 2, self.backoff[1])
+                        continue
+                    self.connected = True
+                    self._watcher = self.loop.create_task(self._watch(reader))
+                    delay = self.backoff[0]
+                batch = self._take()
+                data = b''.join(chunk for chunk, _ in batch)
+                try:
+                    self._writer.write(data)
+                    await self._writer.drain()
+                except OSError:
+                    if self.metrics is not None:
+                        self.metrics.error()
+                    self._restore(batch)
+                    self._disconnect()
+                    continue
+                if self.metrics is not None:
+                    self.metrics.written(len(data))
+                    self.metrics.flushed()
+        finally:
+            self._disconnect()
+            with self._mutex:
+                self.dropped += sum(count for _, count in self._chunks)
+                self._chunks.clear()
+                self._size = 0
+
+    def flush(self) -> None:
+        '''
+        Send the buffered records without waiting for the flush interval -
+        it does not wait until they are sent
+        '''
+        with self._mutex:
+            wakeup = bool(self._chunks) and not self._urgent
+            self._urgent = True
+        if wakeup and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._wakeup)
+
+    async def _close(self) -> None:
+        self._wakeup()
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(self._task), self.close_timeout
+            )
+        except asyncio.TimeoutError:
+            self._task.cancel()
+
+    def close(self) -> None:
+        '''
+        Send the buffered records and close the connection - waits up to
+        `close_timeout` seconds, unless it is called in the event loop
+        '''
+        with self._mutex:
+            closing, self._closing = self._closing, True
+        task = self._task
+        loop = self.loop
+        if not closing and task is not None and not task.done():
+            if loop.is_closed():
+                pass
+            elif not loop.is_running():
+                loop.run_until_complete(self._close())
+            elif self._loop_thread == threading.get_ident():
+                self._event.set()
+            else:
+                asyncio.run_coroutine_threadsafe(self._close(), loop).result()
+        super(AsyncSocketHandler, self).close()
+
+    def __repr__(self):
+        level = logging.getLevelName(self.level)
+        if self.path is not None:
+            address = self.path
+        else:
+            address = '%s:%s' % (self.host, self.port)
+        return '<%s %s (%s)>' % (self.__class__.__name__, address, level)
@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.queue
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.queue
+-------------------
+Bounded sync/async queue and the writer thread draining it
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import collections
+import functools
+import itertools
+import logging
+import sys
+import threading
+import traceback
+import typing
+
+from .version import VERSION
+
+__all__ = [
+    'OVERFLOW_POLICIES', 'JanusQueue', 'QueueBatcher', 'QueueWriter',
+    'Sequencer'
+]
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+DEFAULT_QUEUE_SIZE = 10000
+OVERFLOW_POLICIES = ('block', 'drop_newest', 'drop_oldest', 'drop_below')
+
+
+def _wakeup(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class JanusQueue(object):
+    '''
+    Bounded queue with an async side (producers in the event loop) and a
+    sync side (a consumer thread). Items are tuples with the log level
+    first, dropped items are counted per level in `dropped`.
+    '''
+    def __init__(
+            self,
+            maxsize: int=DEFAULT_QUEUE_SIZE,
+            loop: asyncio.AbstractEventLoop=None,
+            overflow: str='block',
+            overflow_level: int=logging.WARNING,
+            max_waiting: typing.Optional[int]=None
+    ):
+        '''
+        Constructor with queue size, loop and overflow policy
+        :param maxsize: maximal number of items in the queue
+        :param loop: event loop of the producers
+        :param overflow: policy if the queue is full - `block` waits for a
+            free slot, `drop_newest` drops the new item, `drop_oldest` drops
+            the oldest item in the queue, `drop_below` drops the new item if
+            its level is below `overflow_level`, otherwise waits
+        :param overflow_level: level threshold of `drop_below`
+        :param max_waiting: maximal number of waiting items, further puts
+            wait only if they are awaited (see `put_later`), `None` -
+            unbounded
+        '''
+        if maxsize <= 0:
+            raise ValueError('maxsize must be positive')
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError('unknown overflow policy: %s' % overflow)
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        self.maxsize = maxsize
+        self._loop = loop
+        self._items = collections.deque()
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._putters = collections.deque()
+        self._closed = False
+        self.overflow = overflow
+        self.overflow_level = overflow_level
+        self.max_waiting = sys.maxsize if max_waiting is None else max_waiting
+        self.dropped = collections.Counter()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def full(self, pending: int=0) -> bool:
+        '''
+        Check if the queue is full
+        :param pending: number of items, which the caller adds later
+        :return: `True` if an item has to wait or is dropped
+        '''
+        return len(self._items) + pending >= self.maxsize or bool(self._putters)  # noqa E501
+
+    def put_nowait(self, item) -> bool:
+        '''
+        Put an item without waiting, a full queue applies the overflow
+        policy
+        :param item: item to be put
+        :return: `True` if the item was put or dropped, `False` if the
+            caller has to wait for a free slot
+        '''
+        with self._mutex:
+            items = self._items
+            if len(items) >= self.maxsize or self._putters:
+                overflow = self.overflow
+                if overflow == 'drop_oldest':
+                    self.dropped[items.popleft()[0]] += 1
+                elif overflow == 'block':
+                    return False
+                elif overflow == 'drop_below':
+                    if item[0] >= self.overflow_level:
+                        return False
+                    self.dropped[item[0]] += 1
+                    return True
+                else:
+                    self.dropped[item[0]] += 1
+                    return True
+            items.append(item)
+            if len(items) == 1:
+                self._not_empty.notify()
+        return True
+
+    def put_many_nowait(self, items: typing.List) -> None:
+        '''
+        Put all items at once without waiting, the size of the queue is not
+        checked - the caller is responsible to check `full()` before
+        :param items: items to be put
+        '''
+        with self._mutex:
+            was_empty = not self._items
+            self._items.extend(items)
+            if was_empty:
+                self._not_empty.notify()
+
+    def put_later(self, item, wait: bool=True) -> typing.Awaitable:
+        '''
+        Put an item into a free slot or take a place in the line of waiting
+        items now - waiting items are moved into the queue by the consumer
+        in the order of the calls, so later items never overtake them.
+        Beyond `max_waiting` waiting items, a put with `wait` takes its place
+        in the line, when it is awaited (it is dropped and counted, if it is
+        never awaited), a put without `wait` is dropped and counted - e.g.
+        of fire-and-forget log calls, which are not slowed down.
+        :param item: item to be put
+        :param wait: if `True`, the caller may await the result
+        :return: awaitable, which is done once the item is in the queue or
+            dropped
+        '''
+        with self._mutex:
+            items = self._items
+            putters = self._putters
+            if len(items) < self.maxsize and not putters:
+                items.append(item)
+                if len(items) == 1:
+                    self._not_empty.notify()
+                fut = self._loop.create_future()
+                fut.set_result(None)
+                return fut
+            if len(putters) < self.max_waiting:
+                fut = self._loop.create_future()
+                putters.append((item, fut))
+                return fut
+            if not wait:
+                self.dropped[item[0]] += 1
+                fut = self._loop.create_future()
+                fut.set_result(None)
+                return fut
+        return _LatePut(self, item)
+
+    def _put_waiting(self, item) -> asyncio.Future:
+        '''
+        Put an item into a free slot or take a place in the line of waiting
+        items, regardless of `max_waiting`
+        :param item: item to be put
+        :return: future, which is done once the item is in the queue
+        '''
+        fut = self._loop.create_future()
+        with self._mutex:
+            items = self._items
+            if len(items) < self.maxsize and not self._putters:
+                items.append(item)
+                if len(items) == 1:
+                    self._not_empty.notify()
+                fut.set_result(None)
+            else:
+                self._putters.append((item, fut))
+        return fut
+
+    def _drop(self, item) -> None:
+        with self._mutex:
+            self.dropped[item[0]] += 1
+
+    async def put(self, item) -> None:
+        '''
+        Put an item, wait until a free slot is available (see `put_later`)
+        :param item: item to be put
+        '''
+        await self._put_waiting(item)
+
+    def get_batch(
+            self,
+            max_items: int,
+            timeout: typing.Optional[float]=None
+    ) -> typing.List:
+        '''
+        Get up to `max_items` items, block until at least one is available
+        :param max_items: maximal number of items to get
+        :param timeout: maximal time in seconds to wait for an item
+        :return: list of items, empty on timeout or if the queue is closed
+        '''
+        with self._not_empty:
+            items = self._items
+            if not items and not self._closed:
+                self._not_empty.wait(timeout)
+            n = min(len(items), max_items)
+            batch = [items.popleft() for _ in range(n)]
+            putters = self._putters
+            waiters = []
+            while putters and len(items) < self.maxsize:
+                item, fut = putters.popleft()
+                items.append(item)
+                waiters.append(fut)
+        for fut in waiters:
+            self._loop.call_soon_threadsafe(_wakeup, fut)
+        return batch
+
+    def close(self) -> None:
+        '''
+        Close the queue - wake up the consumer
+        '''
+        with self._not_empty:
+            self._closed = True
+            self._not_empty.notify_all()
+
+
+class _LatePut(object):
+    '''
+    Put beyond the line of waiting items - the item takes its place in the
+    line, when the put is awaited, a put, which is never awaited, is dropped
+    and counted
+    '''
+    __slots__ = ('_queue', '_item')
+
+    def __init__(self, queue: JanusQueue, item):
+        self._queue = queue
+        self._item = item
+
+    def __await__(self):
+        queue, self._queue = self._queue, None
+        if queue is None:
+            raise RuntimeError('put is already awaited')
+        return queue._put_waiting(self._item).__await__()
+
+    def __del__(self):
+        if self._queue is not None:
+            self._queue._drop(self._item)
+
+
+class QueueBatcher(object):
+    '''
+    Collects items in the event loop and puts them into the queue as one
+    batch - once per loop iteration, after `delay` seconds or if `max_items`
+    are collected. It has the same producer interface as `JanusQueue`.
+    '''
+    def __init__(
+            self,
+            queue: JanusQueue,
+            loop: asyncio.AbstractEventLoop,
+            max_items: int=256,
+            delay: float=0.0
+    ):
+        '''
+        Constructor with queue, loop and batch limits
+        :param queue: queue to put batches into
+        :param loop: event loop
+        :param max_items: maximal number of items in a batch
+        :param delay: maximal time in seconds to collect a batch, `0` means
+            until the end of the current loop iteration
+        '''
+        self.queue = queue
+        self.max_items = max_items
+        self.delay = delay
+        self._loop = loop
+        self._items = []
+        self._handle: typing.Optional[asyncio.Handle] = None
+
+    def put_nowait(self, item) -> bool:
+        '''
+        Add an item to the current batch, a full queue applies the overflow
+        policy of the queue
+        :param item: item to be put
+        :return: `True` if the item was added or dropped, `False` if the
+            caller has to wait for a free slot
+        '''
+        items = self._items
+        # the current batch takes slots of the queue
+        if self.queue.full(len(items)):
+            self.flush()
+            return self.queue.put_nowait(item)
+        items.append(item)
+        if len(items) >= self.max_items:
+            self.flush()
+        elif self._handle is None:
+            if self.delay > 0:
+                self._handle = self._loop.call_later(self.delay, self.flush)
+            else:
+                self._handle = self._loop.call_soon(self.flush)
+        return True
+
+    def put_later(self, item, wait: bool=True) -> typing.Awaitable:
+        '''
+        Put an item after the current batch, see `JanusQueue.put_later`
+        :param item: item to be put
+        :param wait: if `True`, the caller may await the result
+        :return: awaitable, which is done once the item is in the queue or
+            dropped
+        '''
+        self.flush()
+        return self.queue.put_later(item, wait)
+
+    async def put(self, item) -> None:
+        '''
+        Put an item after the current batch, wait until a free slot is
+        available
+        :param item: item to be put
+        '''
+        await self.put_later(item)
+
+    @property
+    def dropped(self) -> typing.Dict[int, int]:
+        return self.queue.dropped
+
+    def qsize(self) -> int:
+        return len(self._items) + self.queue.qsize()
+
+    def flush(self) -> None:
+        '''
+        Put the current batch into the queue
+        '''
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._items:
+            items, self._items = self._items, []
+            self.queue.put_many_nowait(items)
+
+
+class QueueWriter(threading.Thread):
+    '''
+    Writer thread - drains a queue into a handle function
+    '''
+    def __init__(
+            self,
+            queue: JanusQueue,
+            handle: typing.Callable[[typing.List], None],
+            max_items: int=256,
+            name: str='janus-logging-writer',
+            idle: typing.Optional[typing.Callable[[], None]]=None,
+            interval: typing.Optional[float]=None
+    ):
+        '''
+        Constructor with queue and handle function
+        :param queue: queue to be drained
+        :param handle: function called with a list of items
+        :param max_items: maximal number of items per call of `handle`
+        :param name: name of the thread
+        :param idle: function called after each batch and at least every
+            `interval` seconds
+        :param interval: maximal time in seconds between calls of `idle`
+        '''
+        super(QueueWriter, self).__init__(name=name, daemon=True)
+        self.queue = queue
+        self.handle = handle
+        self.max_items = max_items
+        self.idle = idle
+        self.interval = interval
+
+    def run(self) -> None:
+        queue = self.queue
+        while True:
+            batch = queue.get_batch(self.max_items, self.interval)
+            if batch:
+                try:
+                    self.handle(batch)
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+            elif queue.closed:
+                break
+            if self.idle is not None:
+                try:
+                    self.idle()
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+
+    def stop(self) -> None:
+        '''
+        Close the queue and wait until all items are written
+        '''
+        self.queue.close()
+        if self.is_alive():
+            self.join()
+
+
+class Sequencer(object):
+    '''
+    Reorder buffer - functions bound in the event loop are called in the
+    order of binding, regardless of the worker thread and the time they are
+    run. A worker, which finds its function out of order, leaves it to the
+    worker running the preceding one.
+    '''
+    def __init__(self):
+        self._tickets = itertools.count()
+        self._next = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._running = False
+
+    def bind(self, func: typing.Callable[[], None]) -> typing.Callable[[], None]:  # noqa E501
+        '''
+        Take the next ticket for a function - in the event loop
+        :param func: function to be called in order
+        :return: function to be run by a worker
+        '''
+        return functools.partial(self._run, next(self._tickets), func)
+
+    def _run(self, ticket: int, func: typing.Callable[[], None]) -> None:
+        pending = self._pending
+        lock = self._lock
+        with lock:
+            pending[ticket] = func
+            if self._running:
+                return
+            self._running = True
+        while True:
+            with lock:
+                func = pending.pop(self._next, None)
+                if func is None:
+                    self._running = False
+                    return
+                self._next += 1
+            try:
+                func()
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.ring
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.ring
+------------------
+Memory-mapped ring buffer sink and its reader
+
+The ring file consists of a header and the data area::
+
+    header  magic (8) | capacity u64 | write position u64 | reserved
+    data    frames - length u32 | payload
+
+The write position counts all bytes written since the ring was created. A
+frame never wraps around the end of the data area, the rest of the area is
+skipped (marked with `WRAP`, if there is space for it). Writing a record is
+a copy into the shared memory, a reader (another process) polls the write
+position:
+
+    janus-logging-ring /dev/shm/my_app.ring --follow
+'''
+
+from __future__ import absolute_import
+
+import argparse
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+import typing
+
+from .metrics import HandlerMetrics
+from .version import VERSION
+
+__all__ = ['RingBuffer', 'RingBufferHandler', 'RingBufferReader', 'main']
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+MAGIC = b'JLRING01'
+HEADER = struct.Struct('<8sQQ')
+HEADER_SIZE = 64
+LENGTH = struct.Struct('<I')
+POSITION = struct.Struct('<Q')
+POSITION_OFFSET = 16
+WRAP = 0xFFFFFFFF
+DEFAULT_RING_SIZE = 16 * 1024 * 1024
+
+
+class RingBuffer(object):
+    '''
+    Writer of a memory-mapped ring buffer
+    '''
+    def __init__(self, path: str, size: int=DEFAULT_RING_SIZE):
+        '''
+        Constructor with path and size - an existing ring with the same size
+        is continued, otherwise the ring is created
+        :param path: path of the ring file, e.g. in `/dev/shm`
+        :param size: size in bytes of the data area
+        '''
+        if size < 1024:
+            raise ValueError('size of a ring must be at least 1024 bytes')
+        self.path = path
+        self.capacity = size
+        self.max_frame = size // 4
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != HEADER_SIZE + size:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, HEADER_SIZE + size)
+            self._mm = mmap.mmap(fd, HEADER_SIZE + size)
+        finally:
+            os.close(fd)
+        magic, capacity, pos = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or capacity != size:
+            pos = 0
+            HEADER.pack_into(self._mm, 0, MAGIC, size, pos)
+        self._pos = pos
+        self._published = pos
+
+    def _publish(self, pos: int) -> None:
+        POSITION.pack_into(self._mm, POSITION_OFFSET, pos)
+        self._published = pos
+
+    def _put(self, data: bytes) -> bool:
+        mm = self._mm
+        n = len(data)
+        size = LENGTH.size + n
+        max_frame = self.max_frame
+        if size > max_frame:
+            return False
+        pos = self._pos
+        off = pos % self.capacity
+        remaining = self.capacity - off
+        wrap = remaining < size
+        # a reader checks a frame against the published position, so the
+        # unpublished bytes must not exceed `max_frame`
+        end = pos + size + (remaining if wrap else 0)
+        if end - self._published > max_frame:
+            self._publish(pos)
+        if wrap:
+            if remaining >= LENGTH.size:
+                LENGTH.pack_into(mm, HEADER_SIZE + off, WRAP)
+            pos += remaining
+            off = 0
+            if pos + size - self._published > max_frame:
+                self._publish(pos)
+        start = HEADER_SIZE + off
+        LENGTH.pack_into(mm, start, n)
+        start += LENGTH.size
+        mm[start:start + n] = data
+        self._pos = pos + size
+        return True
+
+    def write(self, frames: typing.Iterable[bytes]) -> int:
+        '''
+        Write frames and publish the new write position - within a batch it
+        is published, before the unpublished bytes exceed `max_frame`
+        :param frames: frames to be written
+        :return: number of frames, which are too large and dropped
+        '''
+        dropped = 0
+        for data in frames:
+            if not self._put(data):
+                dropped += 1
+        self._publish(self._pos)
+        return dropped
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+
+class RingBufferHandler(HandlerMetrics, logging.Handler):
+    '''
+    Handler, which writes records into a memory-mapped ring buffer
+    '''
+    def __init__(self, path: str, size: int=DEFAULT_RING_SIZE):
+        '''
+        Constructor with path and size of the ring
+        :param path: path of the ring file, e.g. in `/dev/shm`
+        :param size: size in bytes of the data area
+        '''
+        super(RingBufferHandler, self).__init__()
+        self.ring = RingBuffer(path, size)
+
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        '''
+        Format log record to UTF-8 encoded bytes
+        :param record: log record
+        :return: log bytes
+        '''
+        fmt = self.formatter
+        if hasattr(fmt, 'format_bytes'):
+            return fmt.format_bytes(record)
+        return self.format(record).encode('utf-8')
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            data = self.format_bytes(record)
+            if self.ring.write((data,)):
+                raise ValueError('record is too large for the ring')
+            if self.metrics is not None:
+                self.metrics.written(len(data))
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def handle_batch(self, records: typing.List[logging.LogRecord]) -> None:
+        '''
+        Handle a batch of log records
+        :param records: log records
+        '''
+        frames = []
+        for record in records:
+            if self.filter(record):
+                try:
+                    frames.append(self.format_bytes(record))
+                except RecursionError:
+                    raise
+                except Exception:
+                    self.handleError(record)
+        if frames:
+            self.acquire()
+            try:
+                if self.ring.write(frames):
+                    raise ValueError('record is too large for the ring')
+                if self.metrics is not None:
+                    self.metrics.written(sum(len(frame) for frame in frames))
+            except Exception:
+                self.handleError(records[-1])
+            finally:
+                self.release()
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self.ring.close()
+        finally:
+            self.release()
+        super(RingBufferHandler, self).close()
+
+
+class RingBufferReader(object):
+    '''
+    Reader of a memory-mapped ring buffer
+    '''
+    def __init__(self, path: str, from_start: bool=False):
+        '''
+        Constructor with path of the ring
+        :param path: path of the ring file
+        :param from_start: read the frames already in the ring (only if the
+            ring has not wrapped around yet), otherwise only new frames
+        '''
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, capacity, pos = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError('not a ring buffer: %s' % path)
+        self.capacity = capacity
+        self.max_frame = capacity // 4
+        self.lost = 0
+        if from_start and pos <= capacity:
+            pos = 0
+        self._pos = pos
+
+    def _write_pos(self) -> int:
+        return POSITION.unpack_from(self._mm, POSITION_OFFSET)[0]
+
+    def _resync(self, write_pos: int) -> None:
+        self.lost += 1
+        self._pos = write_pos
+
+    def read(self) -> typing.List[bytes]:
+        '''
+        Read all frames written since the last read
+        :return: list of frames
+        '''
+        mm = self._mm
+        capacity = self.capacity
+        frames = []
+        write_pos = self._write_pos()
+        while self._pos < write_pos:
+            pos = self._pos
+            if write_pos - pos > capacity - self.max_frame:
+                # the writer has overtaken the reader
+                self._resync(write_pos)
+                break
+            off = pos % capacity
+            remaining = capacity - off
+            if remaining < LENGTH.size:
+                self._pos = pos + remaining
+                continue
+            n = LENGTH.unpack_from(mm, HEADER_SIZE + off)[0]
+            if n == WRAP:
+                self._pos = pos + remaining
+                continue
+            if n + LENGTH.size > remaining:
+                self._resync(write_pos)
+                break
+            start = HEADER_SIZE + off + LENGTH.size
+            data = mm[start:start + n]
+            # the frame is valid only if it was not overwritten meanwhile
+            if self._write_pos() - pos > capacity - self.max_frame:
+                write_pos = self._write_pos()
+                self._resync(write_pos)
+                break
+            self._pos = pos + LENGTH.size + n
+            frames.append(data)
+        return frames
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def main(argv: typing.List[str]=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='janus-logging-ring',
+        description='Read records from a janus-logging ring buffer'
+    )
+    parser.add_argument('path', help='path of the ring file')
+    parser.add_argument(
+        '-f', '--follow', action='store_true', help='wait for new records'
+    )
+    parser.add_argument(
+        '-s', '--from-start', action='store_true',
+        help='read the records already in the ring'
+    )
+    parser.add_argument(
+        '-i', '--interval', type=float, default=0.1,
+        help='poll interval in seconds'
+    )
+    args = parser.parse_args(argv)
+    reader = RingBufferReader(args.path, from_start=args.from_start)
+    out = sys.stdout.buffer
+    lost = 0
+    try:
+        while True:
+            frames = reader.read()
+            if frames:
+                out.write(b'\n'.join(frames) + b'\n')
+                out.flush()
+            if reader.lost != lost:
+                sys.stderr.write(
+                    'janus-logging-ring: reader was overtaken, records are '
+                    'lost\n'
+                )
+                lost = reader.lost
+            if not args.follow:
+                break
+            if not frames:
+                time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.sampling
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.sampling
+----------------------
+Samplers for high-volume log sites - they decide per key (message template
+or call site) whether a log call is passed on. Log calls above `max_level`
+are never sampled, suppressed calls are counted per key. The state of at
+most `max_keys` keys is kept, the least recently used keys are forgotten.
+'''
+
+from __future__ import absolute_import
+
+import collections
+import logging
+import random
+import threading
+import time
+import typing
+
+from .version import VERSION
+
+__all__ = ['Sampler', 'EveryN', 'Probability', 'TokenBucket']
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+DEFAULT_MAX_KEYS = 10000
+# key of the suppressed log calls beyond `max_keys` keys
+OTHER_KEY = '<other>'
+
+
+class Sampler(object):
+    '''
+    Sampler interface
+    '''
+    BY = ('template', 'site')
+
+    def __init__(
+            self,
+            by: str='template',
+            max_level: int=logging.INFO,
+            max_keys: int=DEFAULT_MAX_KEYS
+    ):
+        '''
+        Constructor with key and level
+        :param by: key of the sampling - `template` (message before
+            formatting) or `site` (file and line of the log call)
+        :param max_level: log calls above this level are not sampled
+        :param max_keys: maximal number of keys with a state, suppressed
+            log calls of further keys are counted as `<other>`
+        '''
+        if by not in self.BY:
+            raise ValueError('unknown sampling key: %s' % by)
+        if max_keys < 1:
+            raise ValueError('max_keys must be positive')
+        self.by = by
+        self.max_level = max_level
+        self.max_keys = max_keys
+        self.suppressed = collections.Counter()
+        # log calls of the event loop and of sync loggers in other threads
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        '''
+        Decide whether a log call is passed on
+        :param key: key of the log call
+        :return: `True` if passed on, `False` if suppressed
+        '''
+        with self._lock:
+            if self.sample(key):
+                return True
+            suppressed = self.suppressed
+            if key not in suppressed and len(suppressed) >= self.max_keys:
+                key = OTHER_KEY
+            suppressed[key] += 1
+        return False
+
+    def sample(self, key: str) -> bool:
+        raise NotImplementedError()
+
+    def _touch(
+            self,
+            states: collections.OrderedDict,
+            key: str,
+            state: typing.Any
+    ) -> None:
+        '''
+        Store the state of a key, forget the least recently used key
+        '''
+        states[key] = state
+        states.move_to_end(key)
+        if len(states) > self.max_keys:
+            states.popitem(last=False)
+
+    def summary(self) -> typing.Dict[str, int]:
+        '''
+        Get and reset the numbers of suppressed log calls per key
+        :return: dictionary with numbers of suppressed log calls
+        '''
+        with self._lock:
+            suppressed, self.suppressed = \
+                self.suppressed, collections.Counter()
+        return dict(suppressed)
+
+
+class EveryN(Sampler):
+    '''
+    Pass on the first and then every `n`-th log call per key
+    '''
+    def __init__(self, n: int, **kwargs):
+        '''
+        Constructor with `n`, see `Sampler` for other arguments
+        :param n: one of `n` log calls is passed on
+        '''
+        if n < 1:
+            raise ValueError('n must be positive')
+        super(EveryN, self).__init__(**kwargs)
+        self.n = n
+        self._counts = collections.OrderedDict()
+
+    def sample(self, key: str) -> bool:
+        count = self._counts.get(key, 0)
+        self._touch(self._counts, key, count + 1)
+        return count % self.n == 0
+
+
+class Probability(Sampler):
+    '''
+    Pass on log calls with a probability
+    '''
+    def __init__(
+            self,
+            probability: float,
+            random_func: typing.Callable[[], float]=random.random,
+            **kwargs
+    ):
+        '''
+        Constructor with probability, see `Sampler` for other arguments
+        :param probability: probability between 0 and 1
+        :param random_func: function returning a random number in [0, 1)
+        '''
+        if not 0 <= probability <= 1:
+            raise ValueError('probability must be between 0 and 1')
+        super(Probability, self).__init__(**kwargs)
+        self.probability = probability
+        self._random = random_func
+
+    def sample(self, key: str) -> bool:  # @UnusedVariable
+        return self._random() < self.probability
+
+
+class TokenBucket(Sampler):
+    '''
+    Pass on up to `rate` log calls per second per key, with bursts up to
+    `burst` log calls
+    '''
+    def __init__(self, rate: float, burst: float=None, **kwargs):
+        '''
+        Constructor with rate and burst, see `Sampler` for other arguments
+        :param rate: log calls per second
+        :param burst: size of the bucket, default is `rate`
+        '''
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        super(TokenBucket, self).__init__(**kwargs)
+        self.rate = rate
+        self.burst = max(burst or rate, 1)
+        self._buckets = collections.OrderedDict()
+
+    def sample(self, key: str) -> bool:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = self.burst
+        else:
+            tokens = min(
+                self.burst, bucket[0] + (now - bucket[1]) * self.rate
+            )
+        if tokens >= 1:
+            self._touch(self._buckets, key, (tokens - 1, now))
+            return True
+        self._touch(self._buckets, key, (tokens, now))
+        return False
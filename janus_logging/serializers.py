@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# janus_logging.serializers
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+janus_logging.serializers
+-------------------------
+Json serializer backends - `json` and, if installed, `orjson` and `ujson`
+'''
+
+from __future__ import absolute_import
+
+import collections
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+from .version import VERSION
+
+__all__ = ['Serializer', 'SERIALIZERS', 'get_serializer']
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+Serializer = collections.namedtuple(
+    'Serializer',
+    ('name', 'dumps', 'dumpb', 'separator')
+)
+Serializer.__doc__ = '''
+Json serializer backend
+:param name: name of the backend
+:param dumps: serialize an object to `str`
+:param dumpb: serialize an object to UTF-8 encoded `bytes`
+:param separator: separator between items of an object
+'''
+
+
+def _json_dumpb(obj) -> bytes:
+    return json.dumps(obj).encode('utf-8')
+
+
+SERIALIZERS = collections.OrderedDict()
+if orjson is not None:
+    def _orjson_dumpb(obj, _dumps=orjson.dumps, _option=orjson.OPT_NON_STR_KEYS) -> bytes:  # noqa E501
+        return _dumps(obj, option=_option)
+
+    def _orjson_dumps(obj) -> str:
+        return _orjson_dumpb(obj).decode('utf-8')
+
+    SERIALIZERS['orjson'] = Serializer(
+        'orjson', _orjson_dumps, _orjson_dumpb, ','
+    )
+if ujson is not None:
+    def _ujson_dumps(obj, _dumps=ujson.dumps) -> str:
+        return _dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+    def _ujson_dumpb(obj) -> bytes:
+        return _ujson_dumps(obj).encode('utf-8')
+
+    SERIALIZERS['ujson'] = Serializer(
+        'ujson', _ujson_dumps, _ujson_dumpb, ','
+    )
+SERIALIZERS['json'] = Serializer('json', json.dumps, _json_dumpb, ', ')
+
+
+def get_serializer(name: str='auto') -> Serializer:
+    '''
+    Get a serializer backend
+    :param name: name of the backend, `auto` - the fastest installed one
+    :return: serializer backend
+    '''
+    if name == 'auto':
+        return next(iter(SERIALIZERS.values()))
+    try:
+        return SERIALIZERS[name]
+    except KeyError:
+        raise ValueError('serializer is not available: %s' % name)
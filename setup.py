@@ -76,7 +76,10 @@ REQUIRES_TESTS = REQUIRES_DEV + [
 ]
 REQUIRES_EXTRA = {
     'dev': REQUIRES_DEV,
-    'test': REQUIRES_TESTS
+    'test': REQUIRES_TESTS,
+    'orjson': ['orjson'],
+    'zstd': ['zstandard'],
+    'ujson': ['ujson'],
 }
 PACKAGES = find_packages(exclude=('scripts', 'tests'))
 
@@ -98,6 +101,14 @@ setup(
     tests_require=REQUIRES_TESTS,
     extras_require=REQUIRES_EXTRA,
     packages=PACKAGES,
+    entry_points={
+        'console_scripts': [
+            'janus-logging-aggregator = janus_logging.aggregator:main',
+            'janus-logging-decode = janus_logging.binary:main',
+            'janus-logging-benchmark = janus_logging.benchmark:main',
+            'janus-logging-ring = janus_logging.ring:main',
+        ],
+    },
     python_requires='>=3.6.0',
     include_package_data=True,
     long_description='\n\n'.join((long_description, changes_description)),
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# tests.test_aggregator
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+tests.test_aggregator
+---------------------
+Log aggregation of several processes
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import collections
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+import janus_logging
+
+VERSION = (1, 0, 0)
+
+__all__ = []
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+RECORDS = 200
+
+
+def _worker(path: str, worker: int) -> None:
+    loop = asyncio.new_event_loop()
+    logger = janus_logging.JanusLogger(
+        name='test_unit_janus_logger_aggregator',
+        level=logging.INFO,
+        loop=loop,
+        fixture=janus_logging.fixture_json_aggregator,
+        path=path,
+        propagate=False,
+        queue_size=100,
+        extra=dict(worker=worker)
+    )
+    try:
+        log = logger.logger_async(nowait=True)
+
+        async def _coro():
+            for i in range(RECORDS):
+                # large records, which tear if written concurrently
+                log.info('Hello #%s %s', i, 'x' * 8192)
+                if i % 50 == 0:
+                    await asyncio.sleep(0)
+
+        loop.run_until_complete(_coro())
+    finally:
+        logger.shutdown()
+        loop.close()
+
+
+def _check(test: unittest.TestCase, filename: str, workers: int) -> None:
+    with open(filename) as f:
+        lines = [json.loads(line) for line in f]
+    test.assertEqual(len(lines), workers * RECORDS)
+    messages = collections.defaultdict(list)
+    for line in lines:
+        messages[line['worker']].append(line['msg'].split()[1])
+    test.assertEqual(len(messages), workers)
+    for msgs in messages.values():
+        test.assertEqual(msgs, ['#%s' % i for i in range(RECORDS)])
+
+
+@unittest.skipUnless(
+    'fork' in multiprocessing.get_all_start_methods(), 'requires fork'
+)
+class Test(unittest.TestCase):
+    def test_00_thread(self):
+        ctx = multiprocessing.get_context('fork')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'log.sock')
+            filename = os.path.join(tmp, 'app.log')
+            aggregator = janus_logging.LogAggregator(path, filename=filename)
+            aggregator.start()
+            try:
+                workers = [
+                    ctx.Process(target=_worker, args=(path, i))
+                    for i in range(4)
+                ]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                    self.assertEqual(worker.exitcode, 0)
+            finally:
+                aggregator.stop()
+            self.assertEqual(aggregator.records, 4 * RECORDS)
+            self.assertFalse(os.path.exists(path))
+            _check(self, filename, 4)
+
+    def test_01_process(self):
+        ctx = multiprocessing.get_context('fork')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'log.sock')
+            filename = os.path.join(tmp, 'app.log')
+            process = janus_logging.spawn_aggregator(path, filename=filename)
+            try:
+                workers = [
+                    ctx.Process(target=_worker, args=(path, i))
+                    for i in range(3)
+                ]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+            finally:
+                process.terminate()
+                process.join()
+            self.assertEqual(process.exitcode, 0)
+            _check(self, filename, 3)
+
+    def test_02_unreachable(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            hdlr = janus_logging.AggregatorHandler(
+                os.path.join(tmp, 'log.sock'), retry_interval=60
+            )
+            record = logging.LogRecord(
+                'test_unit_janus_aggregator', logging.INFO, __file__, 1,
+                'Hello', (), None
+            )
+            hdlr.handle(record)
+            hdlr.handle_batch([record, record])
+            self.assertEqual(hdlr.dropped, 3)
+            hdlr.close()
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
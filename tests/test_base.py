@@ -14,6 +14,8 @@ Package
 from __future__ import absolute_import
 
 import asyncio
+import io
+import json
 import logging
 import sys
 import unittest
@@ -568,6 +570,194 @@ class Test(unittest.TestCase):
         finally:
             logger.shutdown()
 
+    def test_20_executor(self):
+        name = 'test_unit_janus_logger_executor'
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.INFO,
+            loop=self.loop,
+            stream=stream,
+            formatter=logging.Formatter('%(threadName)s %(message)s')
+        )
+        try:
+            log = logger.logger_async()
+            self.assertIs(log.executor, logger.logger_async().executor)
+
+            async def _coro():
+                await asyncio.gather(
+                    *[log.info('aio-Hello #%s', i) for i in range(100)]
+                )
+
+            self.loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+        lines = [x.split(' ', 1) for x in stream.getvalue().splitlines()]
+        self.assertEqual(
+            [x[1] for x in lines], ['aio-Hello #%s' % i for i in range(100)]
+        )
+        self.assertEqual(
+            {x[0] for x in lines}, {'janus-logging-%s_0' % name}
+        )
+
+    def test_21_ordered(self):
+        name = 'test_unit_janus_logger_ordered'
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.INFO,
+            loop=self.loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            workers=4,
+            ordered=True
+        )
+        try:
+            log = logger.logger_async()
+            self.assertIsNotNone(log.sequencer)
+            logger.logger_sync().info('sync')
+
+            async def _coro():
+                tasks = [log.info('aio-Hello #%s', i) for i in range(200)]
+                tasks[0].cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            self.loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+        lines = [json.loads(x) for x in stream.getvalue().splitlines()]
+        self.assertEqual([x['seq'] for x in lines], list(range(201)))
+        self.assertEqual(
+            [x['msg'] for x in lines[1:]],
+            ['aio-Hello #%s' % i for i in range(200)]
+        )
+
+    def test_22_level_cache(self):
+        name = 'test_unit_janus_logger_level'
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.WARNING,
+            loop=self.loop,
+            stream=stream
+        )
+        try:
+            log = logger.logger_async()
+            child = log.bind(a=1)
+            log_sync = logger.logger_sync()
+            self.assertIs(log.info('disabled'), janus_logging.DONE)
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(child.info('disabled'))
+            finally:
+                loop.close()
+            logger.setLevel(logging.INFO)
+            self.assertTrue(child.isEnabledFor(logging.INFO))
+            self.loop.run_until_complete(child.info('info'))
+            log_sync.info('info sync')
+            log.setLevel(logging.ERROR)
+            self.assertFalse(log_sync.isEnabledFor(logging.WARNING))
+            self.assertIs(child.warning('disabled'), janus_logging.DONE)
+            log_sync.warning('disabled')
+            self.loop.run_until_complete(log.error('error'))
+        finally:
+            logger.shutdown()
+        self.assertEqual(
+            stream.getvalue().splitlines(), ['info', 'info sync', 'error']
+        )
+
+    def test_23_strip_levels(self):
+        name = 'test_unit_janus_logger_strip'
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.WARNING,
+            loop=self.loop,
+            stream=stream,
+            strip_levels=True
+        )
+        try:
+            logs = [
+                logger.logger_async(), logger.logger_async(nowait=True),
+                logger.logger_sync()
+            ]
+            for log in logs:
+                self.assertIn('info', log.__dict__)
+                self.assertNotIn('warning', log.__dict__)
+            self.assertIs(logs[0].debug('disabled'), janus_logging.DONE)
+            self.assertIsNone(logs[1].info('disabled'))
+            self.assertIsNone(logs[2].info('disabled'))
+            logger.setLevel(logging.INFO)
+            child = logs[0].bind(a=1)
+            for log in logs + [child]:
+                self.assertNotIn('info', log.__dict__)
+                self.assertIn('debug', log.__dict__)
+
+            async def _coro():
+                await logs[0].info('info')
+                logs[1].info('info nowait')
+                logs[2].info('info sync')
+
+            self.loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+        self.assertEqual(
+            sorted(stream.getvalue().splitlines()),
+            ['info', 'info nowait', 'info sync']
+        )
+
+    def test_24_shutdown_pending(self):
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_shutdown_pending',
+            level=logging.INFO,
+            loop=self.loop,
+            stream=stream
+        )
+        try:
+            log = logger.logger_async()
+            # log calls, which did not run yet, are written by `shutdown`
+            tasks = [log.info('aio-Hello #%s', i) for i in range(3)]
+            tasks[0].cancel()
+        finally:
+            logger.shutdown()
+        self.assertEqual(
+            stream.getvalue().splitlines(),
+            ['aio-Hello #%s' % i for i in range(3)]
+        )
+        self.loop.run_until_complete(
+            asyncio.gather(*tasks, return_exceptions=True)
+        )
+
+    def test_25_ordered_single_worker(self):
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_ordered_single',
+            level=logging.INFO,
+            loop=self.loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            ordered=True
+        )
+        try:
+            log = logger.logger_async()
+            self.assertIsNotNone(log.sequencer)
+
+            async def _coro():
+                tasks = [log.info('aio-Hello #%s', i) for i in range(5)]
+                tasks[0].cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            self.loop.run_until_complete(_coro())
+            logger.logger_sync().info('sync')
+        finally:
+            logger.shutdown()
+        lines = [json.loads(x) for x in stream.getvalue().splitlines()]
+        self.assertEqual(
+            [(x['seq'], x['msg']) for x in lines],
+            [(i, 'aio-Hello #%s' % i) for i in range(5)] + [(5, 'sync')]
+        )
+
 
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# tests.test_benchmark
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+tests.test_benchmark
+--------------------
+Benchmark suite
+'''
+
+from __future__ import absolute_import
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from janus_logging import benchmark
+
+VERSION = (1, 0, 0)
+
+__all__ = []
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+class Test(unittest.TestCase):
+    def test_00_suite(self):
+        res = benchmark.bench_suite(
+            records=20, fixtures=('json',), extras=('small',),
+            concurrency=(1, 10)
+        )
+        self.assertEqual(len(res['results']), 8)
+        for item in res['results']:
+            self.assertEqual(item['records'], 20)
+            self.assertGreater(item['records_per_sec'], 0)
+            self.assertLessEqual(item['p50_us'], item['p999_us'])
+        changes = benchmark.compare(res, res)
+        self.assertEqual(len(changes), 8)
+        self.assertEqual(
+            set(x['throughput_change'] for x in changes), {0.0}
+        )
+
+    def test_01_cli(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'results.json')
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                benchmark.main([
+                    'suite', '-n', '10', '-c', '2', '--adapter', 'async',
+                    '--fixture', 'default', '--level', 'enabled',
+                    '--extra', 'large', '-o', path
+                ])
+                benchmark.main(['compare', path, path])
+            lines = out.getvalue().splitlines()
+            self.assertEqual(len(lines), 2)
+            self.assertIn('(  +0.0%)', lines[1])
+            self.assertEqual(
+                len(benchmark.load_results(path)['results']), 1
+            )
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
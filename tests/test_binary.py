@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# tests.test_binary
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+tests.test_binary
+-----------------
+Binary record encoding
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+import janus_logging
+from janus_logging import binary
+
+VERSION = (1, 0, 0)
+
+__all__ = []
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+class _Point(object):
+    def __str__(self):
+        return 'point'
+
+
+class Test(unittest.TestCase):
+    def test_00_roundtrip(self):
+        encoder = binary.BinaryEncoder(max_names=6)
+        data = b''.join([
+            encoder.encode(
+                1.5, 10, 'INFO', 'func', 'app.py', 'Hello %s %d %s',
+                ('world', i, None), dict(user='u1', data={'a': [1, 2]})
+            ) for i in range(3)
+        ] + [
+            encoder.encode(
+                2.5, 11, 'ERROR', 'func', 'app.py', 'At %s', (_Point(),),
+                dict(ratio=0.5, ok=True, big=1 << 70)
+            ),
+            encoder.encode(3.5, 12, 'INFO', 'other', 'app.py', 'Plain', (), {})
+        ])
+        self.assertEqual(data.count(b'Hello %s %d %s'), 1)
+        self.assertEqual(data.count(b'user'), 1)
+        decoder = binary.BinaryDecoder()
+        records = []
+        # fed in pieces, incomplete frames are kept
+        for i in range(0, len(data), 7):
+            records.extend(decoder.feed(data[i:i + 7]))
+        self.assertEqual(decoder.pending, 0)
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[2], dict(
+            user='u1', data={'a': [1, 2]}, logged_at=1.5, line_numer=10,
+            function='func', level='INFO', msg='Hello world 2 None',
+            file_path='app.py'
+        ))
+        self.assertEqual(records[3]['msg'], 'At point')
+        self.assertEqual(records[3]['big'], 1 << 70)
+        self.assertIs(records[3]['ok'], True)
+        # beyond `max_names` names are written inline
+        self.assertEqual(records[4]['function'], 'other')
+        # a header with the dictionary starts a new stream
+        decoder = binary.BinaryDecoder()
+        tail = encoder.encode(3.5, 12, 'INFO', 'func', 'app.py', 'Hi', (), {})
+        self.assertEqual(decoder.feed(encoder.header() + tail[:-3]), [])
+        self.assertEqual(decoder.pending, len(tail) - 3)
+        self.assertEqual(decoder.feed(tail[-3:])[0]['msg'], 'Hi')
+
+    def test_01_file(self):
+        loop = asyncio.new_event_loop()
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'app.jlb')
+            logger = janus_logging.JanusLogger(
+                name='test_unit_janus_logger_binary_file',
+                level=logging.DEBUG,
+                loop=loop,
+                fixture=janus_logging.fixture_binary_file,
+                filename=filename,
+                max_bytes=1024,
+                backup_count=20,
+                propagate=False,
+                extra=dict(app='test')
+            )
+            try:
+                log = logger.logger_async()
+
+                async def _coro():
+                    for i in range(100):
+                        await log.info(
+                            'Hello #%s', i, extra=dict(request=i % 3)
+                        )
+
+                loop.run_until_complete(_coro())
+            finally:
+                logger.shutdown()
+                loop.close()
+            files = [
+                filename + '.%d' % i for i in range(20, 0, -1)
+                if os.path.exists(filename + '.%d' % i)
+            ] + [filename]
+            self.assertGreater(len(files), 2)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                binary.main(['-t', 'epoch'] + files)
+            lines = [json.loads(line) for line in out.getvalue().splitlines()]
+            self.assertEqual(len(lines), 100)
+            self.assertEqual(lines[-1]['msg'], 'Hello #99')
+            self.assertEqual(lines[-1]['request'], 0)
+            self.assertEqual(lines[-1]['app'], 'test')
+            self.assertEqual(lines[-1]['level'], 'INFO')
+            self.assertIsInstance(lines[-1]['logged_at'], float)
+            # the template is written once per file
+            with open(filename, 'rb') as f:
+                self.assertEqual(f.read().count(b'Hello #%s'), 1)
+
+    def test_02_stream(self):
+        loop = asyncio.new_event_loop()
+        stream = io.BytesIO()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_binary_stream',
+            level=logging.DEBUG,
+            loop=loop,
+            fixture=janus_logging.fixture_binary,
+            stream=stream,
+            propagate=False
+        )
+        try:
+            log = logger.logger_sync()
+            for i in range(10):
+                log.warning('Hello #%s', i)
+        finally:
+            logger.shutdown()
+            loop.close()
+        records = binary.BinaryDecoder().feed(stream.getvalue())
+        self.assertEqual(
+            [x['msg'] for x in records], ['Hello #%s' % i for i in range(10)]
+        )
+        self.assertEqual(records[0]['level'], 'WARNING')
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
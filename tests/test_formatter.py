@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# tests.test_formatter
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+tests.test_formatter
+--------------------
+Json formatter
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import datetime
+import io
+import json
+import logging
+import unittest
+
+import janus_logging
+
+VERSION = (1, 0, 0)
+
+__all__ = []
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+def make_record(**extra) -> logging.LogRecord:
+    logger = logging.getLogger('test_unit_janus_formatter')
+    return logger.makeRecord(
+        logger.name, logging.INFO, __file__, 42, 'Hello #%s', (1,), None,
+        'func', extra
+    )
+
+
+class Test(unittest.TestCase):
+    def test_00_record_extra(self):
+        fmt = janus_logging.SyncJsonFormatter()
+        record = make_record(b=2, a=1, _private=3)
+        self.assertEqual(
+            list(fmt.get_record_extra(record, fmt.RESERVED_ATTRS).items()),
+            [('b', 2), ('a', 1)]
+        )
+        self.assertEqual(
+            fmt.get_record_extra(make_record(), fmt.RESERVED_ATTRS), {}
+        )
+
+    def test_01_format(self):
+        fmt = janus_logging.SyncJsonFormatter(static='s', other=1)
+        res = fmt.format(make_record(a=1))
+        self.assertEqual(
+            list(json.loads(res)),
+            ['static', 'other', 'a', 'logged_at', 'line_numer', 'function',
+             'level', 'msg', 'file_path']
+        )
+        res = json.loads(res)
+        self.assertEqual(res['static'], 's')
+        self.assertEqual(res['msg'], 'Hello #1')
+        self.assertEqual(res['line_numer'], 42)
+
+    def test_02_format_override(self):
+        fmt = janus_logging.SyncJsonFormatter(static='s', msg='static')
+        res = json.loads(fmt.format(make_record(static='r')))
+        self.assertEqual(res['static'], 'r')
+        self.assertEqual(res['msg'], 'Hello #1')
+        fmt = janus_logging.SyncJsonFormatter(
+            serializer=lambda x: json.dumps(x, sort_keys=True), static='s'
+        )
+        res = fmt.format(make_record(a=1))
+        self.assertEqual(list(json.loads(res))[:2], ['a', 'file_path'])
+
+    def test_10_timestamp(self):
+        record = make_record()
+        fmt = janus_logging.SyncJsonFormatter()
+        for created in (record.created, record.created + 0.5):
+            record.created = created
+            exp = datetime.datetime.fromtimestamp(
+                created, datetime.timezone.utc
+            ).astimezone(None)
+            res = datetime.datetime.fromisoformat(
+                json.loads(fmt.format(record))['logged_at']
+            )
+            self.assertLess(abs(res - exp), datetime.timedelta(microseconds=2))
+            self.assertEqual(res.utcoffset(), exp.utcoffset())
+        fmt = janus_logging.SyncJsonFormatter(timestamp_format='epoch')
+        res = json.loads(fmt.format(record))['logged_at']
+        self.assertEqual(res, record.created)
+        fmt = janus_logging.SyncJsonFormatter(timestamp_format='epoch_ns')
+        res = json.loads(fmt.format(record))['logged_at']
+        self.assertEqual(res, int(record.created * 1e9))
+        with self.assertRaises(ValueError):
+            janus_logging.SyncJsonFormatter(timestamp_format='bla')
+
+    def test_20_serializers(self):
+        self.assertIn('json', janus_logging.SERIALIZERS)
+        self.assertIs(
+            janus_logging.get_serializer('auto'),
+            next(iter(janus_logging.SERIALIZERS.values()))
+        )
+        with self.assertRaises(ValueError):
+            janus_logging.get_serializer('bla')
+        record = make_record(a='\u00e4', b=[1, 2])
+        for name in janus_logging.SERIALIZERS:
+            fmt = janus_logging.SyncJsonFormatter(serializer=name, static=1)
+            res = fmt.format_bytes(record)
+            self.assertIsInstance(res, bytes)
+            self.assertEqual(fmt.format(record), res.decode('utf-8'))
+            res = json.loads(res)
+            self.assertEqual(res['static'], 1)
+            self.assertEqual(res['a'], '\u00e4')
+            self.assertEqual(res['b'], [1, 2])
+
+    def test_21_stream_handler_bytes(self):
+        raw = io.BytesIO()
+        stream = io.TextIOWrapper(raw, encoding='utf-8')
+        hdlr = janus_logging.JanusStreamHandler(stream)
+        hdlr.setFormatter(janus_logging.SyncJsonFormatter())
+        stream.write('text\n')
+        hdlr.handle(make_record(a=1))
+        hdlr.handle_batch([make_record(a=2), make_record(a=3)])
+        lines = raw.getvalue().decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'text')
+        self.assertEqual([json.loads(x)['a'] for x in lines[1:]], [1, 2, 3])
+
+    def test_30_context(self):
+        root = janus_logging.Context(dict(a=1, b=2))
+        child = root.bind(c=3)
+        self.assertIs(child.parent, root)
+        self.assertEqual(child.fields, dict(c=3))
+        self.assertEqual(dict(child.bind(a=4)), dict(a=4, b=2, c=3))
+        self.assertIs(root.bind(), root)
+        for context, call, static, exp in (
+                (child, {}, {}, dict(a=1, b=2, c=3)),
+                (child.bind(a=4), {}, {}, dict(a=4, b=2, c=3)),
+                (child, dict(b=5, d=6), {}, dict(a=1, b=5, c=3, d=6)),
+                (child, {}, dict(s=0), dict(s=0, a=1, b=2, c=3)),
+                (child, {}, dict(a=0), dict(a=1, b=2, c=3)),
+                (child.bind(msg='m'), {}, {}, dict(a=1, b=2, c=3)),
+                (root.bind(c=janus_logging.Lazy(lambda: 7)), {}, {},
+                 dict(a=1, b=2, c=7)),
+                (janus_logging.Context(), dict(d=6), {}, dict(d=6)),
+        ):
+            record = make_record(**{**context.extra, **call})
+            for serializer in list(janus_logging.SERIALIZERS) + [json.dumps]:
+                fmt = janus_logging.SyncJsonFormatter(
+                    serializer=serializer, **static
+                )
+                for res in (fmt.format(record), fmt.format_bytes(record)):
+                    res = json.loads(res)
+                    self.assertEqual(res['msg'], 'Hello #1')
+                    self.assertEqual(list(res)[:len(exp)], list(exp))
+                    self.assertEqual(
+                        {k: res[k] for k in exp}, exp
+                    )
+
+    def test_31_bind(self):
+        stream = io.StringIO()
+        logger = logging.getLogger('test_unit_janus_formatter_bind')
+        logger.propagate = False
+        hdlr = logging.StreamHandler(stream)
+        hdlr.setFormatter(janus_logging.SyncJsonFormatter(static='s'))
+        logger.addHandler(hdlr)
+        log = janus_logging.SyncLoggerAdapter(logger, dict(a=1))
+        child = log.bind(b=2)
+        self.assertIsInstance(child, janus_logging.SyncLoggerAdapter)
+        self.assertIs(child.extra.parent, log.extra)
+        child.warning('Hello', extra=dict(c=3))
+        log.warning('Hello')
+        res = [json.loads(x) for x in stream.getvalue().splitlines()]
+        self.assertEqual(list(res[0])[:4], ['static', 'a', 'b', 'c'])
+        self.assertNotIn('b', res[1])
+
+    def test_32_record_attributes(self):
+        names = []
+
+        def _filter(record):
+            names.append(record.user)
+            return True
+
+        loop = asyncio.new_event_loop()
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_formatter_attributes',
+            level=logging.INFO,
+            loop=loop,
+            stream=stream,
+            formatter=logging.Formatter('%(request_id)s %(user)s %(message)s'),
+            propagate=False
+        )
+        try:
+            logging.getLogger(
+                'test_unit_janus_formatter_attributes'
+            ).addFilter(_filter)
+            log = logger.logger_sync(request_id='r1').bind(user='u1')
+            log.info('hello')
+            log.info('call', extra=dict(user='u2'))
+            log.bind(msg='m').info('reserved')
+        finally:
+            logger.shutdown()
+            loop.close()
+        self.assertEqual(
+            stream.getvalue().splitlines(),
+            ['r1 u1 hello', 'r1 u2 call', 'r1 u1 reserved']
+        )
+        self.assertEqual(names, ['u1', 'u2', 'u1'])
+
+    def test_33_mutable_extra(self):
+        loop = asyncio.new_event_loop()
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_formatter_mutable',
+            level=logging.INFO,
+            loop=loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            propagate=False
+        )
+        try:
+            log = logger.logger_sync(a=1)
+            child = log.bind(b=2)
+            child.info('first')
+            # `extra` of an adapter is changed like a dict
+            log.extra['a'] = 3
+            log.extra.update(c=4)
+            child.info('second')
+            del log.extra['c']
+            child.extra.setdefault('d', 5)
+            child.info('third')
+        finally:
+            logger.shutdown()
+            loop.close()
+        res = [json.loads(x) for x in stream.getvalue().splitlines()]
+        self.assertEqual(
+            [{k: x[k] for k in 'abcd' if k in x} for x in res], [
+                dict(a=1, b=2), dict(a=3, b=2, c=4), dict(a=3, b=2, d=5)
+            ]
+        )
+        self.assertEqual(dict(log.extra), dict(a=3))
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# tests.test_handlers
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+tests.test_handlers
+-------------------
+Handlers
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import gzip
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+import unittest
+import zlib
+
+import janus_logging
+
+VERSION = (1, 0, 0)
+
+__all__ = []
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+def make_record(msg: str, level: int=logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(
+        'test_unit_janus_handlers', level, __file__, 1, msg, (), None
+    )
+
+
+class FlushStream(io.StringIO):
+    def __init__(self):
+        super(FlushStream, self).__init__()
+        self.flushed = []
+
+    def flush(self):
+        self.flushed.append(len(self.getvalue().splitlines()))
+
+
+class Test(unittest.TestCase):
+    def test_00_buffered_fd(self):
+        with tempfile.TemporaryFile(mode='w+') as stream:
+            hdlr = janus_logging.BufferedBytesHandler(
+                stream, buffer_size=1024, flush_interval=60
+            )
+            hdlr.handle(make_record('first'))
+            stream.seek(0)
+            self.assertEqual(stream.read(), '')
+            hdlr.handle_batch([make_record('x' * 1024)])
+            stream.seek(0)
+            self.assertEqual(stream.read(), 'first\n' + 'x' * 1024 + '\n')
+            hdlr.handle(make_record('last'))
+            hdlr.close()
+            stream.seek(0)
+            self.assertEqual(stream.read().splitlines()[-1], 'last')
+
+    def test_01_buffered_stream(self):
+        for stream in (io.BytesIO(), io.StringIO()):
+            hdlr = janus_logging.BufferedBytesHandler(
+                stream, buffer_size=1024, flush_interval=0
+            )
+            hdlr.setFormatter(janus_logging.SyncJsonFormatter())
+            hdlr.handle(make_record('first'))
+            value = stream.getvalue()
+            if isinstance(value, bytes):
+                value = value.decode('utf-8')
+            self.assertEqual(json.loads(value)['msg'], 'first')
+
+    def test_02_fixture_buffered(self):
+        stream = io.StringIO()
+        loop = asyncio.new_event_loop()
+        try:
+            logger = janus_logging.JanusLogger(
+                name='test_unit_janus_logger_buffered',
+                level=logging.INFO,
+                loop=loop,
+                fixture=janus_logging.fixture_json,
+                stream=stream,
+                buffered=True,
+                buffer_size=1 << 20
+            )
+            hdlr = logger.logger_sync().logger.handlers[0]
+            self.assertIsInstance(hdlr, janus_logging.BufferedBytesHandler)
+            logger.logger_sync().info('Hello')
+            self.assertEqual(stream.getvalue(), '')
+            logger.shutdown()
+            self.assertEqual(json.loads(stream.getvalue())['msg'], 'Hello')
+        finally:
+            loop.close()
+
+    def test_10_flush_policy(self):
+        stream = FlushStream()
+        hdlr = janus_logging.JanusStreamHandler(
+            stream, janus_logging.FlushPolicy.every(3)
+        )
+        for i in range(7):
+            hdlr.handle(make_record('#%s' % i))
+        self.assertEqual(stream.flushed, [3, 6])
+        hdlr.handle(make_record('error', logging.ERROR))
+        self.assertEqual(stream.flushed, [3, 6, 8])
+        hdlr.handle_batch([make_record('#%s' % i) for i in range(4)])
+        self.assertEqual(stream.flushed, [3, 6, 8, 12])
+        #
+        stream = FlushStream()
+        hdlr = janus_logging.JanusStreamHandler(
+            stream, janus_logging.FlushPolicy.timed(0.01)
+        )
+        hdlr.handle(make_record('first'))
+        hdlr.flush_due()
+        self.assertEqual(stream.flushed, [])
+        time.sleep(0.02)
+        hdlr.flush_due()
+        self.assertEqual(stream.flushed, [1])
+
+    def test_11_flush_policy_logger(self):
+        loop = asyncio.new_event_loop()
+        for nowait in (False, True):
+            stream = FlushStream()
+            logger = janus_logging.JanusLogger(
+                name='test_unit_janus_logger_flush_%s' % nowait,
+                level=logging.INFO,
+                loop=loop,
+                stream=stream,
+                flush_policy=janus_logging.FlushPolicy.timed(0.01)
+            )
+            try:
+                if nowait:
+                    logger.logger_async(nowait=True).info('Hello')
+                else:
+                    logger.logger_sync().info('Hello')
+                loop.run_until_complete(asyncio.sleep(0.1))
+                self.assertEqual(stream.flushed, [1])
+            finally:
+                logger.shutdown()
+        loop.close()
+
+    def test_20_threaded_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'test.log')
+            hdlr = janus_logging.ThreadedFileHandler(filename)
+            for i in range(10):
+                hdlr.handle(make_record('#%s' % i))
+            hdlr.flush()
+            with open(filename) as f:
+                self.assertEqual(
+                    f.read().splitlines(), ['#%s' % i for i in range(10)]
+                )
+            hdlr.close()
+            hdlr.handle(make_record('#10'))
+            hdlr.close()
+            with open(filename) as f:
+                self.assertEqual(f.read().splitlines()[-1], '#10')
+
+    def test_21_threaded_file_rotation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'test.log')
+            hdlr = janus_logging.ThreadedFileHandler(
+                filename, max_bytes=10, backup_count=2
+            )
+            for i in range(4):
+                hdlr.handle(make_record('#%s%s' % (i, 'x' * 5)))
+                hdlr.flush()
+            hdlr.close()
+            self.assertEqual(
+                sorted(os.listdir(tmp)),
+                ['test.log', 'test.log.1', 'test.log.2']
+            )
+            for suffix, i in (('', 3), ('.1', 2), ('.2', 1)):
+                with open(filename + suffix) as f:
+                    self.assertEqual(f.read(), '#%s%s\n' % (i, 'x' * 5))
+            #
+            hdlr = janus_logging.ThreadedFileHandler(
+                filename, mode='w', interval=0.01
+            )
+            hdlr.handle(make_record('first'))
+            hdlr.flush()
+            time.sleep(0.02)
+            hdlr.handle(make_record('second'))
+            hdlr.close()
+            with open(filename) as f:
+                self.assertEqual(f.read(), 'second\n')
+
+    def test_22_fixture_json_file(self):
+        loop = asyncio.new_event_loop()
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'test.log')
+            logger = janus_logging.JanusLogger(
+                name='test_unit_janus_logger_json_file',
+                level=logging.INFO,
+                loop=loop,
+                fixture=janus_logging.fixture_json_file,
+                filename=filename
+            )
+            try:
+                log = logger.logger_async(nowait=True)
+
+                async def _coro():
+                    for i in range(10):
+                        log.info('Hello #%s', i)
+
+                loop.run_until_complete(_coro())
+            finally:
+                logger.shutdown()
+                loop.close()
+            with open(filename) as f:
+                lines = [json.loads(x)['msg'] for x in f]
+            self.assertEqual(lines, ['Hello #%s' % i for i in range(10)])
+
+    def test_23_compressed_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'test.log.gz')
+            with self.assertRaises(ValueError):
+                janus_logging.ThreadedFileHandler(filename, compression='xz')
+            hdlr = janus_logging.ThreadedFileHandler(
+                filename, compression='gzip'
+            )
+            for i in range(10):
+                hdlr.handle(make_record('#%s' % i))
+            hdlr.flush()
+            # a partial file is readable up to the last flush
+            with open(filename, 'rb') as f:
+                data = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(
+                    f.read()
+                )
+            self.assertEqual(
+                data.decode().splitlines(), ['#%s' % i for i in range(10)]
+            )
+            hdlr.close()
+            # appended as a new gzip member
+            hdlr.handle(make_record('#10'))
+            hdlr.close()
+            with gzip.open(filename, 'rt') as f:
+                self.assertEqual(
+                    f.read().splitlines(), ['#%s' % i for i in range(11)]
+                )
+
+    @unittest.skipUnless(
+        'zstd' in janus_logging.COMPRESSIONS, 'requires zstandard'
+    )
+    def test_24_compressed_file_zstd(self):
+        import zstandard
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'test.log.zst')
+            hdlr = janus_logging.ThreadedFileHandler(
+                filename, compression='zstd'
+            )
+            for i in range(10):
+                hdlr.handle(make_record('#%s' % i))
+            hdlr.close()
+            with open(filename, 'rb') as f:
+                reader = zstandard.ZstdDecompressor().stream_reader(f)
+                data = reader.read()
+            self.assertEqual(
+                data.decode().splitlines(), ['#%s' % i for i in range(10)]
+            )
+
+    def test_25_fixture_compressed_stream(self):
+        loop = asyncio.new_event_loop()
+        stream = io.BytesIO()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_json_gzip',
+            level=logging.INFO,
+            loop=loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            compression='gzip',
+            compression_level=1,
+            propagate=False
+        )
+        try:
+            log = logger.logger_async()
+
+            async def _coro():
+                for i in range(10):
+                    await log.info('Hello #%s', i)
+
+            loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+            loop.close()
+        lines = gzip.decompress(stream.getvalue()).splitlines()
+        self.assertEqual(
+            [json.loads(x)['msg'] for x in lines],
+            ['Hello #%s' % i for i in range(10)]
+        )
+
+    def test_26_threaded_text_stream(self):
+        stream = io.StringIO()
+        hdlr = janus_logging.ThreadedStreamHandler(stream)
+        for i in range(10):
+            hdlr.handle(make_record('#%s' % i))
+        hdlr.close()
+        self.assertEqual(
+            stream.getvalue().splitlines(), ['#%s' % i for i in range(10)]
+        )
+        with self.assertRaises(ValueError):
+            janus_logging.ThreadedStreamHandler(stream, compression='gzip')
+        # the I/O hooks are abstract
+        with self.assertRaises(TypeError):
+            janus_logging.ThreadedHandler()
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
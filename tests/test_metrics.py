@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# tests.test_metrics
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+tests.test_metrics
+------------------
+Metrics
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import io
+import logging
+import threading
+import unittest
+import urllib.request
+
+import janus_logging
+
+VERSION = (1, 0, 0)
+
+__all__ = []
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+class Test(unittest.TestCase):
+    def test_00_metrics(self):
+        metrics = janus_logging.Metrics(buckets=(0.001, 0.1))
+        record = logging.LogRecord(
+            'test_unit_janus_metrics', logging.INFO, __file__, 1, 'Hello',
+            (), None
+        )
+        self.assertTrue(metrics.filter(record))
+
+        def _thread():
+            metrics.filter(record)
+            metrics.submitted(3)
+            metrics.completed((0.0005, 0.05, 1.0))
+            metrics.written(10)
+            metrics.flushed()
+            metrics.error()
+
+        thread = threading.Thread(target=_thread)
+        thread.start()
+        thread.join()
+        res = metrics.snapshot()
+        self.assertEqual(res['records'], {'INFO': 2})
+        self.assertEqual(res['submitted'], 3)
+        self.assertEqual(res['completed'], 3)
+        self.assertEqual(
+            res['latency']['buckets'],
+            [(0.001, 1), (0.1, 2), (float('inf'), 3)]
+        )
+        self.assertEqual(res['latency']['count'], 3)
+        self.assertEqual(
+            (res['bytes'], res['flushes'], res['errors']), (10, 1, 1)
+        )
+        text = janus_logging.to_prometheus(res, labels={'logger': 'a"b'})
+        self.assertIn(
+            'janus_logging_records_total{logger="a\\"b",level="INFO"} 2',
+            text
+        )
+        self.assertIn(
+            'janus_logging_latency_seconds_bucket{logger="a\\"b",le="+Inf"} 3',  # noqa E501
+            text
+        )
+        self.assertIn('# TYPE janus_logging_latency_seconds histogram', text)
+
+    def test_01_thread_end(self):
+        metrics = janus_logging.Metrics()
+        metrics.submitted()
+        threads = [
+            threading.Thread(target=metrics.submitted, args=(2,))
+            for _ in range(50)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # the counters of ended threads are folded into the total
+        self.assertEqual(len(metrics._all), 1)
+        self.assertEqual(metrics.snapshot()['submitted'], 101)
+
+    def test_10_logger(self):
+        loop = asyncio.new_event_loop()
+        stream = io.StringIO()
+        texts = []
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_metrics',
+            level=logging.INFO,
+            loop=loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            propagate=False,
+            metrics_port=0,
+            metrics_callback=texts.append
+        )
+        raise_exceptions = logging.raiseExceptions
+        logging.raiseExceptions = False
+        try:
+            log_async = logger.logger_async()
+            log_nowait = logger.logger_async(nowait=True)
+            log_sync = logger.logger_sync()
+
+            async def _coro():
+                for i in range(5):
+                    await log_async.info('Hello #%s', i)
+                    log_nowait.warning('Hello #%s', i)
+                    log_sync.info('Hello #%s', i)
+                    await log_async.debug('Hello #%s', i)
+                log_sync.info('%d', 'no number')
+                await asyncio.sleep(0.05)
+
+            loop.run_until_complete(_coro())
+            res = logger.metrics()
+            self.assertEqual(res['records'], {'INFO': 11, 'WARNING': 5})
+            self.assertEqual(res['submitted'], 10)
+            self.assertEqual(res['completed'], 10)
+            self.assertEqual(res['pending'], 0)
+            self.assertEqual(res['queue_depth'], 0)
+            self.assertEqual(res['latency']['count'], 10)
+            self.assertEqual(res['bytes'], len(stream.getvalue()))
+            # records of the writer thread may be flushed at once
+            self.assertTrue(11 <= res['flushes'] <= 15)
+            self.assertEqual(res['errors'], 1)
+            host, port = logger._metrics_server.address
+            with urllib.request.urlopen(
+                    'http://%s:%s/metrics' % (host, port)
+            ) as resp:
+                text = resp.read().decode('utf-8')
+            self.assertIn(
+                'janus_logging_records_total{logger="test_unit_janus_logger_metrics",level="WARNING"} 5',  # noqa E501
+                text
+            )
+        finally:
+            logging.raiseExceptions = raise_exceptions
+            logger.shutdown()
+            loop.close()
+        self.assertEqual(len(texts), 1)
+        self.assertIn('janus_logging_pending{', texts[0])
+        self.assertIsNone(janus_logging.JanusLogger(
+            name='test_unit_janus_logger_metrics_off',
+            loop=loop,
+            stream=stream
+        ).metrics())
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
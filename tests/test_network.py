@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# tests.test_network
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+tests.test_network
+------------------
+Batched socket sink
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+import janus_logging
+
+VERSION = (1, 0, 0)
+
+__all__ = []
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+class _Collector(object):
+    '''
+    Stub of a log collector - receives newline-delimited Json
+    '''
+    def __init__(self):
+        self.lines = []
+        self.connections = 0
+        self.writers = []
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self.writers.append(writer)
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            self.lines.append(json.loads(line.decode('utf-8')))
+        writer.close()
+
+    async def start(self, port: int=0) -> int:
+        self.server = await asyncio.start_server(
+            self._handle, '127.0.0.1', port
+        )
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        for writer in self.writers:
+            writer.close()
+        self.writers = []
+        await self.server.wait_closed()
+
+
+async def _wait_for(func, timeout: float=5.0) -> None:
+    for _ in range(int(timeout / 0.01)):
+        if func():
+            return
+        await asyncio.sleep(0.01)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_00_batches(self):
+        collector = _Collector()
+        port = self.loop.run_until_complete(collector.start())
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_socket',
+            level=logging.INFO,
+            loop=self.loop,
+            fixture=janus_logging.fixture_json_socket,
+            host='127.0.0.1',
+            port=port,
+            flush_interval=0.05,
+            propagate=False
+        )
+        try:
+            log = logger.logger_async(nowait=True)
+
+            async def _coro():
+                for i in range(100):
+                    log.info('Hello #%s', i)
+                await _wait_for(lambda: len(collector.lines) == 100)
+                log.error('error')
+                await _wait_for(lambda: len(collector.lines) == 101)
+
+            self.loop.run_until_complete(_coro())
+            # sent at shutdown
+            log.info('last')
+        finally:
+            logger.shutdown()
+            self.loop.run_until_complete(collector.stop())
+        self.assertEqual(
+            [x['msg'] for x in collector.lines],
+            ['Hello #%s' % i for i in range(100)] + ['error', 'last']
+        )
+        self.assertEqual(collector.connections, 1)
+
+    def test_01_reconnect(self):
+        collector = _Collector()
+        port = self.loop.run_until_complete(collector.start())
+        hdlr = janus_logging.AsyncSocketHandler(
+            self.loop, host='127.0.0.1', port=port, flush_interval=0.01,
+            backoff=(0.01, 0.05)
+        )
+        hdlr.setFormatter(janus_logging.SyncJsonFormatter())
+
+        def _log(msg):
+            hdlr.handle(logging.LogRecord(
+                'test_unit_janus_socket', logging.INFO, __file__, 1, msg,
+                (), None
+            ))
+
+        async def _coro():
+            for i in range(5):
+                _log('#%s' % i)
+            await _wait_for(lambda: len(collector.lines) == 5)
+            await collector.stop()
+            await _wait_for(lambda: not hdlr.connected)
+            for i in range(5, 10):
+                _log('#%s' % i)
+            await asyncio.sleep(0.1)
+            await collector.start(port)
+            await _wait_for(lambda: len(collector.lines) == 10)
+
+        try:
+            self.loop.run_until_complete(_coro())
+        finally:
+            hdlr.close()
+            self.loop.run_until_complete(collector.stop())
+        self.assertEqual(
+            [x['msg'] for x in collector.lines], ['#%s' % i for i in range(10)]
+        )
+        self.assertEqual(collector.connections, 2)
+        self.assertEqual(hdlr.dropped, 0)
+
+    def test_02_bounded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            hdlr = janus_logging.AsyncSocketHandler(
+                self.loop, path=os.path.join(tmp, 'collector.sock'),
+                max_buffer=100, backoff=(0.01, 0.01)
+            )
+            records = [
+                logging.LogRecord(
+                    'test_unit_janus_socket', logging.INFO, __file__, 1,
+                    'x' * 39, (), None
+                ) for _ in range(10)
+            ]
+            for record in records:
+                hdlr.handle(record)
+            self.loop.run_until_complete(asyncio.sleep(0.05))
+            self.assertEqual(hdlr.dropped, 8)
+            hdlr.close()
+            self.assertEqual(hdlr.dropped, 10)
+        with self.assertRaises(ValueError):
+            janus_logging.AsyncSocketHandler(self.loop)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,501 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# tests.test_queue
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+tests.test_queue
+----------------
+Queue based async logging
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import contextvars
+import io
+import json
+import logging
+import threading
+import time
+import unittest
+
+import janus_logging
+
+VERSION = (1, 0, 0)
+
+__all__ = []
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+class Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.close()
+
+    def test_00_queue_put_get(self):
+        queue = janus_logging.JanusQueue(2, self.loop)
+        self.assertTrue(queue.put_nowait(1))
+        self.assertTrue(queue.put_nowait(2))
+        self.assertFalse(queue.put_nowait(3))
+        self.assertTrue(queue.full())
+
+        async def _put():
+            await queue.put(3)
+
+        task = self.loop.create_task(_put())
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.assertFalse(task.done())
+        res = []
+        thread = threading.Thread(target=lambda: res.extend(
+            queue.get_batch(10)
+        ))
+        thread.start()
+        thread.join()
+        self.loop.run_until_complete(asyncio.wait_for(task, 1))
+        self.assertEqual(res, [1, 2])
+        self.assertEqual(queue.get_batch(10), [3])
+        queue.close()
+        self.assertEqual(queue.get_batch(10), [])
+
+    def test_01_queue_overflow(self):
+        for overflow, res, dropped in (
+                ('drop_newest', [(20, 0), (20, 1)], {20: 1, 40: 1}),
+                ('drop_oldest', [(20, 2), (40, 3)], {20: 2}),
+                ('drop_below', [(20, 0), (20, 1)], {20: 1})
+        ):
+            queue = janus_logging.JanusQueue(
+                2, self.loop, overflow, logging.WARNING
+            )
+            self.assertTrue(queue.put_nowait((20, 0)))
+            self.assertTrue(queue.put_nowait((20, 1)))
+            self.assertTrue(queue.put_nowait((20, 2)))
+            self.assertEqual(
+                queue.put_nowait((40, 3)), overflow != 'drop_below'
+            )
+            self.assertEqual(queue.get_batch(10), res)
+            self.assertEqual(queue.dropped, dropped)
+        with self.assertRaises(ValueError):
+            janus_logging.JanusQueue(2, self.loop, 'bla')
+
+    def test_02_queue_order(self):
+        queue = janus_logging.JanusQueue(1, self.loop)
+        self.assertTrue(queue.put_nowait(0))
+        tasks = [self.loop.create_task(queue.put(i)) for i in (1, 2)]
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.assertEqual(queue.get_batch(10), [0])
+        # a free slot is taken by the waiting put
+        self.assertFalse(queue.put_nowait(3))
+        self.assertEqual(queue.get_batch(10), [1])
+        self.assertEqual(queue.get_batch(10), [2])
+        self.loop.run_until_complete(
+            asyncio.wait_for(asyncio.gather(*tasks), 1)
+        )
+
+    def test_03_batcher_size(self):
+        queue = janus_logging.JanusQueue(10, self.loop, 'drop_newest')
+        batcher = janus_logging.QueueBatcher(queue, self.loop, 256)
+        for i in range(300):
+            self.assertTrue(batcher.put_nowait((20, i)))
+        batcher.flush()
+        self.assertEqual(queue.get_batch(1000), [(20, i) for i in range(10)])
+        self.assertEqual(queue.dropped, {20: 290})
+
+    def test_04_queue_waiting_size(self):
+        queue = janus_logging.JanusQueue(2, self.loop, max_waiting=2)
+        futs = [queue.put_later((20, i), wait=False) for i in range(5)]
+        # two items are put, two wait and the others are dropped
+        self.assertEqual(
+            [fut.done() for fut in futs], [True, True, False, False, True]
+        )
+        self.assertEqual(queue.dropped, {20: 1})
+        # beyond the line a put waits, if it is awaited
+        late = queue.put_later((20, 5))
+        queue.put_later((20, 6))
+        self.assertEqual(queue.dropped, {20: 2})
+
+        async def _put():
+            await late
+
+        task = self.loop.create_task(_put())
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.assertEqual(queue.get_batch(10), [(20, 0), (20, 1)])
+        self.assertEqual(queue.get_batch(10), [(20, 2), (20, 3)])
+        self.assertEqual(queue.get_batch(10), [(20, 5)])
+        self.loop.run_until_complete(asyncio.wait_for(task, 1))
+
+    def test_10_queue_logger(self):
+        name = 'test_unit_janus_logger_queue'
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.DEBUG,
+            loop=self.loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            queue_size=16,
+            extra=dict(bla='blabla')
+        )
+        try:
+            log = logger.logger_async(logger_name='test_logger_async')
+            self.assertIsInstance(log, janus_logging.AsyncQueueLoggerAdapter)
+
+            async def _coro():
+                for i in range(100):
+                    await log.info('aio-Hello #%s', i, extra=dict(counter=i))
+
+            self.loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+        lines = [json.loads(x) for x in stream.getvalue().splitlines()]
+        self.assertEqual([x['counter'] for x in lines], list(range(100)))
+        self.assertEqual(lines[0]['msg'], 'aio-Hello #0')
+        self.assertEqual(lines[0]['bla'], 'blabla')
+        self.assertEqual(lines[0]['function'], '_coro')
+        self.assertEqual(lines[0]['file_path'], __file__)
+
+    def test_11_queue_logger_exception(self):
+        name = 'test_unit_janus_logger_queue_exc'
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.DEBUG,
+            loop=self.loop,
+            stream=stream,
+            queue_size=16
+        )
+        try:
+            log = logger.logger_async()
+
+            async def _coro():
+                try:
+                    raise ValueError('boom')
+                except ValueError:
+                    await log.exception('failed')
+
+            self.loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+        self.assertIn('failed', stream.getvalue())
+        self.assertIn('ValueError: boom', stream.getvalue())
+
+    def test_20_nowait_logger(self):
+        name = 'test_unit_janus_logger_nowait'
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.INFO,
+            loop=self.loop,
+            stream=stream
+        )
+        try:
+            log = logger.logger_async(nowait=True)
+            self.assertIsInstance(log, janus_logging.AsyncNowaitLoggerAdapter)
+
+            async def _coro():
+                for i in range(10):
+                    self.assertIsNone(log.info('aio-Hello #%s', i))
+                    self.assertIsNone(log.debug('aio-Debug #%s', i))
+
+            self.loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+        self.assertEqual(
+            stream.getvalue().splitlines(),
+            ['aio-Hello #%s' % i for i in range(10)]
+        )
+
+    def test_30_batch(self):
+        class _Stream(io.StringIO):
+            writes = 0
+
+            def write(self, s):
+                self.writes += 1
+                return super(_Stream, self).write(s)
+
+        name = 'test_unit_janus_logger_batch'
+        stream = _Stream()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.INFO,
+            loop=self.loop,
+            stream=stream,
+            batch_size=1000
+        )
+        try:
+            log = logger.logger_async(nowait=True)
+
+            async def _coro():
+                for i in range(100):
+                    log.info('aio-Hello #%s', i)
+
+            self.loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+        self.assertEqual(
+            stream.getvalue().splitlines(),
+            ['aio-Hello #%s' % i for i in range(100)]
+        )
+        self.assertEqual(stream.writes, 1)
+
+    def test_31_overflow_logger(self):
+        class _Stream(io.StringIO):
+            event = threading.Event()
+
+            def write(self, s):
+                self.event.wait(1)
+                return super(_Stream, self).write(s)
+
+        name = 'test_unit_janus_logger_overflow'
+        stream = _Stream()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.INFO,
+            loop=self.loop,
+            stream=stream,
+            queue_size=2,
+            batch_size=1,
+            overflow='drop_below',
+            overflow_level=logging.ERROR
+        )
+        try:
+            log = logger.logger_async()
+            self.assertIsInstance(log, janus_logging.AsyncQueueLoggerAdapter)
+
+            async def _coro():
+                log.info('first')
+                await asyncio.sleep(0.05)
+                for i in range(5):
+                    log.info('#%s', i)
+                task = log.error('error')
+                self.assertIsInstance(task, asyncio.Future)
+                stream.event.set()
+                await task
+
+            self.loop.run_until_complete(_coro())
+            self.assertEqual(log.dropped, {'INFO': 3})
+            self.assertEqual(logger.dropped, {'INFO': 3})
+        finally:
+            logger.shutdown()
+        self.assertEqual(
+            stream.getvalue().splitlines(), ['first', '#0', '#1', 'error']
+        )
+        with self.assertRaises(ValueError):
+            janus_logging.JanusLogger(name=name, overflow='bla')
+
+    def test_32_blocked_order(self):
+        class _Stream(io.StringIO):
+            event = threading.Event()
+
+            def write(self, s):
+                self.event.wait(1)
+                return super(_Stream, self).write(s)
+
+        stream = _Stream()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_blocked_order',
+            level=logging.INFO,
+            loop=self.loop,
+            stream=stream,
+            queue_size=8,
+            batch_size=1
+        )
+        try:
+            log = logger.logger_async(nowait=True)
+
+            async def _coro():
+                for i in range(20):
+                    log.info('#%s', i)
+                    if i == 10:
+                        # the writer frees slots before the loop runs again,
+                        # the next records must not overtake waiting ones
+                        stream.event.set()
+                        time.sleep(0.1)
+                await asyncio.sleep(0.1)
+
+            self.loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+        self.assertEqual(
+            stream.getvalue().splitlines(), ['#%s' % i for i in range(20)]
+        )
+
+    def test_33_block_awaited(self):
+        class _Stream(io.StringIO):
+            def write(self, s):
+                time.sleep(0.0001)
+                return super(_Stream, self).write(s)
+
+        stream = _Stream()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_block_awaited',
+            level=logging.INFO,
+            loop=self.loop,
+            stream=stream,
+            queue_size=10,
+            overflow='block',
+            batch_size=1
+        )
+        try:
+            log = logger.logger_async()
+            log_nowait = logger.logger_async(nowait=True)
+
+            async def _worker(i):
+                for j in range(5):
+                    await log.info('#%s-%s', i, j)
+
+            async def _coro():
+                await asyncio.gather(*[_worker(i) for i in range(100)])
+                # fire-and-forget log calls do not wait beyond the line
+                for i in range(1000):
+                    log_nowait.info('nowait #%s', i)
+
+            self.loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(
+            sorted(x for x in lines if x[0] == '#'),
+            sorted('#%s-%s' % (i, j) for i in range(100) for j in range(5))
+        )
+        dropped = logger.dropped
+        self.assertEqual(len(lines) - 500 + dropped.get('INFO', 0), 1000)
+        self.assertGreater(dropped['INFO'], 0)
+
+    def test_40_lazy(self):
+        threads = []
+
+        def _value(value):
+            threads.append(threading.current_thread().name)
+            return value
+
+        name = 'test_unit_janus_logger_lazy'
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.DEBUG,
+            loop=self.loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            propagate=False,
+            extra=dict(a=1, b=2)
+        )
+        logger.logger_sync().logger.handlers[0].setLevel(logging.INFO)
+        try:
+            log = logger.logger_async(nowait=True)
+
+            async def _coro():
+                log.debug(janus_logging.Lazy(_value, 'debug'))
+                log.info(
+                    janus_logging.Lazy(_value, 'Hello %s'),
+                    janus_logging.Lazy(_value, 1),
+                    extra=dict(b=janus_logging.Lazy(_value, 3), c=4)
+                )
+
+            self.loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+        res = json.loads(stream.getvalue())
+        self.assertEqual(res['msg'], 'Hello 1')
+        self.assertEqual(
+            [(k, res[k]) for k in 'abc'], [('a', 1), ('b', 3), ('c', 4)]
+        )
+        self.assertEqual(list(res)[:3], ['a', 'b', 'c'])
+        self.assertEqual(
+            threads, ['janus-logging-writer-%s' % name] * 3
+        )
+
+    def test_41_lazy_args(self):
+        calls = []
+
+        def _func():
+            calls.append(1)
+
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_lazy_args',
+            level=logging.INFO,
+            loop=self.loop,
+            stream=stream,
+            queue_size=16
+        )
+        try:
+            logs = [
+                logger.logger_async(nowait=True), logger.logger_sync()
+            ]
+            for log in logs:
+                log.info(
+                    'r=%r d=%d f=%.1f s=%s', janus_logging.Lazy(lambda: [1]),
+                    janus_logging.Lazy(lambda: 3),
+                    janus_logging.Lazy(lambda: 0.25),
+                    janus_logging.Lazy(lambda: 'x')
+                )
+                log.info('%(a)r', {'a': janus_logging.Lazy(lambda: 'y')})
+                # only `Lazy` messages are evaluated
+                log.info(_func)
+        finally:
+            logger.shutdown()
+        self.assertEqual(
+            stream.getvalue().splitlines(),
+            ["r=[1] d=3 f=0.2 s=x", "'y'", str(_func)] * 2
+        )
+        self.assertEqual(calls, [])
+
+    def test_50_contextvars(self):
+        request_id = contextvars.ContextVar('request_id')
+        user = contextvars.ContextVar('user')
+        name = 'test_unit_janus_logger_contextvars'
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name=name,
+            level=logging.INFO,
+            loop=self.loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            contextvars=[request_id]
+        )
+        logger.register_contextvar(user, 'user_name')
+        try:
+            logs = [logger.logger_async(), logger.logger_async(nowait=True)]
+
+            async def _request(i):
+                request_id.set(i)
+                if i:
+                    user.set('user%s' % i)
+                for log in logs:
+                    await asyncio.sleep(0)
+                    log.info('request')
+
+            async def _coro():
+                request_id.set(-1)
+                await asyncio.gather(*[
+                    self.loop.create_task(_request(i)) for i in range(3)
+                ])
+                logs[0].info('done', extra=dict(request_id='call'))
+
+            self.loop.run_until_complete(_coro())
+            self.loop.run_until_complete(asyncio.sleep(0.05))
+        finally:
+            logger.shutdown()
+        res = [json.loads(x) for x in stream.getvalue().splitlines()]
+        done = [x for x in res if x['msg'] == 'done']
+        res = [x for x in res if x['msg'] == 'request']
+        self.assertEqual(
+            sorted((x['request_id'], x.get('user_name')) for x in res),
+            sorted([(i, 'user%s' % i if i else None) for i in range(3)] * 2)
+        )
+        self.assertEqual(done[0]['request_id'], 'call')
+        self.assertNotIn('user_name', done[0])
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# tests.test_ring
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+tests.test_ring
+---------------
+Memory-mapped ring buffer
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import janus_logging
+from janus_logging.ring import RingBuffer
+
+VERSION = (1, 0, 0)
+
+__all__ = []
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+def make_record(msg: str) -> logging.LogRecord:
+    return logging.LogRecord(
+        'test_unit_janus_ring', logging.INFO, __file__, 1, msg, (), None
+    )
+
+
+class Test(unittest.TestCase):
+    def test_00_wrap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'test.ring')
+            ring = RingBuffer(path, 1024)
+            reader = janus_logging.RingBufferReader(path)
+            frames = [b'%03d' % i + b'x' * 96 for i in range(30)]
+            for i in range(0, 30, 3):
+                self.assertEqual(ring.write(frames[i:i + 3]), 0)
+                self.assertEqual(reader.read(), frames[i:i + 3])
+            self.assertEqual(reader.lost, 0)
+            self.assertEqual(ring.write([b'x' * 1024]), 1)
+            self.assertEqual(reader.read(), [])
+            reader.close()
+            ring.close()
+            # a ring of the same size is continued
+            ring = RingBuffer(path, 1024)
+            reader = janus_logging.RingBufferReader(path)
+            ring.write([b'next'])
+            self.assertEqual(reader.read(), [b'next'])
+            reader.close()
+            ring.close()
+
+    def test_01_overrun(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'test.ring')
+            ring = RingBuffer(path, 1024)
+            reader = janus_logging.RingBufferReader(path, from_start=True)
+            ring.write([b'x' * 100 for _ in range(20)])
+            self.assertEqual(reader.read(), [])
+            self.assertEqual(reader.lost, 1)
+            ring.write([b'after'])
+            self.assertEqual(reader.read(), [b'after'])
+            reader.close()
+            ring.close()
+
+    def test_02_handler(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'test.ring')
+            hdlr = janus_logging.RingBufferHandler(path, 4096)
+            reader = janus_logging.RingBufferReader(path)
+            hdlr.handle(make_record('first'))
+            hdlr.handle_batch([make_record('#1'), make_record('#2')])
+            self.assertEqual(reader.read(), [b'first', b'#1', b'#2'])
+            reader.close()
+            hdlr.close()
+
+    def test_03_batch_publish(self):
+        class _Ring(RingBuffer):
+            # a reader polls the ring, while the batch is written
+            def _put(self, data):
+                res = super(_Ring, self)._put(data)
+                reads.extend(reader.read())
+                return res
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'test.ring')
+            ring = _Ring(path, 1024)
+            reader = janus_logging.RingBufferReader(path)
+            reads = []
+            frames = [b'%03d' % i + b'x' * (i % 7 * 20) for i in range(60)]
+            ring.write(frames[:5])
+            ring.write(frames[5:])
+            reads.extend(reader.read())
+            indexes = [int(frame[:3]) for frame in reads]
+            self.assertEqual([frames[i] for i in indexes], reads)
+            self.assertEqual(indexes, sorted(set(indexes)))
+            self.assertEqual(indexes[-1], 59)
+            reader.close()
+            ring.close()
+
+    def test_10_fixture_cli(self):
+        loop = asyncio.new_event_loop()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'test.ring')
+            logger = janus_logging.JanusLogger(
+                name='test_unit_janus_logger_json_ring',
+                level=logging.INFO,
+                loop=loop,
+                fixture=janus_logging.fixture_json_ring,
+                path=path,
+                size=1 << 16
+            )
+            try:
+                log = logger.logger_async(nowait=True)
+
+                async def _coro():
+                    for i in range(10):
+                        log.info('Hello #%s', i)
+
+                loop.run_until_complete(_coro())
+            finally:
+                logger.shutdown()
+                loop.close()
+            out = subprocess.check_output([
+                sys.executable, '-m', 'janus_logging.ring', path,
+                '--from-start'
+            ])
+            lines = [json.loads(x)['msg'] for x in out.splitlines()]
+            self.assertEqual(lines, ['Hello #%s' % i for i in range(10)])
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
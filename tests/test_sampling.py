@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# tests.test_sampling
+'''
+:author:    madkote
+:contact:   madkote(at)bluewin.ch
+:copyright: Copyright 2020, madkote
+
+tests.test_sampling
+-------------------
+Samplers
+'''
+
+from __future__ import absolute_import
+
+import asyncio
+import io
+import itertools
+import json
+import logging
+import time
+import unittest
+
+import janus_logging
+
+VERSION = (1, 0, 0)
+
+__all__ = []
+__author__ = 'madkote <madkote(at)bluewin.ch>'
+__version__ = '.'.join(str(x) for x in VERSION)
+__copyright__ = 'Copyright 2020, madkote'
+
+
+class Test(unittest.TestCase):
+    def test_00_samplers(self):
+        sampler = janus_logging.EveryN(3)
+        self.assertEqual(
+            [sampler.allow(key) for key in 'aaaabab'],
+            [True, False, False, True, True, False, False]
+        )
+        self.assertEqual(sampler.summary(), {'a': 3, 'b': 1})
+        self.assertEqual(sampler.summary(), {})
+        #
+        values = itertools.cycle((0.1, 0.5, 0.9))
+        sampler = janus_logging.Probability(
+            0.5, random_func=lambda: next(values)
+        )
+        self.assertEqual(
+            [sampler.allow('a') for _ in range(3)], [True, False, False]
+        )
+        #
+        sampler = janus_logging.TokenBucket(100, burst=2)
+        self.assertEqual(
+            [sampler.allow('a') for _ in range(3)], [True, True, False]
+        )
+        self.assertTrue(sampler.allow('b'))
+        time.sleep(0.02)
+        self.assertTrue(sampler.allow('a'))
+        with self.assertRaises(ValueError):
+            janus_logging.EveryN(2, by='bla')
+        # the state of the least recently used key is forgotten
+        sampler = janus_logging.EveryN(2, max_keys=1)
+        self.assertEqual(
+            [sampler.allow(key) for key in 'aabba'],
+            [True, False, True, False, True]
+        )
+        self.assertEqual(sampler.summary(), {'a': 1, '<other>': 1})
+
+    def test_10_logger(self):
+        loop = asyncio.new_event_loop()
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_sampling',
+            level=logging.INFO,
+            loop=loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            sampler=janus_logging.EveryN(5, by='site')
+        )
+        try:
+            logs = [
+                logger.logger_async(), logger.logger_async(nowait=True),
+                logger.logger_sync()
+            ]
+
+            async def _coro():
+                for log in logs:
+                    for i in range(10):
+                        log.info('Hello #%s', i)
+                        log.info('Other #%s', i)
+                    log.warning('warning')
+                await asyncio.sleep(0.05)
+
+            loop.run_until_complete(_coro())
+        finally:
+            logger.shutdown()
+            loop.close()
+        res = [json.loads(x) for x in stream.getvalue().splitlines()]
+        self.assertEqual(
+            sorted(x['msg'] for x in res[:-1]),
+            sorted(['Hello #0', 'Hello #5', 'Other #0', 'Other #5',
+                    'warning'] * 3)
+        )
+        self.assertEqual(res[-1]['msg'], 'sampling suppressed 48 log calls')
+        self.assertEqual(
+            sorted(res[-1]['suppressed'].values()), [24, 24]
+        )
+        # caller of nowait and sync log calls
+        self.assertEqual(
+            len([x for x in res if x['function'] == '_coro']), 10
+        )
+
+    def test_11_callable_keys(self):
+        loop = asyncio.new_event_loop()
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_sampling_callable',
+            level=logging.INFO,
+            loop=loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            sampler=janus_logging.EveryN(2)
+        )
+        try:
+            log = logger.logger_sync().bind(user='u1')
+            for i in range(2):
+                log.info(janus_logging.Lazy(lambda: 'first'))
+                log.info(janus_logging.Lazy(lambda: 'second'))
+                log.info(janus_logging.Lazy(str, 'third'))
+                log.info(janus_logging.Lazy(repr, 'fourth'))
+        finally:
+            logger.shutdown()
+            loop.close()
+        res = [json.loads(x) for x in stream.getvalue().splitlines()]
+        self.assertEqual(
+            [x['msg'] for x in res[:-1]],
+            ['first', 'second', 'third', "'fourth'"]
+        )
+        # the sampled log method of a child adapter logs its fields
+        self.assertEqual([x.get('user') for x in res[:-1]], ['u1'] * 4)
+        self.assertEqual(len(res[-1]['suppressed']), 4)
+
+    def test_12_summary_last(self):
+        loop = asyncio.new_event_loop()
+        stream = io.StringIO()
+        logger = janus_logging.JanusLogger(
+            name='test_unit_janus_logger_sampling_last',
+            level=logging.INFO,
+            loop=loop,
+            fixture=janus_logging.fixture_json,
+            stream=stream,
+            queue_size=10000,
+            sampler=janus_logging.EveryN(2, by='site')
+        )
+        try:
+            log = logger.logger_async(nowait=True)
+
+            async def _coro():
+                for i in range(2000):
+                    log.info('Hello #%s', i)
+
+            loop.run_until_complete(_coro())
+        finally:
+            # queued records are written by the writer during shutdown
+            logger.shutdown()
+            loop.close()
+        res = [json.loads(x) for x in stream.getvalue().splitlines()]
+        self.assertEqual(len(res), 1001)
+        self.assertEqual(
+            [x['msg'] for x in res[:-1]],
+            ['Hello #%s' % i for i in range(0, 2000, 2)]
+        )
+        self.assertEqual(res[-1]['msg'], 'sampling suppressed 1000 log calls')
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()